@@ -12,24 +12,30 @@ bl_info = {
     "category": "Animation"
 }
 
-import bpy
 
-
-from . import ui
-from . import bone_groups
-from . import selection_sets
+# Blender modules load on register, so the helpers import without bpy
+def get_modules():
+    """Modules with Blender classes and handlers, in registration order"""
+    
+    from . import live_sync, rig_registry, ui
+    from .bone_groups import ui as bone_groups_ui
+    from .classification import ui as classification_ui
+    from .remapping import ui as remapping_ui
+    from .scene_presets import ui as scene_presets_ui
+    from .selection_sets import ui as selection_sets_ui
+    
+    return [rig_registry, scene_presets_ui, ui, bone_groups_ui, selection_sets_ui, remapping_ui, classification_ui,
+            live_sync]
 
 
 def register():
-    ui.register()
-    bone_groups.ui.register()
-    selection_sets.ui.register()
+    for module in get_modules():
+        module.register()
 
 
 def unregister():
-    ui.unregister()
-    bone_groups.ui.unregister()
-    selection_sets.ui.unregister()
+    for module in reversed(get_modules()):
+        module.unregister()
 
 
 if __name__ == "__main__":
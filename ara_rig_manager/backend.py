@@ -0,0 +1,68 @@
+"""Data access backend of the helpers
+
+Helpers reach Blender data only through the backend: its objects, armatures,
+scenes, collections and active object, and whether rigs have bone groups or,
+from Blender 4.0, bone collections. Everything but the ui modules and Blender
+handlers therefore imports and runs without bpy. The Blender backend imports bpy when
+first used. fake_armature.FakeBackend holds rigs in memory, so capture, apply,
+diffing and rollback can be profiled or fuzzed with plain python.
+"""
+
+#----------------------------------------------------------------#
+#-------------------------- BACKENDS ----------------------------#
+#----------------------------------------------------------------#
+
+class BlenderBackend:
+    """Data of the file open in Blender"""
+    
+    def __init__(self):
+        import bpy
+        self.bpy = bpy
+    
+    @property
+    def objects(self):
+        return self.bpy.data.objects
+    
+    @property
+    def armatures(self):
+        return self.bpy.data.armatures
+    
+    @property
+    def scenes(self):
+        return self.bpy.data.scenes
+    
+    @property
+    def collections(self):
+        return self.bpy.data.collections
+    
+    @property
+    def active_object(self):
+        return self.bpy.context.object
+    
+    @property
+    def has_bone_groups(self):
+        """Blender 4.0 replaced pose bone groups with armature bone collections"""
+        
+        return self.bpy.app.version < (4, 0, 0)
+
+
+_backend = None
+
+
+def get_backend():
+    """Backend in use, the Blender backend unless another one was set"""
+    
+    global _backend
+    
+    if _backend is None:
+        _backend = BlenderBackend()
+    
+    return _backend
+
+
+def set_backend(backend):
+    """Route all data access to backend, None goes back to the Blender backend"""
+    
+    global _backend
+    
+    _backend = backend
\ No newline at end of file
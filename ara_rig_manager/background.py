@@ -0,0 +1,145 @@
+"""Background preset file work for modal operators
+
+Serializing, compressing and parsing preset files runs on a worker thread.
+The operator stays modal, polls the worker from a window timer to update the
+progress indicator, and does its bpy reads before starting the worker and its
+bpy writes once the worker is done, both on the main thread. ESC cancels.
+"""
+
+# Import standard library
+import threading
+
+# Local imports
+from .preset_format import iter_preset, iter_write_preset
+
+#----------------------------------------------------------------#
+#--------------------------- JOBS -------------------------------#
+#----------------------------------------------------------------#
+
+class BackgroundJob:
+    """Function running on a worker thread, reporting progress and honouring cancellation"""
+    
+    def __init__(self, function):
+        self.function = function
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+    
+    def start(self):
+        self.thread.start()
+        
+        return self
+    
+    def run(self):
+        try:
+            self.result = self.function(self)
+        except Exception as error:
+            self.error = error
+    
+    @property
+    def done(self):
+        return not self.thread.is_alive()
+    
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+    
+    def cancel(self):
+        self.cancel_event.set()
+
+
+def write_preset_job(filepath, data, compress=True):
+    """Job writing a preset file chunk by chunk, the target is only replaced once complete"""
+    
+    def write(job):
+        writer = iter_write_preset(filepath, data, compress=compress)
+        try:
+            for fraction in writer:
+                if job.cancelled:
+                    return None
+                job.progress = fraction
+        finally:
+            writer.close()
+        
+        return filepath
+    
+    return write
+
+
+def read_preset_job(filepath):
+    """Job parsing a preset file group by group or set by set"""
+    
+    def read(job):
+        data = {}
+        for name, value, fraction in iter_preset(filepath):
+            if job.cancelled:
+                return None
+            data[name] = value
+            job.progress = fraction
+        
+        return data
+    
+    return read
+
+#----------------------------------------------------------------#
+#------------------------- OPERATORS ----------------------------#
+#----------------------------------------------------------------#
+
+class ARABackgroundOperator:
+    """Modal operator mixin running a job on a worker thread
+    
+    execute() gathers what it needs from bpy and returns run_in_background().
+    finish(context, result) is called on the main thread with the job's result.
+    """
+    
+    timer_interval = 0.1
+    
+    def run_in_background(self, context, function, status="Working"):
+        window_manager = context.window_manager
+        
+        self._job = BackgroundJob(function).start()
+        self._timer = window_manager.event_timer_add(self.timer_interval, window=context.window)
+        window_manager.progress_begin(0, 100)
+        window_manager.modal_handler_add(self)
+        context.workspace.status_text_set("%s... press Esc to cancel" % status)
+        
+        return {'RUNNING_MODAL'}
+    
+    def modal(self, context, event):
+        job = self._job
+        
+        if event.type == 'ESC':
+            job.cancel()
+            return {'RUNNING_MODAL'}
+        
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        
+        context.window_manager.progress_update(int(job.progress * 100))
+        if not job.done:
+            return {'PASS_THROUGH'}
+        
+        self.stop_background(context)
+        
+        if job.cancelled:
+            self.report({'WARNING'}, "%s cancelled" % self.bl_label)
+            return {'CANCELLED'}
+        
+        if job.error is not None:
+            self.report({'ERROR'}, "%s failed: %s" % (self.bl_label, job.error))
+            return {'CANCELLED'}
+        
+        return self.finish(context, job.result)
+    
+    def cancel(self, context):
+        self._job.cancel()
+        self.stop_background(context)
+    
+    def stop_background(self, context):
+        window_manager = context.window_manager
+        
+        window_manager.event_timer_remove(self._timer)
+        window_manager.progress_end()
+        context.workspace.status_text_set(None)
\ No newline at end of file
@@ -0,0 +1,264 @@
+"""Headless batch propagation of bone groups and selection sets
+
+Apply exported bone groups and/or selection sets to every armature of many
+.blend files, one background Blender per file, and save them:
+
+    blender -b --python ara_rig_manager/batch.py -- \
+        --bone-groups bone_groups.json --selection-sets selection_sets.json \
+        --jobs 4 --report report.json "shots/**/*.blend"
+
+The driver only needs the standard library, so it can also be started with a
+plain Python interpreter by passing --blender with the Blender executable.
+"""
+
+# Import standard library
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+#----------------------------------------------------------------#
+#------------------------- CONSTANTS ----------------------------#
+#----------------------------------------------------------------#
+
+RESULT_PREFIX = "ARA_BATCH_RESULT "
+# Same suffix as fingerprint.SIDECAR_SUFFIX, the driver must not import bpy
+SIDECAR_SUFFIX = ".ara.json"
+ADDON_PARENT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#----------------------------------------------------------------#
+#--------------------------- WORKER -----------------------------#
+#----------------------------------------------------------------#
+
+def hash_file(filepath):
+    """Hash a preset file's content, None without a file"""
+    
+    if not filepath:
+        return None
+    
+    with open(filepath, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def apply_preset_to_open_file(bone_groups_path, selection_sets_path):
+    """Apply the preset files to every matching rig of the open file and save it"""
+    
+    import addon_utils
+    import bpy
+    
+    if ADDON_PARENT_PATH not in sys.path:
+        sys.path.insert(0, ADDON_PARENT_PATH)
+    from ara_rig_manager.bone_groups.helpers import patch_bone_groups
+    from ara_rig_manager.fingerprint import find_matching_rigs, write_sidecar
+    from ara_rig_manager.preset_format import read_preset
+    from ara_rig_manager.selection_sets.helpers import patch_selection_sets
+    
+    result = {'RIGS': 0, 'BONE_GROUPS': None, 'SELECTION_SETS': None}
+    bone_groups = {}
+    selection_sets = {}
+    
+    if bone_groups_path:
+        bone_groups = read_preset(bone_groups_path)
+    if selection_sets_path:
+        selection_sets = read_preset(selection_sets_path)
+    
+    bone_names = {bone for bone_group in bone_groups.values() for bone in bone_group['BONES']}
+    bone_names.update(bone for bones in selection_sets.values() for bone in bones)
+    rigs = find_matching_rigs(bpy.data.objects, bone_names)
+    rig_objects = [bpy.data.objects[rig] for rig in rigs]
+    result['RIGS'] = len(rigs)
+    
+    if bone_groups_path:
+        result['BONE_GROUPS'] = patch_bone_groups(rigs, bone_groups)
+    
+    if selection_sets_path:
+        addon_utils.enable("bone_selection_sets", default_set=True)
+        result['SELECTION_SETS'] = patch_selection_sets(selection_sets, rigs)
+    
+    bpy.ops.wm.save_mainfile()
+    write_sidecar(bpy.data.filepath, rig_objects, get_preset_hashes(bone_groups_path, selection_sets_path))
+    
+    return result
+
+
+def get_preset_hashes(bone_groups_path, selection_sets_path):
+    """Hashes identifying the applied preset files"""
+    
+    return {'BONE_GROUPS': hash_file(bone_groups_path),
+            'SELECTION_SETS': hash_file(selection_sets_path)}
+
+
+def run_worker(args):
+    """Entry point of a worker Blender, prints its result as a JSON line"""
+    
+    start = time.perf_counter()
+    try:
+        result = apply_preset_to_open_file(args.bone_groups, args.selection_sets)
+        result['STATUS'] = 'OK'
+    except Exception as error:
+        result = {'STATUS': 'ERROR', 'ERROR': "%s: %s" % (type(error).__name__, error)}
+    result['APPLY_SECONDS'] = time.perf_counter() - start
+    
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+#----------------------------------------------------------------#
+#--------------------------- DRIVER -----------------------------#
+#----------------------------------------------------------------#
+
+def find_blender(blender):
+    """Return the Blender executable used to spawn workers"""
+    
+    if blender:
+        return blender
+    
+    try:
+        import bpy
+        return bpy.app.binary_path
+    except ImportError:
+        return "blender"
+
+
+def expand_files(patterns):
+    """Expand file paths and glob patterns into a sorted list of .blend files"""
+    
+    files = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        files.update(matches if matches else [pattern])
+    
+    return sorted(path for path in files if path.endswith(".blend"))
+
+
+def preset_already_applied(filepath, presets):
+    """Check the file's sidecar to see if it was saved right after applying presets"""
+    
+    try:
+        with open(filepath + SIDECAR_SUFFIX, 'r', encoding='utf-8') as file:
+            sidecar = json.load(file)
+        stat = os.stat(filepath)
+    except (OSError, ValueError):
+        return False
+    
+    return (sidecar.get('MTIME') == stat.st_mtime
+            and sidecar.get('SIZE') == stat.st_size
+            and sidecar.get('PRESETS') == presets)
+
+
+def process_file(blender, filepath, args):
+    """Run one worker Blender on filepath and collect its result"""
+    
+    command = [blender, "-b", "--factory-startup", filepath,
+               "--python", os.path.abspath(__file__), "--", "--worker"]
+    if args.bone_groups:
+        command += ["--bone-groups", os.path.abspath(args.bone_groups)]
+    if args.selection_sets:
+        command += ["--selection-sets", os.path.abspath(args.selection_sets)]
+    
+    start = time.perf_counter()
+    completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               universal_newlines=True, timeout=args.timeout)
+    
+    result = {'STATUS': 'ERROR', 'ERROR': "Worker exited with code %d" % completed.returncode}
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+    result['FILE'] = filepath
+    result['WALL_SECONDS'] = time.perf_counter() - start
+    
+    return result
+
+
+def write_report(filepath, results):
+    """Write per-file results as JSON, or CSV when filepath ends with .csv"""
+    
+    if filepath.endswith(".csv"):
+        fields = ['FILE', 'STATUS', 'RIGS', 'WALL_SECONDS', 'APPLY_SECONDS',
+                  'BONE_GROUPS', 'SELECTION_SETS', 'ERROR']
+        with open(filepath, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            for result in results:
+                writer.writerow({key: json.dumps(value) if isinstance(value, dict) else value
+                                 for key, value in result.items()})
+    else:
+        with open(filepath, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+def run_driver(args):
+    """Dispatch every file to a pool of worker Blenders and write the report"""
+    
+    if not args.bone_groups and not args.selection_sets:
+        raise SystemExit("Nothing to apply, pass --bone-groups and/or --selection-sets")
+    
+    blender = find_blender(args.blender)
+    files = expand_files(args.files)
+    
+    print("Applying preset to %d files with %d workers" % (len(files), args.jobs))
+    
+    presets = get_preset_hashes(args.bone_groups, args.selection_sets)
+    
+    def process(filepath):
+        if not args.force and preset_already_applied(filepath, presets):
+            result = {'FILE': filepath, 'STATUS': 'SKIPPED'}
+            print("%s: %s" % (filepath, result['STATUS']), flush=True)
+            return result
+        try:
+            result = process_file(blender, filepath, args)
+        except subprocess.TimeoutExpired:
+            result = {'FILE': filepath, 'STATUS': 'ERROR', 'ERROR': "Timed out"}
+        except (OSError, ValueError) as error:
+            # A worker that cannot start or prints a broken result fails its file, not the whole batch
+            result = {'FILE': filepath, 'STATUS': 'ERROR', 'ERROR': str(error)}
+        print("%s: %s" % (filepath, result['STATUS']), flush=True)
+        return result
+    
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        results = list(executor.map(process, files))
+    
+    if args.report:
+        write_report(args.report, results)
+    
+    failed = sum(1 for result in results if result['STATUS'] == 'ERROR')
+    skipped = sum(1 for result in results if result['STATUS'] == 'SKIPPED')
+    print("Done: %d succeeded, %d skipped, %d failed" % (len(results) - failed - skipped, skipped, failed))
+    
+    return 1 if failed else 0
+
+#----------------------------------------------------------------#
+#------------------------ COMMAND LINE --------------------------#
+#----------------------------------------------------------------#
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Apply ARA presets to many .blend files")
+    parser.add_argument("files", nargs='*', help=".blend files or glob patterns")
+    parser.add_argument("--bone-groups", help="Bone groups preset (.json or .arap) exported by the add-on")
+    parser.add_argument("--selection-sets", help="Selection sets preset (.json or .arap) exported by the add-on")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Number of Blender workers")
+    parser.add_argument("--report", help="Per-file report path (.json or .csv)")
+    parser.add_argument("--blender", help="Blender executable used for the workers")
+    parser.add_argument("--timeout", type=float, default=None, help="Per-file timeout in seconds")
+    parser.add_argument("--force", action='store_true', help="Apply even when the sidecar says it is up to date")
+    parser.add_argument("--worker", action='store_true', help=argparse.SUPPRESS)
+    
+    return parser.parse_args(argv)
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    args = parse_args(argv)
+    
+    if args.worker:
+        run_worker(args)
+    else:
+        sys.exit(run_driver(args))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,2 +1 @@
-from . import helpers
-from . import ui
\ No newline at end of file
+from . import helpers
\ No newline at end of file
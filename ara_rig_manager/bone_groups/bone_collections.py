@@ -0,0 +1,279 @@
+"""Bone groups on Blender 4.0+ bone collections
+
+Blender 4.0 replaced pose bone groups with armature bone collections, which
+have no colors. A preset's bone group becomes the bone collection of the same
+name, and its color set and colors go to the pose bone color of each member,
+the per object color Blender's own bone group conversion uses. Capturing takes
+a collection's colors from its first member, so an empty collection reads
+back with default colors. Bones are assigned and unassigned with the direct
+BoneCollection.assign and unassign calls, never with selection based operators.
+
+Collections also carry a rig's layers and visibility from 4.0, so only
+collections the add-on created, tagged with a custom property, are ever
+removed. Other collections are left alone unless a preset names them.
+"""
+
+# Local imports
+from ..backend import get_backend
+from ..fingerprint import BONE_GROUPS_HASH_KEY, get_bone_groups_hash, index_rig
+from ..instrumentation import count, phase
+from ..preset_format import COLOR_KEYS
+from ..remapping.helpers import get_preset_bone_names, remap_bone_groups
+
+#----------------------------------------------------------------#
+#------------------------- CONSTANTS ----------------------------#
+#----------------------------------------------------------------#
+
+DEFAULT_COLOR = (0.0, 0.0, 0.0)
+
+# Custom property tagging the bone collections created by the add-on
+ARA_COLLECTION_KEY = "ara_bone_group"
+
+#----------------------------------------------------------------#
+#----------------------- PROCESS RIG DATA -----------------------#
+#----------------------------------------------------------------#
+
+def get_bone_collections(armature):
+    """Every bone collection of an armature, nested ones included on Blender 4.1+"""
+    
+    collections_all = getattr(armature, "collections_all", None)
+    
+    return collections_all if collections_all is not None else armature.collections
+
+
+def is_ara_collection(bone_collection):
+    """Check whether the add-on created a bone collection"""
+    
+    return bool(bone_collection.get(ARA_COLLECTION_KEY, False))
+
+
+def get_bone_color_data(bone_color):
+    """Bone group data, without bones, of a bone color"""
+    
+    custom = bone_color.custom
+    
+    return {
+        'MODE': bone_color.palette,
+        'NORMAL': tuple(custom.normal.hsv),
+        'SELECT': tuple(custom.select.hsv),
+        'ACTIVE': tuple(custom.active.hsv)
+    }
+
+
+def get_bone_collections_data(rigs):
+    """Bone groups data of rigs' bone collections, each colored like its first member"""
+    
+    objects = get_backend().objects
+    bone_groups_dict = {}
+    
+    for rig in rigs:
+        rig_object = objects[rig]
+        pose_bones = rig_object.pose.bones
+        bone_collections = get_bone_collections(rig_object.data)
+        for bone_collection in bone_collections:
+            bones = [bone.name for bone in bone_collection.bones]
+            if bones:
+                bone_group_data = get_bone_color_data(pose_bones[bones[0]].color)
+            else:
+                bone_group_data = {'MODE': 'DEFAULT', 'NORMAL': DEFAULT_COLOR,
+                                   'SELECT': DEFAULT_COLOR, 'ACTIVE': DEFAULT_COLOR}
+            bone_group_data['BONES'] = bones
+            bone_groups_dict[bone_collection.name] = bone_group_data
+        count(bones=len(pose_bones), groups=len(bone_collections))
+    
+    return bone_groups_dict
+
+
+def set_bone_color(bone_color, bone_group_data, tolerance=1e-4):
+    """Write a bone group's color set and colors onto a bone color, returning whether it differed"""
+    
+    custom = bone_color.custom
+    colors = (custom.normal, custom.select, custom.active)
+    
+    if bone_color.palette == bone_group_data['MODE'] and all(
+            abs(current - stored) <= tolerance
+            for color, key in zip(colors, COLOR_KEYS)
+            for current, stored in zip(color.hsv, bone_group_data[key])):
+        return False
+    
+    bone_color.palette = bone_group_data['MODE']
+    for color, key in zip(colors, COLOR_KEYS):
+        color.hsv = bone_group_data[key]
+    
+    return True
+
+#----------------------------------------------------------------#
+#------------------------ APPLYING DATA -------------------------#
+#----------------------------------------------------------------#
+
+def write_bone_collections(rig_object, bone_groups, remove_others=True):
+    """Make a rig's bone collections, their bones and the bones' colors match bone groups data
+    
+    Only collections the add-on created are removed, and new collections are
+    tagged as created by it. Bones taken out of every collection get the
+    default color back, like bones leaving their bone group. Returns the names
+    of the added, changed and removed collections.
+    """
+    
+    armature = rig_object.data
+    collections = armature.collections
+    pose_bones = {pose_bone.name: pose_bone for pose_bone in rig_object.pose.bones}
+    
+    removed = set()
+    unassigned_bones = set()
+    if remove_others:
+        for bone_collection in list(get_bone_collections(armature)):
+            if bone_collection.name not in bone_groups and is_ara_collection(bone_collection):
+                removed.add(bone_collection.name)
+                unassigned_bones.update(bone.name for bone in bone_collection.bones)
+                collections.remove(bone_collection)
+    
+    added = set()
+    changed = set()
+    wanted_bones = set()
+    reassigned = 0
+    
+    for bone_group, bone_group_data in bone_groups.items():
+        bone_collection = get_bone_collections(armature).get(bone_group)
+        if bone_collection is None:
+            bone_collection = collections.new(bone_group)
+            bone_collection[ARA_COLLECTION_KEY] = True
+            added.add(bone_group)
+        
+        bones = [bone for bone in bone_group_data['BONES'] if bone in pose_bones]
+        wanted = set(bones)
+        current = {bone.name for bone in bone_collection.bones}
+        for bone in current - wanted:
+            bone_collection.unassign(pose_bones[bone])
+        for bone in bones:
+            if bone not in current:
+                bone_collection.assign(pose_bones[bone])
+        if wanted != current:
+            changed.add(bone_group)
+            reassigned += len(wanted ^ current)
+        
+        for bone in wanted:
+            if set_bone_color(pose_bones[bone].color, bone_group_data):
+                changed.add(bone_group)
+        
+        wanted_bones |= wanted
+        unassigned_bones |= current - wanted
+    
+    for bone in unassigned_bones - wanted_bones:
+        pose_bones[bone].color.palette = 'DEFAULT'
+    
+    count(bones=reassigned)
+    
+    return added, changed, removed
+
+
+def remove_existing_bone_collections(rigs):
+    """Remove every bone collection the add-on created on the rigs"""
+    
+    objects = get_backend().objects
+    
+    for rig in rigs:
+        armature = objects[rig].data
+        bone_collections = [bone_collection for bone_collection in get_bone_collections(armature)
+                            if is_ara_collection(bone_collection)]
+        for bone_collection in bone_collections:
+            armature.collections.remove(bone_collection)
+        count(groups=len(bone_collections))
+
+
+def create_bone_collections(rigs, bone_groups):
+    """Create bone collections for rigs with presented bone groups data"""
+    
+    objects = get_backend().objects
+    
+    for rig in rigs:
+        write_bone_collections(objects[rig], bone_groups, remove_others=False)
+        count(groups=len(bone_groups))
+
+
+def patch_bone_collections(rigs, bone_groups, remap=None):
+    """Update rigs' bone collections to match presented data, touching only what differs
+    
+    Same skipping, remapping and report as patch_bone_groups. Collections
+    neither in the data nor created by the add-on do not count as differences.
+    """
+    
+    report = {'ADDED': 0, 'CHANGED': 0, 'REMOVED': 0, 'SKIPPED': 0}
+    stored_bone_groups = bone_groups
+    preset_bone_names = get_preset_bone_names(bone_groups) if remap is not None else None
+    objects = get_backend().objects
+    
+    for rig in rigs:
+        rig_object = objects[rig]
+        with phase("Comparing rig and data hashes"):
+            fingerprint, bone_names = index_rig(rig_object)
+            if remap is not None:
+                table = remap.get_table(fingerprint, bone_names, preset_bone_names)
+                bone_groups = remap_bone_groups(stored_bone_groups, table)
+            bone_groups_hash = get_bone_groups_hash(bone_groups, bone_names)
+            managed = {bone_collection.name for bone_collection in get_bone_collections(rig_object.data)
+                       if is_ara_collection(bone_collection)}
+            current = {name: data for name, data in get_bone_collections_data([rig]).items()
+                       if name in bone_groups or name in managed}
+            current_hash = get_bone_groups_hash(current, bone_names)
+        if current_hash == bone_groups_hash:
+            rig_object[BONE_GROUPS_HASH_KEY] = bone_groups_hash
+            report['SKIPPED'] += 1
+            continue
+        
+        added, changed, removed = write_bone_collections(rig_object, bone_groups)
+        
+        report['ADDED'] += len(added)
+        report['CHANGED'] += len(changed - added)
+        report['REMOVED'] += len(removed)
+        rig_object[BONE_GROUPS_HASH_KEY] = bone_groups_hash
+        count(groups=len(added | changed | removed))
+    
+    return report
+
+
+def apply_bone_collections_theme(rigs, theme):
+    """Give the bones of every bone collection the same color set, returning the number of collections changed"""
+    
+    objects = get_backend().objects
+    changed = 0
+    
+    for rig in rigs:
+        rig_object = objects[rig]
+        pose_bones = rig_object.pose.bones
+        for bone_collection in get_bone_collections(rig_object.data):
+            bone_colors = [pose_bones[bone.name].color for bone in bone_collection.bones]
+            bone_colors = [bone_color for bone_color in bone_colors if bone_color.palette != theme]
+            for bone_color in bone_colors:
+                bone_color.palette = theme
+            changed += bool(bone_colors)
+    
+    count(groups=changed)
+    
+    return changed
+
+
+def recolor_bone_collections(rigs, palettes):
+    """Recolor the bones of rigs' bone collections, rig n taking palettes[n % len(palettes)]"""
+    
+    if not palettes:
+        return 0
+    
+    objects = get_backend().objects
+    changed = 0
+    
+    for rig_index, rig in enumerate(rigs):
+        palette = palettes[rig_index % len(palettes)]
+        rig_object = objects[rig]
+        pose_bones = rig_object.pose.bones
+        for bone_collection in get_bone_collections(rig_object.data):
+            bone_group_data = palette.get(bone_collection.name)
+            if bone_group_data is None:
+                continue
+            written = [set_bone_color(pose_bones[bone.name].color, bone_group_data)
+                       for bone in bone_collection.bones]
+            changed += any(written)
+    
+    count(groups=changed)
+    
+    return changed
\ No newline at end of file
@@ -1,173 +1,587 @@
 """Bone Groups helper functions"""
 
-# Import Blender Python API
-import bpy
-
 # Import standard library
-import json
+import os
+from array import array
+
+# Local imports
+from ..backend import get_backend
+from ..fingerprint import BONE_GROUPS_HASH_KEY, find_matching_rigs, get_bone_groups_hash, index_rig
+from ..instrumentation import count, phase, timed_phase
+from ..preset_format import (COLOR_KEYS, KIND_BONE_GROUPS, iter_preset, read_preset, read_preset_bone_names,
+                             write_preset)
+from ..preset_library import get_preset_library
+from ..presets import LibraryPresetStore
+from ..remapping.helpers import get_mirror_table, get_preset_bone_names, remap_bone_groups, symmetrize_bone_groups
+from ..rig_registry import get_registered_rigs
+from .bone_collections import (apply_bone_collections_theme, create_bone_collections, get_bone_collections_data,
+                               patch_bone_collections, recolor_bone_collections, remove_existing_bone_collections)
 
 #----------------------------------------------------------------#
 #------------------------- CONSTANTS ----------------------------#
 #----------------------------------------------------------------#
 
-BL_ADDONS_PATH = bpy.utils.user_resource("SCRIPTS") + "\\addons"
-ADDON_DATA_PATH = BL_ADDONS_PATH + "\\ara_rig_manager\\data"
-STD_BG_JSON = ADDON_DATA_PATH + "\\bone_groups.json"
+ADDON_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+STD_BG_JSON = os.path.join(ADDON_DATA_PATH, "bone_groups.json")
+
+# NORMAL, SELECT and ACTIVE HSV colors of one bone group in a packed color array
+COLOR_STRIDE = 9
 
 #----------------------------------------------------------------#
 #----------------------- PROCESS RIG DATA -----------------------#
 #----------------------------------------------------------------#
 
-def get_rigs():
-    """Get all rigs present in the scene"""
+@timed_phase("Finding rigs")
+def get_rigs(scene=None, collection=None):
+    """Get the rigs of the file, or of a scene or collection, from the rig registry"""
     
-    print("Finding rigs")
-    
-    armatures = bpy.data.armatures.keys()
+    return get_registered_rigs(scene, collection)
+
 
-    rigs = [armature for armature in armatures if "meta" not in armature]
+def get_target_rigs(bone_groups, remap=None):
+    """Get rigs whose bone names overlap with the bone groups data"""
     
-    return rigs
+    bone_names = {bone for bone_group in bone_groups.values() for bone in bone_group['BONES']}
+    
+    objects = get_backend().objects
+    rig_objects = [objects[rig] for rig in get_registered_rigs(metarigs=True)]
+    
+    return find_matching_rigs(rig_objects, bone_names, remap=remap)
 
 
 
+@timed_phase("Gathering bone groups data")
 def get_bone_groups_data(rigs):
     """Get bone groups data from all the rigs present in the scene"""
     
-    print("Gathering bone groups data")
+    if not get_backend().has_bone_groups:
+        return get_bone_collections_data(rigs)
     
     bone_groups_dict = {}
 
     for rig in rigs:
-        bone_groups = bpy.data.objects[rig].pose.bone_groups
-        for bone_group in bone_groups:
-            bone_group_object = bpy.data.objects[rig].pose.bone_groups[bone_group.name]
-            save_color_mode_and_colors(bone_groups_dict, bone_group.name, bone_group_object)
-            get_bone_names(bone_groups_dict, bone_groups, bone_group)
+        pose = get_backend().objects[rig].pose
+        modes, colors = get_packed_colors(pose.bone_groups)
+        for index, bone_group in enumerate(pose.bone_groups.keys()):
+            bone_groups_dict[bone_group] = unpack_colors(modes, colors, index)
+        get_bone_names(bone_groups_dict, pose.bone_groups, pose.bones)
+        count(bones=len(pose.bones), groups=len(pose.bone_groups))
     
     return bone_groups_dict
 
 
-def save_color_mode_and_colors(bone_groups_dict, bone_group, bone_group_object):
-    """Save bone groups color modes and colors"""
+def get_bone_names(bone_groups_dict, bone_groups, pose_bones):
+    """Get bone names of assigned bones of each bone group in one pass over the pose bones"""
     
-    bg_color_normal = bone_group_object.colors.normal.hsv
-    bg_color_select = bone_group_object.colors.select.hsv
-    bg_color_active = bone_group_object.colors.active.hsv
-    bg_color_mode = bone_group_object.color_set
-    bone_groups_dict[bone_group] = {}
-    bone_groups_dict[bone_group]['MODE'] = bg_color_mode
-    bone_groups_dict[bone_group]['NORMAL'] = bg_color_normal
-    bone_groups_dict[bone_group]['SELECT'] = bg_color_select
-    bone_groups_dict[bone_group]['ACTIVE'] = bg_color_active
-
-
-def get_bone_names(bone_groups_dict, bone_groups, bone_group):
-    """Get bone names of assigned bones of each bone group"""
+    assigned_bones = {bone_group.name: [] for bone_group in bone_groups}
     
-    bone_groups.active = bone_group
-    bpy.ops.pose.group_select()
-            
-    selected_bones = bpy.context.selected_pose_bones
-    bone_groups_dict[bone_group.name]['BONES'] = []
-    for selected_bone in selected_bones:
-        bone_groups_dict[bone_group.name]['BONES'].append(selected_bone.name)
-            
-    bpy.ops.pose.group_deselect()
+    for pose_bone in pose_bones:
+        bone_group = pose_bone.bone_group
+        if bone_group is not None:
+            assigned_bones[bone_group.name].append(pose_bone.name)
+    
+    for bone_group, bones in assigned_bones.items():
+        bone_groups_dict[bone_group]['BONES'] = bones
 
 
 
+@timed_phase("Removing existing bone groups")
 def remove_existing_bone_groups(rigs):
     """Remove existing bone groups"""
     
-    print("Removing existing bone groups")
+    if not get_backend().has_bone_groups:
+        return remove_existing_bone_collections(rigs)
     
     for rig in rigs:
-        bone_groups = bpy.data.objects[rig].pose.bone_groups.values()
+        rig_bone_groups = get_backend().objects[rig].pose.bone_groups
+        bone_groups = rig_bone_groups.values()
         for bone_group in bone_groups:
-            bpy.data.objects[rig].pose.bone_groups.remove(bone_group)
+            rig_bone_groups.remove(bone_group)
+        count(groups=len(bone_groups))
 
 
 
+@timed_phase("Creating new bone groups with imported data")
 def create_bone_groups(rigs, bone_groups):
     """Create bone groups for rigs with presented bone groups data"""    
     
-    print("Creating new bone groups with imported data")
+    if not get_backend().has_bone_groups:
+        return create_bone_collections(rigs, bone_groups)
     
     for rig in rigs:
-        for index, bone_group in enumerate(bone_groups):
-            index += 1
-            assign_colors_to_bone_groups(bone_groups, rig, bone_group)
-            assign_bones_to_bone_groups(bone_groups, rig, index, bone_group)
-            bpy.ops.pose.group_deselect()
+        pose = get_backend().objects[rig].pose
+        pose_bones = {pose_bone.name: pose_bone for pose_bone in pose.bones}
+        for bone_group in bone_groups:
+            bone_group_object = assign_colors_to_bone_groups(bone_groups, pose, bone_group)
+            assign_bones_to_bone_groups(bone_groups, pose_bones, bone_group, bone_group_object)
+        count(groups=len(bone_groups))
 
 
-def assign_colors_to_bone_groups(bone_groups, rig, bone_group):
+def assign_colors_to_bone_groups(bone_groups, pose, bone_group):
     """Assign colors and color modes to respective bone groups"""
     
-    bpy.data.objects[rig].pose.bone_groups.new(name=bone_group)
-    bone_group_object = bpy.data.objects[rig].pose.bone_groups[bone_group]
-    bone_group_object.color_set = bone_groups[bone_group]['MODE']
-    bone_group_object.colors.normal.hsv = bone_groups[bone_group]['NORMAL']
-    bone_group_object.colors.select.hsv = bone_groups[bone_group]['SELECT']
-    bone_group_object.colors.active.hsv = bone_groups[bone_group]['ACTIVE']        
+    bone_group_object = pose.bone_groups.new(name=bone_group)
+    set_color_mode_and_colors(bone_groups[bone_group], bone_group_object)
+    
+    return bone_group_object
 
 
-def assign_bones_to_bone_groups(bone_groups, rig, index, bone_group):
-    """Assign bones to respective bone groups"""
+def set_color_mode_and_colors(bone_group_data, bone_group_object):
+    """Write stored color mode and colors onto a bone group"""
     
-    curr_bones = bpy.data.objects[rig].pose.bones.keys()
+    colors = bone_group_object.colors
+    bone_group_object.color_set = bone_group_data['MODE']
+    colors.normal.hsv = bone_group_data['NORMAL']
+    colors.select.hsv = bone_group_data['SELECT']
+    colors.active.hsv = bone_group_data['ACTIVE']
+
 
+def assign_bones_to_bone_groups(bone_groups, pose_bones, bone_group, bone_group_object):
+    """Assign bones to respective bone groups without touching the selection"""
+    
+    assigned = 0
     for bone in bone_groups[bone_group]['BONES']:
-        if bone in curr_bones:
-            selected_bone = bpy.data.objects[bpy.context.object.name].pose.bones[bone].bone
-            bpy.context.object.data.bones.active = selected_bone
-            selected_bone.select = True
+        pose_bone = pose_bones.get(bone)
+        if pose_bone is not None:
+            pose_bone.bone_group = bone_group_object
+            assigned += 1
+    
+    count(bones=assigned)
+
+
+
+@timed_phase("Patching bone groups with stored data")
+def patch_bone_groups(rigs, bone_groups, remap=None):
+    """Update rigs' bone groups to match presented data, touching only what differs
+    
+    Rigs whose bone groups already hash the same as the data are skipped. With
+    a remap, the data's bone names are translated to each rig's bone names.
+    Returns a dictionary with the number of added, changed and removed bone
+    groups and of skipped rigs.
+    """
+    
+    if not get_backend().has_bone_groups:
+        return patch_bone_collections(rigs, bone_groups, remap)
+    
+    report = {'ADDED': 0, 'CHANGED': 0, 'REMOVED': 0, 'SKIPPED': 0}
+    stored_bone_groups = bone_groups
+    preset_bone_names = get_preset_bone_names(bone_groups) if remap is not None else None
+    
+    for rig in rigs:
+        rig_object = get_backend().objects[rig]
+        with phase("Comparing rig and data hashes"):
+            fingerprint, bone_names = index_rig(rig_object)
+            if remap is not None:
+                table = remap.get_table(fingerprint, bone_names, preset_bone_names)
+                bone_groups = remap_bone_groups(stored_bone_groups, table)
+            bone_groups_hash = get_bone_groups_hash(bone_groups, bone_names)
+            current_hash = get_bone_groups_hash(get_bone_groups_data([rig]), bone_names)
+        if current_hash == bone_groups_hash:
+            rig_object[BONE_GROUPS_HASH_KEY] = bone_groups_hash
+            report['SKIPPED'] += 1
+            continue
+        
+        pose = rig_object.pose
+        rig_bone_groups = pose.bone_groups
+        
+        removed = 0
+        for bone_group_object in rig_bone_groups.values():
+            if bone_group_object.name not in bone_groups:
+                rig_bone_groups.remove(bone_group_object)
+                removed += 1
+        
+        added = set()
+        for bone_group in bone_groups:
+            if rig_bone_groups.get(bone_group) is None:
+                assign_colors_to_bone_groups(bone_groups, pose, bone_group)
+                added.add(bone_group)
+        
+        names = rig_bone_groups.keys()
+        modes, colors = pack_colors([bone_groups[name] for name in names])
+        changed = {names[index] for index in set_packed_colors(rig_bone_groups, modes, colors)}
+        
+        changed.update(patch_bone_groups_membership(bone_groups, pose))
+        
+        report['ADDED'] += len(added)
+        report['CHANGED'] += len(changed - added)
+        report['REMOVED'] += removed
+        rig_object[BONE_GROUPS_HASH_KEY] = bone_groups_hash
+        count(groups=len(added | changed) + removed)
+    
+    return report
+
+
+def color_mode_and_colors_match(bone_group_data, bone_group_object, tolerance=1e-4):
+    """Check whether a bone group already has the stored color mode and colors"""
     
-    bpy_bone_groups = bpy.data.objects[rig].pose.bone_groups
-    bpy_bone_groups.active = bpy_bone_groups[bone_group]
-    bpy.ops.pose.group_select()
-    bpy.ops.pose.group_assign(type=index)
+    if bone_group_object.color_set != bone_group_data['MODE']:
+        return False
+    
+    colors = bone_group_object.colors
+    for stored, current in ((bone_group_data['NORMAL'], colors.normal.hsv),
+                            (bone_group_data['SELECT'], colors.select.hsv),
+                            (bone_group_data['ACTIVE'], colors.active.hsv)):
+        for stored_value, current_value in zip(stored, current):
+            if abs(stored_value - current_value) > tolerance:
+                return False
+    
+    return True
+
+
+def patch_bone_groups_membership(bone_groups, pose):
+    """Reassign only the bones whose bone group differs from the stored data
+    
+    Returns the names of the bone groups whose membership changed.
+    """
+    
+    wanted_groups = {}
+    for bone_group in bone_groups:
+        for bone in bone_groups[bone_group]['BONES']:
+            wanted_groups[bone] = bone_group
+    
+    rig_bone_groups = dict(pose.bone_groups.items())
+    changed = set()
+    reassigned = 0
+    
+    for pose_bone in pose.bones:
+        current_group = pose_bone.bone_group
+        current_name = current_group.name if current_group is not None else None
+        wanted_name = wanted_groups.get(pose_bone.name)
+        if current_name != wanted_name:
+            pose_bone.bone_group = rig_bone_groups.get(wanted_name)
+            changed.update(name for name in (current_name, wanted_name) if name is not None)
+            reassigned += 1
+    
+    count(bones=reassigned)
+    
+    return changed
 
 #----------------------------------------------------------------#
-#----------------------- FILE HANDLING --------------------------#
+#----------------------- PACKED COLORS --------------------------#
 #----------------------------------------------------------------#
 
-def import_bone_groups(filepath, rigs):
-    """Import bone groups from .JSON file"""
+def pack_colors(bone_groups_data):
+    """Color modes and one flat HSV array, NORMAL/SELECT/ACTIVE per group, of a list of bone groups data"""
     
-    print("Importing bone groups data from external file")
+    modes = [data['MODE'] for data in bone_groups_data]
+    colors = array('d', [value for data in bone_groups_data for key in COLOR_KEYS for value in data[key]])
     
-    remove_existing_bone_groups(rigs)
+    return modes, colors
+
+
+def unpack_colors(modes, colors, index):
+    """Bone group data, without bones, of one group of packed colors"""
     
-    file = open(filepath, 'r', encoding='utf-8')
-    imported_bone_groups = json.load(file)
-    file.close()
+    offset = index * COLOR_STRIDE
     
-    create_bone_groups(rigs, imported_bone_groups)
+    return {
+        'MODE': modes[index],
+        'NORMAL': tuple(colors[offset:offset + 3]),
+        'SELECT': tuple(colors[offset + 3:offset + 6]),
+        'ACTIVE': tuple(colors[offset + 6:offset + 9])
+    }
+
+
+def get_packed_colors(bone_group_objects):
+    """Color modes and packed HSV colors of bone groups, resolving each group's color set once"""
     
-    return {'FINISHED'}
+    modes = []
+    colors = array('d')
+    
+    for bone_group_object in bone_group_objects:
+        color_set = bone_group_object.colors
+        modes.append(bone_group_object.color_set)
+        colors.extend(color_set.normal.hsv)
+        colors.extend(color_set.select.hsv)
+        colors.extend(color_set.active.hsv)
+    
+    return modes, colors
 
 
+def set_packed_colors(bone_group_objects, modes, colors, tolerance=1e-4):
+    """Write packed color modes and colors onto bone groups in order, skipping groups that already match
+    
+    Returns the indices of the groups that were written.
+    """
+    
+    current_modes, current_colors = get_packed_colors(bone_group_objects)
+    written = []
+    
+    for index, bone_group_object in enumerate(bone_group_objects):
+        offset = index * COLOR_STRIDE
+        if current_modes[index] == modes[index] and all(
+                abs(current - stored) <= tolerance
+                for current, stored in zip(current_colors[offset:offset + COLOR_STRIDE],
+                                           colors[offset:offset + COLOR_STRIDE])):
+            continue
+        
+        color_set = bone_group_object.colors
+        bone_group_object.color_set = modes[index]
+        color_set.normal.hsv = colors[offset:offset + 3]
+        color_set.select.hsv = colors[offset + 3:offset + 6]
+        color_set.active.hsv = colors[offset + 6:offset + 9]
+        written.append(index)
+    
+    return written
+
 
-def export_bone_groups(filepath, bone_groups):  
-    """Export bone groups to .JSON file"""
+@timed_phase("Applying theme to bone groups")
+def apply_bone_groups_theme(rigs, theme):
+    """Give every bone group of every rig the same color set, returning the number of groups changed"""
+    
+    if not get_backend().has_bone_groups:
+        return apply_bone_collections_theme(rigs, theme)
     
-    print("Exporting bone groups data")
+    changed = 0
     
-    file = open(filepath, 'w', encoding='utf-8')
-    json.dump(bone_groups, file)
-    file.close()
+    for rig in rigs:
+        for bone_group_object in get_backend().objects[rig].pose.bone_groups:
+            if bone_group_object.color_set != theme:
+                bone_group_object.color_set = theme
+                changed += 1
+    
+    count(groups=changed)
+    
+    return changed
+
+
+@timed_phase("Recoloring rigs by palette")
+def recolor_bone_groups(rigs, palettes):
+    """Recolor a population of rigs, such as crowd variants, rig n taking palettes[n % len(palettes)]
+    
+    A palette is bone groups data whose colors go to the groups of the same
+    name, bones are ignored. Every palette is packed once for all rigs.
+    Returns the number of groups changed, nothing changes without palettes.
+    Meant for scripts, such as crowd setup scripts, no operator calls it.
+    """
+    
+    if not palettes:
+        return 0
+    
+    if not get_backend().has_bone_groups:
+        return recolor_bone_collections(rigs, palettes)
+    
+    packed_palettes = []
+    for palette in palettes:
+        modes, colors = pack_colors(list(palette.values()))
+        packed_palettes.append(({name: index for index, name in enumerate(palette)}, modes, colors))
+    
+    objects = get_backend().objects
+    changed = 0
+    
+    for rig_index, rig in enumerate(rigs):
+        indices, modes, colors = packed_palettes[rig_index % len(packed_palettes)]
+        rig_bone_groups = [bone_group_object for bone_group_object in objects[rig].pose.bone_groups
+                           if bone_group_object.name in indices]
+        
+        rig_modes = []
+        rig_colors = array('d')
+        for bone_group_object in rig_bone_groups:
+            index = indices[bone_group_object.name]
+            rig_modes.append(modes[index])
+            rig_colors.extend(colors[index * COLOR_STRIDE:(index + 1) * COLOR_STRIDE])
+        
+        changed += len(set_packed_colors(rig_bone_groups, rig_modes, rig_colors))
+    
+    count(groups=changed)
+    
+    return changed
+
+
+@timed_phase("Symmetrizing rigs' bone groups")
+def symmetrize_rigs_bone_groups(rigs):
+    """Give every rig's grouped bones their opposite side bone in the mirrored group, returning the patch report"""
+    
+    report = {'ADDED': 0, 'CHANGED': 0, 'REMOVED': 0, 'SKIPPED': 0}
+    
+    for rig in rigs:
+        mirror_table = get_mirror_table(*index_rig(get_backend().objects[rig]))
+        bone_groups = symmetrize_bone_groups(get_bone_groups_data([rig]), mirror_table)
+        for key, value in patch_bone_groups([rig], bone_groups).items():
+            report[key] += value
+    
+    return report
+
+#----------------------------------------------------------------#
+#----------------------- FILE HANDLING --------------------------#
+#----------------------------------------------------------------#
+
+@timed_phase("Importing bone groups data from external file")
+def import_bone_groups(filepath, rigs=None, remap=None):
+    """Import bone groups from a JSON or binary preset file and return the patch report
+    
+    Without rigs, the bone groups are applied to every rig matching their bone names.
+    """
+    
+    with phase("Reading preset file"):
+        imported_bone_groups = read_preset(filepath)
+    
+    if rigs is None:
+        rigs = get_target_rigs(imported_bone_groups, remap)
+    
+    return patch_bone_groups(rigs, imported_bone_groups, remap)
+
+
+
+@timed_phase("Planning streamed bone groups import")
+def plan_bone_groups_streaming(filepath, rigs=None, remap=None, progress=None):
+    """Rigs a streamed import patches, with the bone groups hash each of them ends up with
+    
+    One streaming pass collects the preset's bone names, to match rigs against
+    them like get_target_rigs when rigs is None, and each candidate rig's share
+    of the data, so no more than what lands on the rigs is held in memory. With
+    a remap, the bone names are read in a pass of their own first, to build
+    the remap tables over. Rigs already carrying their share get their hash
+    stored and are left out. Returns the {rig: (hash, remap table)} targets and
+    the number of skipped rigs.
+    """
+    
+    objects = get_backend().objects
+    preset_bone_names = set()
+    passes = 1
+    if remap is not None:
+        passes = 2
+        preset_bone_names = read_preset_bone_names(
+            filepath, (lambda fraction: progress(fraction / passes)) if progress is not None else None)
+    
+    candidates = []
+    for rig in (rigs if rigs is not None else get_registered_rigs(metarigs=True)):
+        fingerprint, bone_names = index_rig(objects[rig])
+        table = remap.get_table(fingerprint, bone_names, preset_bone_names) if remap is not None else None
+        candidates.append((rig, bone_names, table, {}))
+    
+    for bone_group, bone_group_data, fraction in iter_preset(filepath):
+        bones = bone_group_data['BONES']
+        if remap is None:
+            preset_bone_names.update(bones)
+        for rig, bone_names, table, rig_bone_groups in candidates:
+            mapped = bones if table is None else table.map_bones(bones)
+            rig_bone_groups[bone_group] = dict(bone_group_data, BONES=[bone for bone in mapped if bone in bone_names])
+        if progress is not None:
+            progress((passes - 1 + fraction) / passes)
+    
+    if rigs is None:
+        rigs = find_matching_rigs([objects[rig] for rig, *_ in candidates], preset_bone_names, remap=remap)
+    
+    targets = {}
+    skipped = 0
+    for rig, bone_names, table, rig_bone_groups in candidates:
+        if rig not in rigs:
+            continue
+        bone_groups_hash = get_bone_groups_hash(rig_bone_groups, bone_names)
+        if get_bone_groups_hash(get_bone_groups_data([rig]), bone_names) == bone_groups_hash:
+            objects[rig][BONE_GROUPS_HASH_KEY] = bone_groups_hash
+            skipped += 1
+        else:
+            targets[rig] = (bone_groups_hash, table)
+    
+    return targets, skipped
+
+
+@timed_phase("Streaming bone groups from external file")
+def import_bone_groups_streaming(filepath, rigs=None, progress=None, remap=None):
+    """Import bone groups one group at a time while the file is read
+    
+    Without rigs, the bone groups are applied to every rig matching their bone
+    names. A first pass over the file picks the rigs that differ, see
+    plan_bone_groups_streaming, and a second one applies the groups, holding
+    only the group being applied. progress is called with the fraction of both
+    passes done so far. Returns the patch report. Bone collections are patched
+    from the whole file at once.
+    """
+    
+    if not get_backend().has_bone_groups:
+        with phase("Reading preset file"):
+            imported_bone_groups = read_preset(filepath)
+        if progress is not None:
+            progress(1.0)
+        if rigs is None:
+            rigs = get_target_rigs(imported_bone_groups, remap)
+        
+        return patch_bone_collections(rigs, imported_bone_groups, remap)
+    
+    targets, skipped = plan_bone_groups_streaming(
+        filepath, rigs, remap, (lambda fraction: progress(fraction / 2)) if progress is not None else None)
+    report = {'ADDED': 0, 'CHANGED': 0, 'REMOVED': 0, 'SKIPPED': skipped}
+    
+    rig_targets = []
+    for rig, (bone_groups_hash, table) in targets.items():
+        rig_object = get_backend().objects[rig]
+        pose = rig_object.pose
+        pose_bones = {pose_bone.name: pose_bone for pose_bone in pose.bones}
+        rig_targets.append((pose, pose_bones, table, set(), set(), set()))
+    
+    imported_names = set()
+    if rig_targets:
+        for bone_group, bone_group_data, fraction in iter_preset(filepath):
+            imported_names.add(bone_group)
+            for pose, pose_bones, table, assigned_bones, added, changed in rig_targets:
+                bone_group_object = pose.bone_groups.get(bone_group)
+                if bone_group_object is None:
+                    bone_group_object = assign_colors_to_bone_groups({bone_group: bone_group_data}, pose, bone_group)
+                    added.add(bone_group)
+                elif not color_mode_and_colors_match(bone_group_data, bone_group_object):
+                    set_color_mode_and_colors(bone_group_data, bone_group_object)
+                    changed.add(bone_group)
+                
+                bones = bone_group_data['BONES'] if table is None else table.map_bones(bone_group_data['BONES'])
+                for bone in bones:
+                    pose_bone = pose_bones.get(bone)
+                    if pose_bone is None:
+                        continue
+                    assigned_bones.add(bone)
+                    if pose_bone.bone_group != bone_group_object:
+                        pose_bone.bone_group = bone_group_object
+                        changed.add(bone_group)
+                        count(bones=1)
+            if progress is not None:
+                progress(0.5 + fraction / 2)
+    elif progress is not None:
+        progress(1.0)
+    
+    for (pose, pose_bones, table, assigned_bones, added, changed), rig in zip(rig_targets, targets):
+        for bone_group_object in pose.bone_groups.values():
+            if bone_group_object.name not in imported_names:
+                pose.bone_groups.remove(bone_group_object)
+                report['REMOVED'] += 1
+        for bone, pose_bone in pose_bones.items():
+            if bone not in assigned_bones and pose_bone.bone_group is not None:
+                changed.add(pose_bone.bone_group.name)
+                pose_bone.bone_group = None
+        get_backend().objects[rig][BONE_GROUPS_HASH_KEY] = targets[rig][0]
+        report['ADDED'] += len(added)
+        report['CHANGED'] += len(changed - added)
+        count(groups=len(added | changed))
+    
+    return report
+
+
+
+@timed_phase("Exporting bone groups data")
+def export_bone_groups(filepath, bone_groups, compress=True):  
+    """Export bone groups to a JSON file, or a binary preset for .arap paths"""
+    
+    with phase("Writing preset file"):
+        write_preset(filepath, bone_groups, compress=compress)
     
     return {'FINISHED'}
 
 
 
 def read_std_bone_groups(filepath):
-    """Read standard bone groups JSON file and return a dictionary"""
+    """Read standard bone groups JSON or binary file and return a dictionary"""
+    
+    with phase("Reading standard bone groups"):
+        std_bone_groups = read_preset(filepath)
     
-    file = open(filepath, 'r', encoding='utf-8')
-    std_bone_groups = json.load(file)
-    file.close()
+    return std_bone_groups
+
+
+def save_bone_groups_preset(name, bone_groups):
+    """Save bone groups as a new version of a library preset, returning the version entry and whether it was added"""
     
-    return std_bone_groups
\ No newline at end of file
+    with phase("Saving bone groups preset"):
+        return get_preset_library().save(KIND_BONE_GROUPS, name, bone_groups)
+
+
+STD_BONE_GROUPS = LibraryPresetStore(get_preset_library, KIND_BONE_GROUPS, STD_BG_JSON, read_std_bone_groups)
\ No newline at end of file
@@ -2,13 +2,26 @@
 
 # Import Blender Python API
 import bpy
-from bpy.props import StringProperty
+from bpy.props import EnumProperty, StringProperty
 from bpy.types import Operator, Panel
 from bpy_extras.io_utils import ExportHelper, ImportHelper
 
+# Import standard library
+import os
+
 # Local imports
 from .helpers import *
-from ..ui import ARAPanel
+from ..background import ARABackgroundOperator, read_preset_job, write_preset_job
+from ..classification.helpers import classify_rigs_bone_groups, get_scene_classifier
+from ..instrumentation import instrument_operator, operator_run
+from ..live_sync import get_mirrored_bone_groups
+from ..preset_format import STREAMING_THRESHOLD
+from ..presets import BUNDLED_PRESET
+from ..remapping.helpers import get_scene_remap
+from ..rig_registry import get_armature_rigs
+from ..scene_presets.helpers import scene_preset_property
+from ..snapshot import get_local_rigs, run_transaction, take_bone_groups_snapshot
+from ..ui import ARAPanel, ARAPresetExport, get_scope_rigs, run_with_progress
 
 
 #----------------------------------------------------------------#
@@ -20,44 +33,82 @@ from ..ui import ARAPanel
 #------------------------- OPERATORS ----------------------------#
 #----------------------------------------------------------------#
 
+def report_bone_groups_patch(operator, report):
+    """Report added, changed and removed bone group counts"""
+    
+    operator.report({'INFO'}, "Bone groups: %d added, %d changed, %d removed, %d rigs up to date"
+                    % (report['ADDED'], report['CHANGED'], report['REMOVED'], report['SKIPPED']))
+
+
 class ARA_OT_SetBoneGroups(Operator):
     """Set and assign bone groups"""
     
     bl_idname = "ara.set_bone_groups"
     bl_label = "Set Bone Groups"
+    bl_options = {'REGISTER', 'UNDO'}
     
+    @instrument_operator
     def execute(self, context):
         scene = context.scene
+        remap = get_scene_remap(scene)
+        classifier = get_scene_classifier(scene)
         
         if scene.ara_source_rig != None:
-            remove_existing_bone_groups([scene.ara_source_rig.name])
-            create_bone_groups([scene.ara_source_rig.name], scene.ara_bone_groups)
-            
-            return {'FINISHED'}
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
+        elif classifier is not None:
+            rigs = get_scope_rigs(scene)
         else:
-            rigs = get_rigs()
-            remove_existing_bone_groups(rigs)
-            create_bone_groups(rigs, scene.ara_bone_groups)
-            
-            return {'FINISHED'}
+            rigs = get_target_rigs(scene.ara_bone_groups, remap)
+        
+        if classifier is not None:
+            return run_transaction(self, take_bone_groups_snapshot(rigs),
+                                   lambda: classify_rigs_bone_groups(rigs, scene.ara_bone_groups, classifier, remap),
+                                   report_bone_groups_patch)
+        
+        return run_transaction(self, take_bone_groups_snapshot(rigs),
+                               lambda: patch_bone_groups(rigs, scene.ara_bone_groups, remap),
+                               report_bone_groups_patch)
 
 
 class ARA_OT_SaveBoneGroups(Operator):
-    """Save current Bone Groups in scene properties"""
+    """Save current Bone Groups as a new version of a library preset"""
     
     bl_idname = "ara.save_bone_groups"
     bl_label = "Save Bone Groups"
     
+    preset_name: StringProperty(
+        name="Preset Name",
+        description="Library preset the bone groups are saved to",
+        default="Standard"
+    )
+    
+    def invoke(self, context, event):
+        preset = context.scene.ara_properties.bone_groups_preset
+        if preset != BUNDLED_PRESET:
+            self.preset_name = preset
+        
+        return context.window_manager.invoke_props_dialog(self)
+    
+    @instrument_operator
     def execute(self, context):
         scene = context.scene
         
+        if not self.preset_name.strip():
+            self.report({'ERROR'}, "Please name the preset!")
+            
+            return {'CANCELLED'}
+        
         if scene.ara_source_rig != None:
-            scene.ara_bone_groups.clear()
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
+            bone_groups = get_mirrored_bone_groups(rigs) or get_bone_groups_data(rigs)
             
-            bone_groups = get_bone_groups_data([scene.ara_source_rig.name])
-            scene.ara_bone_groups.update(bone_groups)
+            entry, added = save_bone_groups_preset(self.preset_name, bone_groups)
+            scene.ara_properties.bone_groups_preset = self.preset_name
             
-            export_bone_groups(STD_BG_JSON, bone_groups)
+            if added:
+                self.report({'INFO'}, "Saved %s version %d" % (self.preset_name, entry['VERSION']))
+            else:
+                self.report({'INFO'}, "%s version %d is already up to date" % (self.preset_name, entry['VERSION']))
             
             return {'FINISHED'}
         else:
@@ -66,31 +117,101 @@ class ARA_OT_SaveBoneGroups(Operator):
             return {'CANCELLED'}
 
 
+class ARA_OT_ApplyBoneGroupsTheme(Operator):
+    """Give every bone group of the target rigs the same theme color set"""
+    
+    bl_idname = "ara.apply_bone_groups_theme"
+    bl_label = "Apply Theme"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    theme: EnumProperty(
+        name="Theme",
+        description="Color set given to every bone group",
+        items=[('DEFAULT', "Default Colors", "")] + [
+            ('THEME%02d' % index, "Theme %d" % index, "") for index in range(1, 21)
+        ],
+        default='THEME01'
+    )
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+    
+    @instrument_operator
+    def execute(self, context):
+        scene = context.scene
+        
+        if scene.ara_source_rig != None:
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
+        else:
+            rigs = get_scope_rigs(scene)
+        
+        return run_transaction(self, take_bone_groups_snapshot(rigs),
+                               lambda: apply_bone_groups_theme(rigs, self.theme),
+                               lambda operator, changed: operator.report({'INFO'}, "%d bone groups recolored" % changed))
+
+
+class ARA_OT_SymmetrizeBoneGroups(Operator):
+    """Put the opposite side bone of every grouped bone in the mirrored bone group"""
+    
+    bl_idname = "ara.symmetrize_bone_groups"
+    bl_label = "Symmetrize Bone Groups"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    @instrument_operator
+    def execute(self, context):
+        scene = context.scene
+        
+        if scene.ara_source_rig != None:
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
+        else:
+            rigs = get_scope_rigs(scene)
+        
+        return run_transaction(self, take_bone_groups_snapshot(rigs),
+                               lambda: symmetrize_rigs_bone_groups(rigs),
+                               report_bone_groups_patch)
+
+
 class ARA_OT_ImportBoneGroups(Operator, ImportHelper):
-    """Import Bone Groups from a specified JSON file"""
+    """Import Bone Groups from a specified JSON or binary preset file"""
     
     bl_idname = "ara.import_bone_groups"
     bl_label = "Import Bone Groups"
+    bl_options = {'REGISTER', 'UNDO'}
     
     filename_ext = ".json"
     
-    filet_glob: StringProperty(
-        default="*.json",
+    filter_glob: StringProperty(
+        default="*.json;*.arap",
         options={'HIDDEN'},
         maxlen=255
     )
     
+    @instrument_operator
     def execute(self, context):
         scene = context.scene
+        remap = get_scene_remap(scene)
         
         if scene.ara_source_rig != None:
-            return import_bone_groups(self.filepath, [scene.ara_source_rig.name])
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
         else:
-            return import_bone_groups(self.filepath, get_rigs())
+            rigs = None
+        
+        # Target rigs depend on the file's bone names, so every local rig is captured
+        snapshot = take_bone_groups_snapshot(rigs if rigs is not None else get_local_rigs())
+        
+        if os.path.getsize(self.filepath) >= STREAMING_THRESHOLD:
+            return run_transaction(self, snapshot,
+                                   lambda: run_with_progress(context, lambda progress: import_bone_groups_streaming(
+                                       self.filepath, rigs, progress, remap)),
+                                   report_bone_groups_patch)
+        
+        return run_transaction(self, snapshot,
+                               lambda: import_bone_groups(self.filepath, rigs, remap),
+                               report_bone_groups_patch)
 
 
-class ARA_OT_ExportBoneGroups(Operator, ExportHelper):
-    """Export Bone Groups to a specified JSON file"""
+class ARA_OT_ExportBoneGroups(Operator, ARAPresetExport, ExportHelper):
+    """Export Bone Groups to a specified JSON or binary preset file"""
     
     bl_idname = "ara.export_bone_groups"
     bl_label = "Export Bone Groups"
@@ -98,23 +219,76 @@ class ARA_OT_ExportBoneGroups(Operator, ExportHelper):
     filename_ext = ".json"
     
     filter_glob: StringProperty(
-        default="*.json",
+        default="*.json;*.arap",
         options={'HIDDEN'},
         maxlen=255
     )
     
+    @instrument_operator
     def execute(self, context):
         scene = context.scene
         
         if scene.ara_source_rig != None:
-            bone_groups = get_bone_groups_data([scene.ara_source_rig.name])
-            
-            return export_bone_groups(self.filepath, bone_groups)
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
         else:
-            rigs = get_rigs()
-            bone_groups = get_bone_groups_data(rigs)
+            rigs = get_scope_rigs(scene)
+        
+        bone_groups = get_mirrored_bone_groups(rigs) or get_bone_groups_data(rigs)
+        
+        return export_bone_groups(self.filepath, bone_groups, self.compress)
+
+
+class ARA_OT_ImportBoneGroupsBackground(ARA_OT_ImportBoneGroups, ARABackgroundOperator):
+    """Import Bone Groups, parsing the file on a background thread unless it is streamed"""
+    
+    bl_idname = "ara.import_bone_groups_background"
+    
+    @instrument_operator
+    def execute(self, context):
+        # Parsing holds the whole file, large files are applied while they are read instead
+        if os.path.getsize(self.filepath) >= STREAMING_THRESHOLD:
+            return super().execute(context)
+        
+        return self.run_in_background(context, read_preset_job(self.filepath), "Reading bone groups")
+    
+    def finish(self, context, bone_groups):
+        scene = context.scene
+        remap = get_scene_remap(scene)
+        
+        with operator_run(self.bl_label):
+            if scene.ara_source_rig != None:
+                rigs = get_armature_rigs(scene.ara_source_rig.name)
+            else:
+                rigs = get_target_rigs(bone_groups, remap)
             
-            return export_bone_groups(self.filepath, bone_groups)
+            return run_transaction(self, take_bone_groups_snapshot(rigs),
+                                   lambda: patch_bone_groups(rigs, bone_groups, remap),
+                                   report_bone_groups_patch)
+
+
+class ARA_OT_ExportBoneGroupsBackground(ARA_OT_ExportBoneGroups, ARABackgroundOperator):
+    """Export Bone Groups, writing the file on a background thread"""
+    
+    bl_idname = "ara.export_bone_groups_background"
+    
+    @instrument_operator
+    def execute(self, context):
+        scene = context.scene
+        
+        if scene.ara_source_rig != None:
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
+        else:
+            rigs = get_scope_rigs(scene)
+        
+        bone_groups = get_mirrored_bone_groups(rigs) or get_bone_groups_data(rigs)
+        
+        return self.run_in_background(context, write_preset_job(self.filepath, bone_groups, self.compress),
+                                      "Exporting bone groups")
+    
+    def finish(self, context, filepath):
+        self.report({'INFO'}, "Exported bone groups to %s" % filepath)
+        
+        return {'FINISHED'}
 
 #----------------------------------------------------------------#
 #-------------------------- PANELS ------------------------------#
@@ -132,6 +306,7 @@ class ARA_PT_MenuBoneGroupsMain(Panel, ARAPanel):
         ara_properties = scene.ara_properties
         
         layout.prop(ara_properties, "external_bone_groups", text="External Bone Groups")
+        layout.prop(ara_properties, "bone_groups_preset", text="Preset")
         
         col = layout.column(align=True)
         col.scale_y = 1.5
@@ -146,6 +321,14 @@ class ARA_PT_MenuBoneGroupsMain(Panel, ARAPanel):
         col = layout.column(align=True)
         col.scale_y = 1.5
         col.operator(ARA_OT_SaveBoneGroups.bl_idname, text=ARA_OT_SaveBoneGroups.bl_label)
+        
+        col = layout.column(align=True)
+        col.scale_y = 1.5
+        col.operator(ARA_OT_SymmetrizeBoneGroups.bl_idname, text=ARA_OT_SymmetrizeBoneGroups.bl_label)
+        
+        col = layout.column(align=True)
+        col.scale_y = 1.5
+        col.operator(ARA_OT_ApplyBoneGroupsTheme.bl_idname, text=ARA_OT_ApplyBoneGroupsTheme.bl_label)
 
 
 class ARA_PT_TransferBoneGroups(Panel, ARAPanel):
@@ -164,13 +347,13 @@ class ARA_PT_TransferBoneGroups(Panel, ARAPanel):
         
         col = layout.column(align=True)
         col.scale_y = 1.5
-        col.operator(ARA_OT_ExportBoneGroups.bl_idname, ARA_OT_ExportBoneGroups.bl_label)
+        col.operator(ARA_OT_ExportBoneGroupsBackground.bl_idname, text=ARA_OT_ExportBoneGroupsBackground.bl_label)
         if ara_properties.external_bone_groups == False:
             col.enable = False
         
         col = layout.column(align=True)
         col.scale_y = 1.5
-        col.operator(ARA_OT_ImportBoneGroups.bl_idname, ARA_OT_ImportBoneGroups.bl_label)
+        col.operator(ARA_OT_ImportBoneGroupsBackground.bl_idname, text=ARA_OT_ImportBoneGroupsBackground.bl_label)
         if ara_properties.external_bone_groups == False:
             col.enabled = False
 
@@ -183,24 +366,29 @@ classes = [
     ARA_OT_ExportBoneGroups,
     ARA_OT_ImportBoneGroups,
     ARA_OT_SaveBoneGroups,
+    ARA_OT_ApplyBoneGroupsTheme,
+    ARA_OT_SymmetrizeBoneGroups,
+    ARA_OT_ExportBoneGroupsBackground,
+    ARA_OT_ImportBoneGroupsBackground,
     ARA_PT_MenuBoneGroupsMain,
     ARA_PT_TransferBoneGroups
 ]
 
 
 def menu_func_export(self, context):
-    self.layout.operator(ARA_OT_ExportBoneGroups.bl_idname, text="Export Bone Groups (.json)")
+    self.layout.operator(ARA_OT_ExportBoneGroupsBackground.bl_idname, text="Export Bone Groups (.json)")
 
 
 def menu_func_import(self, context):
-    self.layout.operator(ARA_OT_ImportBoneGroups.bl_idname, text="Import Bone Groups (.json)")
+    self.layout.operator(ARA_OT_ImportBoneGroupsBackground.bl_idname, text="Import Bone Groups (.json)")
 
 
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
     
-    bpy.types.Scene.ara_bone_groups = read_std_bone_groups(STD_BG_JSON)
+    bpy.types.Scene.ara_bone_groups = scene_preset_property(
+        STD_BONE_GROUPS, lambda scene: scene.ara_properties.bone_groups_preset)
     
     bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
     bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
@@ -0,0 +1,242 @@
+"""Bone group classification helper functions
+
+Classification rules put bones in bone groups from what the bones are, their
+name, parent chain, deform flag, bone layers or collections and custom
+shape, instead of from stored name lists, so one preset covers every variant
+of a rig. A rule set is compiled once and all its rules are evaluated in a
+single pass over a rig's pose bones, the first rule whose predicates all hold
+giving a bone its group. Parent chain matches are memoized per rig, so every
+bone's ancestors are walked at most once per pattern.
+"""
+
+# Import standard library
+import fnmatch
+import re
+
+# Local imports
+from ..backend import get_backend
+from ..bone_groups.bone_collections import DEFAULT_COLOR, get_bone_collections
+from ..bone_groups.helpers import patch_bone_groups
+from ..fingerprint import hash_data, index_rig
+from ..instrumentation import count, timed_phase
+from ..remapping.helpers import get_preset_bone_names, is_valid_pattern, remap_bone_groups
+
+#----------------------------------------------------------------#
+#------------------------- CONSTANTS ----------------------------#
+#----------------------------------------------------------------#
+
+MAX_CACHED_CLASSIFIERS = 16
+
+# rules hash -> BoneClassifier
+_classifiers = {}
+
+#----------------------------------------------------------------#
+#-------------------------- RULES -------------------------------#
+#----------------------------------------------------------------#
+
+def compile_pattern(pattern_type, pattern):
+    """Compile a glob or regex name pattern into a function telling whether a name matches"""
+    
+    if pattern_type == 'GLOB':
+        return re.compile(fnmatch.translate(pattern)).match
+    if pattern_type == 'REGEX':
+        return re.compile(pattern).search
+    
+    raise ValueError("Unknown name pattern type %r" % pattern_type)
+
+
+def compile_rule(name_type, name, parent, deform, collection, custom_shape):
+    """Compile one rule into the list of its predicates, each called with a pose bone and a RigIndex
+    
+    Empty patterns and 'ANY' flags match every bone, cheap checks come first.
+    """
+    
+    predicates = []
+    
+    if deform != 'ANY':
+        use_deform = deform == 'DEFORM'
+        predicates.append(lambda pose_bone, index: pose_bone.bone.use_deform == use_deform)
+    
+    if custom_shape != 'ANY':
+        has_custom_shape = custom_shape == 'WITH'
+        predicates.append(lambda pose_bone, index: (pose_bone.custom_shape is not None) == has_custom_shape)
+    
+    if name:
+        match_name = compile_pattern(name_type, name)
+        predicates.append(lambda pose_bone, index: match_name(pose_bone.name) is not None)
+    
+    if collection:
+        match_collection = compile_pattern('GLOB', collection)
+        predicates.append(lambda pose_bone, index: any(
+            match_collection(name) for name in index.get_collection_names(pose_bone)))
+    
+    if parent:
+        match_parent = compile_pattern('GLOB', parent)
+        predicates.append(lambda pose_bone, index: pose_bone.parent is not None and index.match_ancestors(
+            parent, match_parent, pose_bone.parent))
+    
+    return predicates
+
+
+class BoneClassifier:
+    """Compiled classification rules
+    
+    Rules are (bone group, name pattern type, name pattern, parent pattern,
+    deform, collection pattern, custom shape) tuples, tried in order.
+    """
+    
+    def __init__(self, rules):
+        self.rules = [tuple(rule) for rule in rules]
+        self.key = hash_data(self.rules)
+        self.compiled = [(rule[0], compile_rule(*rule[1:])) for rule in self.rules]
+    
+    @timed_phase("Classifying bones")
+    def classify(self, rig_object):
+        """Bone group -> bone names of one rig, every rule group listed even when it got no bones"""
+        
+        index = RigIndex(rig_object)
+        pose_bones = rig_object.pose.bones
+        assigned = {bone_group: [] for bone_group, predicates in self.compiled}
+        
+        for pose_bone in pose_bones:
+            for bone_group, predicates in self.compiled:
+                if all(predicate(pose_bone, index) for predicate in predicates):
+                    assigned[bone_group].append(pose_bone.name)
+                    break
+        
+        count(bones=len(pose_bones), groups=len(assigned))
+        
+        return assigned
+
+
+class RigIndex:
+    """Lookups of one rig shared by every rule during a classification pass"""
+    
+    def __init__(self, rig_object):
+        self.rig_object = rig_object
+        self.collection_names = None
+        # parent pattern -> {bone name: whether the bone or an ancestor matches}
+        self.ancestors = {}
+    
+    def get_collection_names(self, pose_bone):
+        """Names of the bone collections a bone is in, or the numbers of its bone layers before Blender 4.0"""
+        
+        if self.collection_names is None:
+            self.collection_names = {}
+            if not get_backend().has_bone_groups:
+                for bone_collection in get_bone_collections(self.rig_object.data):
+                    for bone in bone_collection.bones:
+                        self.collection_names.setdefault(bone.name, []).append(bone_collection.name)
+        
+        names = self.collection_names.get(pose_bone.name)
+        if names is None:
+            if get_backend().has_bone_groups:
+                names = [str(layer) for layer, visible in enumerate(pose_bone.bone.layers) if visible]
+            else:
+                names = []
+            self.collection_names[pose_bone.name] = names
+        
+        return names
+    
+    def match_ancestors(self, pattern, match, pose_bone):
+        """Whether a bone or one of its ancestors has a matching name, walking each chain once"""
+        
+        memo = self.ancestors.setdefault(pattern, {})
+        chain = []
+        matched = False
+        
+        while pose_bone is not None:
+            cached = memo.get(pose_bone.name)
+            if cached is not None:
+                matched = cached
+                break
+            if match(pose_bone.name) is not None:
+                matched = memo[pose_bone.name] = True
+                break
+            chain.append(pose_bone.name)
+            pose_bone = pose_bone.parent
+        
+        for name in chain:
+            memo[name] = matched
+        
+        return matched
+
+
+def get_classifier(rules):
+    """Cached compiled classifier of a rule set"""
+    
+    key = hash_data([tuple(rule) for rule in rules])
+    classifier = _classifiers.get(key)
+    if classifier is None:
+        if len(_classifiers) >= MAX_CACHED_CLASSIFIERS:
+            _classifiers.clear()
+        classifier = _classifiers[key] = BoneClassifier(rules)
+    
+    return classifier
+
+
+def get_scene_classifier(scene):
+    """Compile the scene's enabled classification rules, None when classification is off"""
+    
+    settings = scene.ara_classify
+    if not settings.enabled:
+        return None
+    
+    rules = [(rule.bone_group, rule.name_type, rule.name_pattern, rule.parent_pattern, rule.deform,
+              rule.collection_pattern, rule.custom_shape)
+             for rule in settings.rules
+             if rule.enabled and rule.bone_group and (rule.name_type != 'REGEX' or is_valid_pattern(rule.name_pattern))]
+    if not rules:
+        return None
+    
+    return get_classifier(rules)
+
+#----------------------------------------------------------------#
+#------------------------ APPLYING DATA -------------------------#
+#----------------------------------------------------------------#
+
+def classify_bone_groups(bone_groups, classified):
+    """Copy of bone groups data whose members come from a rig's classified bones
+    
+    Groups a rule targets take the classified bones, the other groups keep
+    their stored bones minus the classified ones. Colors come from the stored
+    group of the same name, rule groups missing from the data get default
+    colors.
+    """
+    
+    claimed = {bone for bones in classified.values() for bone in bones}
+    classified_groups = {}
+    
+    for bone_group, data in bone_groups.items():
+        bones = classified.get(bone_group)
+        if bones is None:
+            bones = [bone for bone in data['BONES'] if bone not in claimed]
+        classified_groups[bone_group] = dict(data, BONES=list(bones))
+    
+    for bone_group, bones in classified.items():
+        if bone_group not in classified_groups:
+            classified_groups[bone_group] = {'MODE': 'DEFAULT', 'NORMAL': DEFAULT_COLOR, 'SELECT': DEFAULT_COLOR,
+                                             'ACTIVE': DEFAULT_COLOR, 'BONES': list(bones)}
+    
+    return classified_groups
+
+
+@timed_phase("Classifying rigs' bone groups")
+def classify_rigs_bone_groups(rigs, bone_groups, classifier, remap=None):
+    """Patch every rig's bone groups with bones put in groups by the classifier, returning the patch report"""
+    
+    objects = get_backend().objects
+    report = {'ADDED': 0, 'CHANGED': 0, 'REMOVED': 0, 'SKIPPED': 0}
+    preset_bone_names = get_preset_bone_names(bone_groups) if remap is not None else None
+    
+    for rig in rigs:
+        rig_object = objects[rig]
+        rig_bone_groups = bone_groups
+        if remap is not None:
+            table = remap.get_table(*index_rig(rig_object), preset_bone_names)
+            rig_bone_groups = remap_bone_groups(bone_groups, table)
+        rig_bone_groups = classify_bone_groups(rig_bone_groups, classifier.classify(rig_object))
+        for key, value in patch_bone_groups([rig], rig_bone_groups).items():
+            report[key] += value
+    
+    return report
\ No newline at end of file
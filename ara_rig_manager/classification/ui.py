@@ -0,0 +1,207 @@
+"""Bone Group Classification UI"""
+
+# Import Blender Python API
+import bpy
+from bpy.props import BoolProperty, CollectionProperty, EnumProperty, IntProperty, PointerProperty, StringProperty
+from bpy.types import Operator, Panel, PropertyGroup, UIList
+
+# Local imports
+from .helpers import *
+from ..ui import ARAPanel
+
+#----------------------------------------------------------------#
+#-------------------- CLASSIFICATION PROPERTIES -----------------#
+#----------------------------------------------------------------#
+
+class ARA_ClassifyRule(PropertyGroup):
+    """Bone group classification rule"""
+    
+    enabled: BoolProperty(
+        name="Enabled",
+        description="Use this rule when classifying bones",
+        default=True
+    )
+    
+    bone_group: StringProperty(
+        name="Bone Group",
+        description="Bone group given to the bones matching the rule"
+    )
+    
+    name_type: EnumProperty(
+        name="Name Type",
+        description="How the name pattern is matched",
+        items=(
+            ('GLOB', "Glob", "Match the whole name with wildcards, e.g. DEF-*"),
+            ('REGEX', "Regex", "Search the name for a regular expression")
+        ),
+        default='GLOB'
+    )
+    
+    name_pattern: StringProperty(
+        name="Name",
+        description="Pattern the bone's name matches, empty for any name"
+    )
+    
+    parent_pattern: StringProperty(
+        name="Parent",
+        description="Wildcard pattern one of the bone's ancestors matches, empty for any parent chain"
+    )
+    
+    deform: EnumProperty(
+        name="Deform",
+        description="Deform flag of the bone",
+        items=(
+            ('ANY', "Any", "Deforming or not"),
+            ('DEFORM', "Deform", "Deforming bones only"),
+            ('NO_DEFORM', "No Deform", "Bones that do not deform only")
+        ),
+        default='ANY'
+    )
+    
+    collection_pattern: StringProperty(
+        name="Collection",
+        description="Wildcard pattern of a bone collection the bone is in, or a bone layer number before Blender 4.0, "
+                    "empty for any"
+    )
+    
+    custom_shape: EnumProperty(
+        name="Custom Shape",
+        description="Custom shape of the bone",
+        items=(
+            ('ANY', "Any", "With or without a custom shape"),
+            ('WITH', "With", "Bones with a custom shape only"),
+            ('WITHOUT', "Without", "Bones without a custom shape only")
+        ),
+        default='ANY'
+    )
+
+
+class ARA_ClassifySettings(PropertyGroup):
+    """Bone group classification settings"""
+    
+    enabled: BoolProperty(
+        name="Classify Bones",
+        description="Put bones in bone groups with the rules below when setting bone groups",
+        default=False
+    )
+    
+    rules: CollectionProperty(type=ARA_ClassifyRule)
+    
+    active_rule: IntProperty()
+
+#----------------------------------------------------------------#
+#------------------------- OPERATORS ----------------------------#
+#----------------------------------------------------------------#
+
+class ARA_OT_AddClassifyRule(Operator):
+    """Add a bone group classification rule"""
+    
+    bl_idname = "ara.add_classify_rule"
+    bl_label = "Add Classification Rule"
+    
+    def execute(self, context):
+        settings = context.scene.ara_classify
+        
+        settings.rules.add()
+        settings.active_rule = len(settings.rules) - 1
+        
+        return {'FINISHED'}
+
+
+class ARA_OT_RemoveClassifyRule(Operator):
+    """Remove the active bone group classification rule"""
+    
+    bl_idname = "ara.remove_classify_rule"
+    bl_label = "Remove Classification Rule"
+    
+    @classmethod
+    def poll(cls, context):
+        return len(context.scene.ara_classify.rules) > 0
+    
+    def execute(self, context):
+        settings = context.scene.ara_classify
+        
+        settings.rules.remove(settings.active_rule)
+        settings.active_rule = min(settings.active_rule, len(settings.rules) - 1)
+        
+        return {'FINISHED'}
+
+#----------------------------------------------------------------#
+#-------------------------- PANELS ------------------------------#
+#----------------------------------------------------------------#
+
+class ARA_UL_ClassifyRules(UIList):
+    """Bone group classification rules list"""
+    
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.prop(item, "enabled", text="")
+        row.prop(item, "bone_group", text="", emboss=False)
+        row.prop(item, "name_pattern", text="")
+        if item.name_type == 'REGEX' and not is_valid_pattern(item.name_pattern):
+            row.label(text="", icon='ERROR')
+
+
+class ARA_PT_ClassifyRules(Panel, ARAPanel):
+    """Bone Group Classification UI Panel"""
+    
+    bl_label = "Bone Classification"
+    bl_parent_id = "ARA_PT_MenuBoneGroupsMain"
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    def draw_header(self, context):
+        self.layout.prop(context.scene.ara_classify, "enabled", text="")
+    
+    def draw(self, context):
+        layout = self.layout
+        settings = context.scene.ara_classify
+        
+        layout.active = settings.enabled
+        
+        row = layout.row()
+        row.template_list("ARA_UL_ClassifyRules", "", settings, "rules", settings, "active_rule", rows=3)
+        
+        col = row.column(align=True)
+        col.operator(ARA_OT_AddClassifyRule.bl_idname, icon='ADD', text="")
+        col.operator(ARA_OT_RemoveClassifyRule.bl_idname, icon='REMOVE', text="")
+        
+        if not 0 <= settings.active_rule < len(settings.rules):
+            return
+        
+        rule = settings.rules[settings.active_rule]
+        col = layout.column(align=True)
+        col.prop(rule, "bone_group")
+        row = col.row(align=True)
+        row.prop(rule, "name_type", text="")
+        row.prop(rule, "name_pattern", text="")
+        col.prop(rule, "parent_pattern")
+        col.prop(rule, "collection_pattern")
+        col.prop(rule, "deform")
+        col.prop(rule, "custom_shape")
+
+#----------------------------------------------------------------#
+#---------------------- CLASS REGISTRATION ----------------------#
+#----------------------------------------------------------------#
+
+classes = [
+    ARA_ClassifyRule,
+    ARA_ClassifySettings,
+    ARA_OT_AddClassifyRule,
+    ARA_OT_RemoveClassifyRule,
+    ARA_UL_ClassifyRules,
+    ARA_PT_ClassifyRules
+]
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    
+    bpy.types.Scene.ara_classify = PointerProperty(type=ARA_ClassifySettings)
+
+
+def unregister():
+    for cls in classes:
+        bpy.utils.unregister_class(cls)
+    
+    del bpy.types.Scene.ara_classify
\ No newline at end of file
@@ -0,0 +1,388 @@
+"""In-memory armature backend
+
+Mimics the parts of Blender's data the helpers use: armature objects with pose
+bones, bone groups or, like Blender 4.0+, bone collections and bone colors,
+selection sets, and the presets stored in scenes, held in collections that
+behave like bpy_prop_collection. Route the helpers to it to run them with
+plain python:
+
+    backend = FakeBackend()
+    backend.add_rig("Rig", ["root", "spine", "head"])
+    set_backend(backend)
+"""
+
+# Import standard library
+import colorsys
+
+#----------------------------------------------------------------#
+#------------------------ COLLECTIONS ---------------------------#
+#----------------------------------------------------------------#
+
+class FakeCollection:
+    """Ordered named items, indexed by position or name like bpy_prop_collection"""
+    
+    def __init__(self, item_type=None):
+        self.item_type = item_type
+        self._items = []
+    
+    def __iter__(self):
+        return iter(self._items)
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._items[key]
+        
+        item = self.get(key)
+        if item is None:
+            raise KeyError("bpy_prop_collection[key]: key \"%s\" not found" % key)
+        
+        return item
+    
+    def __contains__(self, name):
+        return self.find(name) != -1
+    
+    def get(self, name, default=None):
+        index = self.find(name)
+        
+        return self._items[index] if index != -1 else default
+    
+    def find(self, name):
+        for index, item in enumerate(self._items):
+            if item.name == name:
+                return index
+        
+        return -1
+    
+    def keys(self):
+        return [item.name for item in self._items]
+    
+    def values(self):
+        return list(self._items)
+    
+    def items(self):
+        return [(item.name, item) for item in self._items]
+    
+    def add(self):
+        item = self.item_type()
+        self._items.append(item)
+        
+        return item
+    
+    def append(self, item):
+        self._items.append(item)
+        
+        return item
+    
+    def remove(self, index):
+        del self._items[index]
+    
+    def clear(self):
+        self._items.clear()
+
+
+class FakeCustomProperties:
+    """Custom properties of an object or bone collection, accessed like a dictionary"""
+    
+    def __init__(self):
+        self.properties = {}
+    
+    def __getitem__(self, key):
+        return self.properties[key]
+    
+    def __setitem__(self, key, value):
+        self.properties[key] = value
+    
+    def __delitem__(self, key):
+        del self.properties[key]
+    
+    def __contains__(self, key):
+        return key in self.properties
+    
+    def get(self, key, default=None):
+        return self.properties.get(key, default)
+
+#----------------------------------------------------------------#
+#------------------------ BONE GROUPS ---------------------------#
+#----------------------------------------------------------------#
+
+class FakeColor:
+    """RGB color with an HSV view"""
+    
+    def __init__(self):
+        self.rgb = [0.0, 0.0, 0.0]
+    
+    def __iter__(self):
+        return iter(self.rgb)
+    
+    def __len__(self):
+        return 3
+    
+    def __getitem__(self, index):
+        return self.rgb[index]
+    
+    @property
+    def hsv(self):
+        return colorsys.rgb_to_hsv(*self.rgb)
+    
+    @hsv.setter
+    def hsv(self, hsv):
+        self.rgb = list(colorsys.hsv_to_rgb(*hsv))
+
+
+def color_property(name):
+    """Color attribute of a color set, assigning to it copies the values like Blender does"""
+    
+    def getter(self):
+        return self._colors[name]
+    
+    def setter(self, rgb):
+        self._colors[name].rgb = list(rgb)
+    
+    return property(getter, setter)
+
+
+class FakeColorSet:
+    """Normal, select and active colors of a bone group"""
+    
+    def __init__(self):
+        self._colors = {'normal': FakeColor(), 'select': FakeColor(), 'active': FakeColor()}
+    
+    normal = color_property('normal')
+    select = color_property('select')
+    active = color_property('active')
+
+
+class FakeBoneGroup:
+    def __init__(self, name):
+        self.name = name
+        self.color_set = 'DEFAULT'
+        self.colors = FakeColorSet()
+
+
+class FakeBoneGroups(FakeCollection):
+    """Bone groups of a pose, removing a group unassigns its bones"""
+    
+    def __init__(self, pose):
+        super().__init__(FakeBoneGroup)
+        self.pose = pose
+        self.active_index = 0
+    
+    def new(self, name="Group"):
+        unique_name = name
+        number = 0
+        while unique_name in self:
+            number += 1
+            unique_name = "%s.%03d" % (name, number)
+        
+        return self.append(FakeBoneGroup(unique_name))
+    
+    def remove(self, bone_group):
+        for pose_bone in self.pose.bones:
+            if pose_bone.bone_group is bone_group:
+                pose_bone.bone_group = None
+        self._items.remove(bone_group)
+        self.active_index = min(self.active_index, max(len(self._items) - 1, 0))
+
+#----------------------------------------------------------------#
+#---------------------- BONE COLLECTIONS ------------------------#
+#----------------------------------------------------------------#
+
+class FakeBoneColor:
+    def __init__(self):
+        self.palette = 'DEFAULT'
+        self.custom = FakeColorSet()
+
+
+class FakeBoneCollection(FakeCustomProperties):
+    """Bone collection, its bones are the assigned pose bones"""
+    
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+        self.is_visible = True
+        self.bones = []
+    
+    def assign(self, bone):
+        if bone in self.bones:
+            return False
+        self.bones.append(bone)
+        
+        return True
+    
+    def unassign(self, bone):
+        if bone not in self.bones:
+            return False
+        self.bones.remove(bone)
+        
+        return True
+
+
+class FakeBoneCollections(FakeCollection):
+    def __init__(self):
+        super().__init__(FakeBoneCollection)
+        self.active_index = 0
+    
+    def new(self, name="Bones"):
+        unique_name = name
+        number = 0
+        while unique_name in self:
+            number += 1
+            unique_name = "%s.%03d" % (name, number)
+        
+        return self.append(FakeBoneCollection(unique_name))
+    
+    def remove(self, bone_collection):
+        self._items.remove(bone_collection)
+        self.active_index = min(self.active_index, max(len(self._items) - 1, 0))
+
+#----------------------------------------------------------------#
+#------------------------- ARMATURES ----------------------------#
+#----------------------------------------------------------------#
+
+class FakeBone:
+    """Armature bone of a pose bone, deforming and on the first bone layer"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.use_deform = True
+        self.layers = [True] + [False] * 31
+
+
+class FakePoseBone:
+    def __init__(self, name):
+        self.name = name
+        self.bone = FakeBone(name)
+        self.parent = None
+        self.custom_shape = None
+        self.bone_group = None
+        self.color = FakeBoneColor()
+
+
+class FakePose:
+    """Pose of an armature object, bone groups only exist before Blender 4.0"""
+    
+    def __init__(self, bone_names, has_bone_groups=True, parents=None):
+        self.bones = FakeCollection(FakePoseBone)
+        for bone in bone_names:
+            self.bones.append(FakePoseBone(bone))
+        for bone, parent in (parents or {}).items():
+            self.bones[bone].parent = self.bones[parent]
+        if has_bone_groups:
+            self.bone_groups = FakeBoneGroups(self)
+
+
+class FakeBoneId:
+    def __init__(self):
+        self.name = ""
+
+
+class FakeSelectionSet:
+    def __init__(self):
+        self.name = "SelectionSet"
+        self.bone_ids = FakeCollection(FakeBoneId)
+
+
+class FakeArmature:
+    """Armature data, bone collections only exist from Blender 4.0"""
+    
+    def __init__(self, name, has_bone_groups=True):
+        self.name = name
+        if not has_bone_groups:
+            self.collections = FakeBoneCollections()
+
+
+class FakeObject(FakeCustomProperties):
+    """Object with custom properties, an armature when it has a pose"""
+    
+    def __init__(self, name, data=None, pose=None):
+        super().__init__()
+        self.name = name
+        self.data = data
+        self.type = 'ARMATURE' if pose is not None else 'EMPTY'
+        self.library = None
+        self.pose = pose
+        self.selection_sets = FakeCollection(FakeSelectionSet)
+        self.active_selection_set = 0
+
+class FakeScene:
+    """Scene, its objects are every object linked to it"""
+    
+    def __init__(self, name="Scene"):
+        self.name = name
+        self.objects = []
+        self.ara_scene_presets = FakeScenePresets()
+
+
+class FakeObjectCollection:
+    """Collection of objects, all_objects includes the objects of its child collections"""
+    
+    def __init__(self, name="Collection"):
+        self.name = name
+        self.all_objects = []
+
+#----------------------------------------------------------------#
+#----------------------- SCENE PRESETS --------------------------#
+#----------------------------------------------------------------#
+
+class FakeStoredName:
+    def __init__(self):
+        self.name = ""
+
+
+class FakeStoredEntry:
+    def __init__(self):
+        self.name = ""
+        self.members = ""
+        self.mode = ""
+        self.colors = ""
+
+
+class FakeStoredPreset:
+    """Preset copied into a scene, identified by its address like a Blender struct"""
+    
+    def __init__(self):
+        self.source = ""
+        self.version = ""
+        self.bone_names = FakeCollection(FakeStoredName)
+        self.entries = FakeCollection(FakeStoredEntry)
+    
+    def as_pointer(self):
+        return id(self)
+
+
+class FakeScenePresets:
+    def __init__(self):
+        self.bone_groups = FakeStoredPreset()
+        self.selection_sets = FakeStoredPreset()
+
+#----------------------------------------------------------------#
+#-------------------------- BACKEND -----------------------------#
+#----------------------------------------------------------------#
+
+class FakeBackend:
+    """Objects and armatures held in memory, without has_bone_groups rigs have bone collections like Blender 4.0+"""
+    
+    def __init__(self, has_bone_groups=True):
+        self.objects = FakeCollection()
+        self.armatures = FakeCollection()
+        self.scenes = FakeCollection(FakeScene)
+        self.collections = FakeCollection(FakeObjectCollection)
+        self.active_object = None
+        self.has_bone_groups = has_bone_groups
+    
+    def add_rig(self, name, bone_names, parents=None):
+        """Add an armature object and its armature, both named name, the first rig becomes active
+        
+        parents maps bone names to the names of their parent bones.
+        """
+        
+        armature = self.armatures.append(FakeArmature(name, self.has_bone_groups))
+        pose = FakePose(bone_names, self.has_bone_groups, parents)
+        rig_object = self.objects.append(FakeObject(name, armature, pose))
+        if self.active_object is None:
+            self.active_object = rig_object
+        
+        return rig_object
\ No newline at end of file
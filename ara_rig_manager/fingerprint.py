@@ -0,0 +1,161 @@
+"""Rig fingerprint index
+
+A rig's fingerprint is a hash of its bone-name set. It is stored on the rig
+object together with the hashes of the bone groups and selection sets it
+carries, and mirrored to a sidecar file next to the .blend so batch runs can
+skip files that already carry a preset.
+"""
+
+# Import standard library
+import hashlib
+import json
+import os
+
+# Local imports
+from .instrumentation import timed_phase
+
+#----------------------------------------------------------------#
+#------------------------- CONSTANTS ----------------------------#
+#----------------------------------------------------------------#
+
+FINGERPRINT_KEY = "ara_fingerprint"
+BONE_GROUPS_HASH_KEY = "ara_bone_groups_hash"
+SELECTION_SETS_HASH_KEY = "ara_selection_sets_hash"
+
+SIDECAR_SUFFIX = ".ara.json"
+MIN_BONE_OVERLAP = 0.5
+
+#----------------------------------------------------------------#
+#------------------------- HASHING ------------------------------#
+#----------------------------------------------------------------#
+
+def hash_data(data):
+    """Hash JSON serializable data independently of key order"""
+    
+    serialized = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+
+def get_bone_groups_hash(bone_groups, bone_names):
+    """Hash bone groups data as it would end up on a rig with bone_names"""
+    
+    canonical = {}
+    for bone_group, data in bone_groups.items():
+        canonical[bone_group] = [
+            data['MODE'],
+            [round(float(value), 4) for value in (*data['NORMAL'], *data['SELECT'], *data['ACTIVE'])],
+            sorted(bone for bone in data['BONES'] if bone in bone_names)
+        ]
+    
+    return hash_data(canonical)
+
+
+def get_selection_sets_hash(selection_sets, bone_names):
+    """Hash selection sets data as it would end up on a rig with bone_names"""
+    
+    canonical = {selection_set: sorted(bone for bone in bones if bone in bone_names)
+                 for selection_set, bones in selection_sets.items()}
+    
+    return hash_data(canonical)
+
+#----------------------------------------------------------------#
+#------------------------ RIG INDEX -----------------------------#
+#----------------------------------------------------------------#
+
+def get_bone_names_fingerprint(bone_names):
+    """Fingerprint of a bone-name set"""
+    
+    return hash_data(sorted(bone_names))
+
+
+def index_rig(rig_object):
+    """Return the rig's fingerprint and bone-name set, storing the fingerprint on the object"""
+    
+    bone_names = frozenset(rig_object.pose.bones.keys())
+    fingerprint = get_bone_names_fingerprint(bone_names)
+    if rig_object.get(FINGERPRINT_KEY) != fingerprint:
+        rig_object[FINGERPRINT_KEY] = fingerprint
+    
+    return fingerprint, bone_names
+
+
+def get_bone_overlap(matched_count, preset_bone_names):
+    """Share of the preset's bone names that matched
+    
+    Normalizing by the preset keeps a rig with a few common bones, e.g. a
+    single root, from matching every preset.
+    """
+    
+    if not preset_bone_names:
+        return 0.0
+    
+    return matched_count / len(preset_bone_names)
+
+
+@timed_phase("Matching rigs by bone names")
+def find_matching_rigs(objects, preset_bone_names, min_overlap=MIN_BONE_OVERLAP, remap=None):
+    """Get names of armature objects whose bones overlap with the preset's bones
+    
+    With a remap, the preset's bone names are translated for each rig first.
+    """
+    
+    preset_bone_names = frozenset(preset_bone_names)
+    rigs = []
+    for rig_object in objects:
+        if rig_object.type != 'ARMATURE' or rig_object.library is not None:
+            continue
+        fingerprint, bone_names = index_rig(rig_object)
+        if remap is None:
+            matched_count = len(bone_names & preset_bone_names)
+        else:
+            table = remap.get_table(fingerprint, bone_names, preset_bone_names)
+            matched_count = len(set(table.map_bones(preset_bone_names)))
+        if get_bone_overlap(matched_count, preset_bone_names) >= min_overlap:
+            rigs.append(rig_object.name)
+    
+    return rigs
+
+#----------------------------------------------------------------#
+#------------------------- SIDECAR ------------------------------#
+#----------------------------------------------------------------#
+
+def get_sidecar_path(blend_path):
+    """Sidecar index path of a .blend file"""
+    
+    return blend_path + SIDECAR_SUFFIX
+
+
+def write_sidecar(blend_path, rig_objects, presets):
+    """Record rig fingerprints and applied preset hashes next to a saved .blend file"""
+    
+    stat = os.stat(blend_path)
+    sidecar = {
+        'MTIME': stat.st_mtime,
+        'SIZE': stat.st_size,
+        'PRESETS': presets,
+        'RIGS': {rig_object.name: {
+            'FINGERPRINT': rig_object.get(FINGERPRINT_KEY),
+            'BONE_GROUPS_HASH': rig_object.get(BONE_GROUPS_HASH_KEY),
+            'SELECTION_SETS_HASH': rig_object.get(SELECTION_SETS_HASH_KEY)
+        } for rig_object in rig_objects}
+    }
+    
+    with open(get_sidecar_path(blend_path), 'w', encoding='utf-8') as file:
+        json.dump(sidecar, file, indent=2)
+
+
+def read_sidecar(blend_path):
+    """Read the sidecar index of a .blend file, None if missing or outdated"""
+    
+    try:
+        with open(get_sidecar_path(blend_path), 'r', encoding='utf-8') as file:
+            sidecar = json.load(file)
+        stat = os.stat(blend_path)
+    except (OSError, ValueError):
+        return None
+    
+    if sidecar.get('MTIME') != stat.st_mtime or sidecar.get('SIZE') != stat.st_size:
+        return None
+    
+    return sidecar
\ No newline at end of file
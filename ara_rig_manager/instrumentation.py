@@ -0,0 +1,195 @@
+"""Hot-path instrumentation of the ARA operators
+
+Every ARA operator runs inside an OperatorRun that records, per phase, the
+wall time, the number of calls, the operator calls made and the bones,
+groups and sets touched. Phases are logged through the "ara_rig_manager"
+logger and the last run is kept for the Performance panel.
+"""
+
+# Import standard library
+import functools
+import logging
+import time
+from contextlib import contextmanager
+
+#----------------------------------------------------------------#
+#-------------------------- LOGGING -----------------------------#
+#----------------------------------------------------------------#
+
+logger = logging.getLogger("ara_rig_manager")
+
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("ARA: %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+#----------------------------------------------------------------#
+#------------------------- RECORDS ------------------------------#
+#----------------------------------------------------------------#
+
+COUNTERS = ('operator_calls', 'bones', 'groups', 'sets')
+
+
+class Phase:
+    """Accumulated cost of one named phase within an operator run"""
+    
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.seconds = 0.0
+        self.calls = 0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+
+class OperatorRun:
+    """Per-phase breakdown of one operator execution"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.phases = {}
+        self.stack = []
+        self.seconds = 0.0
+        self.status = 'RUNNING'
+        self.counters = dict.fromkeys(COUNTERS, 0)
+    
+    def get_phase(self, name):
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(name, len(self.stack))
+        
+        return phase
+
+
+_current_run = None
+_last_run = None
+
+
+def get_last_run():
+    """Breakdown of the last finished operator run, None before the first one"""
+    
+    return _last_run
+
+#----------------------------------------------------------------#
+#------------------------ RECORDING -----------------------------#
+#----------------------------------------------------------------#
+
+@contextmanager
+def operator_run(name):
+    """Record an operator execution, nested runs are folded into the outer one"""
+    
+    global _current_run, _last_run
+    
+    if _current_run is not None:
+        with phase(name):
+            yield _current_run
+        return
+    
+    run = _current_run = OperatorRun(name)
+    start = time.perf_counter()
+    
+    try:
+        yield run
+        if run.status == 'RUNNING':
+            run.status = 'FINISHED'
+    except Exception:
+        run.status = 'FAILED'
+        raise
+    finally:
+        run.seconds = time.perf_counter() - start
+        _current_run = None
+        _last_run = run
+        log_run(run)
+
+
+@contextmanager
+def phase(name):
+    """Time a phase of the current operator run, logging its entry at debug level"""
+    
+    logger.debug(name)
+    
+    run = _current_run
+    if run is None:
+        yield
+        return
+    
+    current_phase = run.get_phase(name)
+    run.stack.append(current_phase)
+    start = time.perf_counter()
+    
+    try:
+        yield
+    finally:
+        current_phase.seconds += time.perf_counter() - start
+        current_phase.calls += 1
+        run.stack.pop()
+
+
+def fail_run():
+    """Mark the current operator run failed, for operators reporting an error instead of raising"""
+    
+    if _current_run is not None:
+        _current_run.status = 'FAILED'
+
+
+def timed_phase(name):
+    """Decorator recording every call of a helper as a phase"""
+    
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return function(*args, **kwargs)
+        
+        return wrapper
+    
+    return decorator
+
+
+def count(**counters):
+    """Add to the operator_calls, bones, groups or sets counters of the current phase"""
+    
+    run = _current_run
+    if run is None:
+        return
+    
+    targets = [run]
+    if run.stack:
+        targets.append(run.stack[-1])
+    
+    for key, value in counters.items():
+        for target in targets:
+            target.counters[key] += value
+
+
+def instrument_operator(execute):
+    """Decorator recording an operator's execute() as an operator run"""
+    
+    @functools.wraps(execute)
+    def wrapper(self, context):
+        try:
+            with operator_run(self.bl_label):
+                return execute(self, context)
+        finally:
+            # Let the performance panel pick up the new breakdown
+            area = getattr(context, "area", None)
+            if area is not None:
+                area.tag_redraw()
+    
+    return wrapper
+
+
+def log_run(run):
+    """Log an operator run's breakdown, slowest phases first"""
+    
+    logger.info("%s %s in %.1f ms (%s)", run.name, run.status.lower(), run.seconds * 1000.0,
+                format_counters(run.counters))
+    
+    for current_phase in sorted(run.phases.values(), key=lambda item: item.seconds, reverse=True):
+        logger.info("  %-40s %9.1f ms  x%d  %s", current_phase.name, current_phase.seconds * 1000.0,
+                    current_phase.calls, format_counters(current_phase.counters))
+
+
+def format_counters(counters):
+    return ", ".join("%s %d" % (key.replace('_', ' '), value) for key, value in counters.items() if value)
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""Live sync of rigs' bone groups and selection sets
+
+When enabled, a depsgraph_update_post handler marks armatures that changed
+as dirty. It does nothing else, so it costs next to nothing, and it ignores
+updates while the animation plays. A timer rescans the dirty rigs once edits
+have settled (debounce) and never more often than MIN_RESCAN_INTERVAL
+(throttle). The rescans keep a mirror of every rig's data, so Save and Export
+can use the mirror instead of capturing the rigs again.
+"""
+
+# Import Blender Python API
+import bpy
+from bpy.app.handlers import persistent
+from bpy.props import BoolProperty
+
+# Import standard library
+import time
+
+# Local imports
+from .bone_groups.helpers import get_bone_groups_data
+from .instrumentation import logger
+from .rig_registry import get_armature_rigs
+from .selection_sets.helpers import get_selection_sets_data, merge_selection_sets_data
+from .snapshot import get_local_rigs
+
+#----------------------------------------------------------------#
+#------------------------- CONSTANTS ----------------------------#
+#----------------------------------------------------------------#
+
+DEBOUNCE_SECONDS = 0.5
+MIN_RESCAN_INTERVAL = 2.0
+
+#----------------------------------------------------------------#
+#--------------------------- MIRROR -----------------------------#
+#----------------------------------------------------------------#
+
+class RigMirror:
+    """Last captured bone groups and selection sets of a rig"""
+    
+    def __init__(self):
+        self.bone_groups = {}
+        self.selection_sets = {}
+
+
+_mirrors = {}
+_dirty = set()
+_last_change = 0.0
+_last_rescan = 0.0
+_rescan_scheduled = False
+
+
+def is_in_sync(rigs):
+    """Check that every rig has a mirror and no pending changes"""
+    
+    return all(rig in _mirrors and rig not in _dirty for rig in rigs)
+
+
+def get_mirrored_bone_groups(rigs):
+    """Bone groups of rigs from the mirror, merged like get_bone_groups_data, None when out of sync"""
+    
+    if not is_in_sync(rigs):
+        return None
+    
+    bone_groups = {}
+    for rig in rigs:
+        bone_groups.update(_mirrors[rig].bone_groups)
+    
+    return bone_groups
+
+
+def get_mirrored_selection_sets(rigs):
+    """Selection sets of rigs from the mirror, merged like get_rigs_selection_sets_data, None when out of sync"""
+    
+    if not is_in_sync(rigs):
+        return None
+    
+    selection_sets = {}
+    for rig in rigs:
+        merge_selection_sets_data(selection_sets, _mirrors[rig].selection_sets)
+    
+    return selection_sets
+
+
+def get_changed_names(mirrored, captured):
+    """Names of the groups or sets that differ between the mirror and a capture"""
+    
+    names = {name for name, value in captured.items() if mirrored.get(name) != value}
+    names.update(name for name in mirrored if name not in captured)
+    
+    return names
+
+
+def sync_rig(rig):
+    """Recapture one rig into its mirror, returning the number of changed groups and sets"""
+    
+    rig_object = bpy.data.objects.get(rig)
+    if rig_object is None or rig_object.type != 'ARMATURE':
+        _mirrors.pop(rig, None)
+        return 0
+    
+    mirror = _mirrors.setdefault(rig, RigMirror())
+    
+    # Background rescans are not operator runs, skip their phase logging
+    bone_groups = get_bone_groups_data.__wrapped__([rig])
+    selection_sets = get_selection_sets_data.__wrapped__(getattr(rig_object, "selection_sets", ()))
+    
+    changed = len(get_changed_names(mirror.bone_groups, bone_groups))
+    changed += len(get_changed_names(mirror.selection_sets, selection_sets))
+    
+    # Captures are fresh objects, swapping them in keeps readers on the old mirror consistent
+    if changed:
+        mirror.bone_groups = bone_groups
+        mirror.selection_sets = selection_sets
+    
+    return changed
+
+#----------------------------------------------------------------#
+#------------------------- SCHEDULING ---------------------------#
+#----------------------------------------------------------------#
+
+def mark_dirty(rigs):
+    """Queue rigs for the next rescan"""
+    
+    global _last_change, _rescan_scheduled
+    
+    _dirty.update(rigs)
+    _last_change = time.monotonic()
+    
+    if not _rescan_scheduled:
+        # Persistent, so a file load does not drop the timer while the flag stays set
+        bpy.app.timers.register(rescan_dirty_rigs, first_interval=DEBOUNCE_SECONDS, persistent=True)
+        _rescan_scheduled = True
+
+
+def rescan_dirty_rigs():
+    """Timer rescanning dirty rigs once changes settled, at most once per MIN_RESCAN_INTERVAL"""
+    
+    global _last_rescan, _rescan_scheduled
+    
+    now = time.monotonic()
+    wait = max(_last_change + DEBOUNCE_SECONDS, _last_rescan + MIN_RESCAN_INTERVAL) - now
+    if wait > 0:
+        return wait
+    
+    _rescan_scheduled = False
+    _last_rescan = now
+    
+    rigs = list(_dirty)
+    _dirty.clear()
+    changed = sum(sync_rig(rig) for rig in rigs)
+    if changed:
+        logger.info("Live sync: %d groups and sets changed on %d rigs in %.1f ms",
+                    changed, len(rigs), (time.monotonic() - now) * 1000.0)
+    
+    return None
+
+
+def clear_mirrors():
+    """Forget every mirror and cancel the pending rescan"""
+    
+    global _rescan_scheduled
+    
+    _mirrors.clear()
+    _dirty.clear()
+    
+    if bpy.app.timers.is_registered(rescan_dirty_rigs):
+        bpy.app.timers.unregister(rescan_dirty_rigs)
+    _rescan_scheduled = False
+
+#----------------------------------------------------------------#
+#-------------------------- HANDLERS ----------------------------#
+#----------------------------------------------------------------#
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    """Mark updated armatures dirty, nothing else runs here"""
+    
+    if not scene.ara_live_sync:
+        return
+    
+    screen = bpy.context.screen
+    if screen is not None and screen.is_animation_playing:
+        return
+    
+    rigs = []
+    armatures = set()
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object) and update.id.type == 'ARMATURE':
+            rigs.append(update.id.name)
+        elif isinstance(update.id, bpy.types.Armature):
+            armatures.add(update.id.name)
+    
+    # From Blender 4.0 bone collections live on the armature data, shared by its objects
+    for armature in armatures:
+        rigs.extend(get_armature_rigs(armature))
+    
+    if rigs:
+        mark_dirty(rigs)
+
+
+@persistent
+def on_load_post(*args):
+    """Forget the mirror of the previous file and capture the new one if it syncs"""
+    
+    clear_mirrors()
+    
+    scene = bpy.context.scene
+    if scene is not None and scene.ara_live_sync:
+        mark_dirty(get_local_rigs())
+
+
+def update_live_sync(self, context):
+    clear_mirrors()
+    
+    if self.ara_live_sync:
+        mark_dirty(get_local_rigs())
+
+#----------------------------------------------------------------#
+#---------------------- CLASS REGISTRATION ----------------------#
+#----------------------------------------------------------------#
+
+def register():
+    bpy.types.Scene.ara_live_sync = BoolProperty(
+        name="Live Sync",
+        description="Keep bone groups and selection sets captured while rigs are edited, "
+                    "so saving and exporting are instant",
+        default=False,
+        update=update_live_sync
+    )
+    
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    bpy.app.handlers.load_post.append(on_load_post)
+
+
+def unregister():
+    bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    bpy.app.handlers.load_post.remove(on_load_post)
+    
+    clear_mirrors()
+    
+    del bpy.types.Scene.ara_live_sync
\ No newline at end of file
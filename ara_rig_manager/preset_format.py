@@ -0,0 +1,422 @@
+"""Compact binary preset format
+
+Bone groups and selection sets can be stored either as the plain JSON the
+add-on always wrote, or as a columnar binary file with one interned string
+table. The binary layout is:
+
+    header   b"ARAP", version (u8), flags (u8), kind (u8), reserved (u8)
+    payload  optionally zlib compressed when flags has FLAG_ZLIB
+
+The payload is a sequence of little-endian columns, each prefixed with its
+item count as u32:
+
+    strings        u16 length + UTF-8 bytes per interned string
+    names          u32 string index per group or set
+    modes          u32 string index per group (bone groups only)
+    colors         9 float64 per group, NORMAL/SELECT/ACTIVE (bone groups only)
+    offsets        u32 start of each group's or set's members, plus the end
+    members        u32 string index per assigned bone
+
+Floats are stored as float64 so the JSON and binary formats round-trip
+losslessly. Readers auto-detect the format from the magic bytes.
+"""
+
+# Import standard library
+import codecs
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+#----------------------------------------------------------------#
+#------------------------- CONSTANTS ----------------------------#
+#----------------------------------------------------------------#
+
+MAGIC = b"ARAP"
+VERSION = 1
+FLAG_ZLIB = 1
+
+KIND_BONE_GROUPS = 1
+KIND_SELECTION_SETS = 2
+
+BINARY_EXT = ".arap"
+JSON_EXT = ".json"
+
+HEADER = struct.Struct("<4sBBBB")
+COUNT = struct.Struct("<I")
+STRING_LENGTH = struct.Struct("<H")
+
+COLOR_KEYS = ('NORMAL', 'SELECT', 'ACTIVE')
+
+CHUNK_SIZE = 1 << 16
+# Files at least this large are applied while they are read
+STREAMING_THRESHOLD = 8 << 20
+
+#----------------------------------------------------------------#
+#------------------------- ENCODING -----------------------------#
+#----------------------------------------------------------------#
+
+class StringTable:
+    """Interned strings, each stored once and referenced by index"""
+    
+    def __init__(self):
+        self.strings = []
+        self.indices = {}
+    
+    def intern(self, string):
+        index = self.indices.get(string)
+        if index is None:
+            index = self.indices[string] = len(self.strings)
+            self.strings.append(string)
+        
+        return index
+    
+    def to_bytes(self):
+        chunks = [COUNT.pack(len(self.strings))]
+        for string in self.strings:
+            encoded = string.encode('utf-8')
+            chunks.append(STRING_LENGTH.pack(len(encoded)))
+            chunks.append(encoded)
+        
+        return b"".join(chunks)
+
+
+def pack_column(typecode, values):
+    """Serialize a column as its item count followed by little-endian values"""
+    
+    column = array(typecode, values)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    
+    return COUNT.pack(len(column)) + column.tobytes()
+
+
+def get_kind(data):
+    """Tell bone groups data from selection sets data"""
+    
+    for value in data.values():
+        return KIND_BONE_GROUPS if isinstance(value, dict) else KIND_SELECTION_SETS
+    
+    return KIND_BONE_GROUPS
+
+
+def encode_preset(data, kind=None, compress=True):
+    """Encode bone groups or selection sets data into the binary format"""
+    
+    kind = kind or get_kind(data)
+    strings = StringTable()
+    names = [strings.intern(name) for name in data]
+    
+    if kind == KIND_BONE_GROUPS:
+        memberships = [bone_group['BONES'] for bone_group in data.values()]
+    else:
+        memberships = list(data.values())
+    
+    offsets = [0]
+    members = []
+    for bones in memberships:
+        members.extend(strings.intern(bone) for bone in bones)
+        offsets.append(len(members))
+    
+    columns = [pack_column('I', names)]
+    if kind == KIND_BONE_GROUPS:
+        columns.append(pack_column('I', [strings.intern(bone_group['MODE']) for bone_group in data.values()]))
+        columns.append(pack_column('d', [value for bone_group in data.values()
+                                         for key in COLOR_KEYS for value in bone_group[key]]))
+    columns.append(pack_column('I', offsets))
+    columns.append(pack_column('I', members))
+    
+    payload = strings.to_bytes() + b"".join(columns)
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload)
+        flags |= FLAG_ZLIB
+    
+    return HEADER.pack(MAGIC, VERSION, flags, kind, 0) + payload
+
+#----------------------------------------------------------------#
+#------------------------- DECODING -----------------------------#
+#----------------------------------------------------------------#
+
+class PayloadReader:
+    """Sequential reader over a decoded payload"""
+    
+    def __init__(self, payload):
+        self.payload = payload
+        self.offset = 0
+    
+    def read_count(self):
+        count = COUNT.unpack_from(self.payload, self.offset)[0]
+        self.offset += COUNT.size
+        
+        return count
+    
+    def read_strings(self):
+        strings = []
+        for _ in range(self.read_count()):
+            length = STRING_LENGTH.unpack_from(self.payload, self.offset)[0]
+            self.offset += STRING_LENGTH.size
+            strings.append(self.payload[self.offset:self.offset + length].decode('utf-8'))
+            self.offset += length
+        
+        return strings
+    
+    def read_column(self, typecode):
+        column = array(typecode)
+        count = self.read_count()
+        end = self.offset + count * column.itemsize
+        column.frombytes(self.payload[self.offset:end])
+        if sys.byteorder != 'little':
+            column.byteswap()
+        self.offset = end
+        
+        return column
+
+
+def read_header(blob):
+    """Return (flags, kind) of a binary preset, raising ValueError if it is not one"""
+    
+    if len(blob) < HEADER.size:
+        raise ValueError("Not an ARA binary preset")
+    
+    magic, version, flags, kind, _ = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("Not an ARA binary preset")
+    if version > VERSION:
+        raise ValueError("Unsupported ARA binary preset version %d" % version)
+    
+    return flags, kind
+
+
+def iter_decoded_preset(blob):
+    """Yield (name, value, progress) for each group or set of a binary preset"""
+    
+    flags, kind = read_header(blob)
+    payload = blob[HEADER.size:]
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    
+    reader = PayloadReader(payload)
+    strings = reader.read_strings()
+    names = reader.read_column('I')
+    if kind == KIND_BONE_GROUPS:
+        modes = reader.read_column('I')
+        colors = reader.read_column('d')
+    offsets = reader.read_column('I')
+    members = reader.read_column('I')
+    
+    for index, name_index in enumerate(names):
+        bones = [strings[member] for member in members[offsets[index]:offsets[index + 1]]]
+        if kind == KIND_BONE_GROUPS:
+            color = colors[index * 9:index * 9 + 9]
+            value = {
+                'MODE': strings[modes[index]],
+                'NORMAL': list(color[0:3]),
+                'SELECT': list(color[3:6]),
+                'ACTIVE': list(color[6:9]),
+                'BONES': bones
+            }
+        else:
+            value = bones
+        yield strings[name_index], value, (index + 1) / len(names)
+
+
+def decode_preset(blob):
+    """Decode a binary preset into bone groups or selection sets data"""
+    
+    return {name: value for name, value, _ in iter_decoded_preset(blob)}
+
+#----------------------------------------------------------------#
+#------------------------- STREAMING ----------------------------#
+#----------------------------------------------------------------#
+
+class JsonMemberReader:
+    """Incremental reader of the members of a top-level JSON object
+    
+    Only the member being parsed is held in memory, so a preset with thousands
+    of groups or sets can be applied while it is read.
+    """
+    
+    def __init__(self, file, size, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.size = size
+        self.chunk_size = chunk_size
+        self.read_size = chunk_size
+        self.bytes_read = 0
+        self.eof = False
+        self.buffer = ""
+        self.position = 0
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+    
+    def fill(self):
+        """Append the next chunk to the buffer, False at the end of the file"""
+        
+        chunk = self.file.read(self.read_size)
+        self.bytes_read += len(chunk)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.position:] + self.text_decoder.decode(chunk, final=self.eof)
+        self.position = 0
+        
+        return not self.eof
+    
+    def skip_whitespace(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer) or not self.fill():
+                return
+    
+    def peek(self):
+        self.skip_whitespace()
+        if self.position >= len(self.buffer):
+            raise ValueError("Unexpected end of JSON preset")
+        
+        return self.buffer[self.position]
+    
+    def expect(self, character):
+        if self.peek() != character:
+            raise ValueError("Expected %r at byte %d of JSON preset" % (character, self.bytes_read))
+        self.position += 1
+    
+    def read_value(self):
+        """Decode the next JSON value, reading more of the file until it is complete"""
+        
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number may continue in the next chunk, only trust values with text after them
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    self.read_size = self.chunk_size
+                    return value
+            self.fill()
+            self.read_size *= 2
+    
+    def __iter__(self):
+        """Yield (name, value, progress) for each member of the object"""
+        
+        self.expect('{')
+        if self.peek() == '}':
+            return
+        
+        while True:
+            name = self.read_value()
+            self.expect(':')
+            value = self.read_value()
+            yield name, value, min(self.bytes_read / max(self.size, 1), 1.0)
+            if self.peek() == '}':
+                return
+            self.expect(',')
+
+
+def iter_preset(filepath, chunk_size=CHUNK_SIZE):
+    """Yield (name, value, progress) for each group or set of a JSON or binary preset"""
+    
+    with open(filepath, 'rb') as file:
+        head = file.read(len(MAGIC))
+        if head == MAGIC:
+            yield from iter_decoded_preset(head + file.read())
+            return
+        
+        size = os.fstat(file.fileno()).st_size
+        file.seek(0)
+        reader = JsonMemberReader(file, size, chunk_size)
+        reader.skip_whitespace()
+        if reader.position >= len(reader.buffer):
+            return
+        yield from reader
+
+#----------------------------------------------------------------#
+#----------------------- FILE HANDLING --------------------------#
+#----------------------------------------------------------------#
+
+def read_preset_bone_names(filepath, progress=None):
+    """Every bone name of a preset file, read one group or set at a time"""
+    
+    bone_names = set()
+    for name, value, fraction in iter_preset(filepath):
+        bone_names.update(value['BONES'] if isinstance(value, dict) else value)
+        if progress is not None:
+            progress(fraction)
+    
+    return frozenset(bone_names)
+
+
+def is_binary_preset(filepath):
+    """Check a file's magic bytes for the binary preset format"""
+    
+    with open(filepath, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def read_preset(filepath):
+    """Read a JSON or binary preset file, an empty file yields an empty preset"""
+    
+    with open(filepath, 'rb') as file:
+        blob = file.read()
+    
+    if blob.startswith(MAGIC):
+        return decode_preset(blob)
+    if not blob.strip():
+        return {}
+    
+    return json.loads(blob.decode('utf-8'))
+
+
+def write_preset(filepath, data, compress=True):
+    """Write a preset as binary when filepath ends with .arap, as JSON otherwise"""
+    
+    for _ in iter_write_preset(filepath, data, compress):
+        pass
+
+
+def iter_write_preset(filepath, data, compress=True, chunk_size=CHUNK_SIZE):
+    """Write a preset like write_preset, yielding the fraction written after each chunk
+    
+    The file is written under a temporary name and renamed once complete, so
+    closing the generator early leaves any previous file untouched.
+    """
+    
+    if filepath.lower().endswith(BINARY_EXT):
+        blob = encode_preset(data, compress=compress)
+    else:
+        blob = json.dumps(data).encode('utf-8')
+    
+    temp_path = filepath + ".part"
+    try:
+        with open(temp_path, 'wb') as file:
+            for start in range(0, len(blob), chunk_size):
+                file.write(blob[start:start + chunk_size])
+                yield min((start + chunk_size) / len(blob), 1.0)
+        os.replace(temp_path, filepath)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def convert_preset(source, destination, compress=True):
+    """Convert a preset file between JSON and binary, guided by the destination extension"""
+    
+    write_preset(destination, read_preset(source), compress=compress)
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Convert ARA presets between JSON and binary (.arap)")
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    parser.add_argument("--no-compress", action='store_true', help="Store the binary payload uncompressed")
+    args = parser.parse_args()
+    
+    convert_preset(args.source, args.destination, compress=not args.no_compress)
+    print("%s (%d bytes) -> %s (%d bytes)" % (args.source, os.path.getsize(args.source),
+                                             args.destination, os.path.getsize(args.destination)))
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""Versioned, content-addressed preset library
+
+Saved bone groups and selection sets live in a library folder in the user
+config directory:
+
+    index.json              every preset with its kind and version list
+    blocks/ab/<hash>.json   one bone group or selection set, [name, value]
+    versions/<hash>.json    one preset version, its kind and ordered block hashes
+
+Blocks and versions are named by the hash of their content, so a group or set
+that did not change between saves, or is shared by several presets, is stored
+once. Saving content identical to a preset's latest version adds no version.
+The index lists presets without opening their versions. Every file is written
+to a temporary file and renamed over the target, so a crash never leaves a
+partial file behind.
+"""
+
+# Import standard library
+import json
+import os
+import tempfile
+import time
+
+# Local imports
+from .fingerprint import hash_data
+from .preset_format import KIND_BONE_GROUPS, KIND_SELECTION_SETS
+
+#----------------------------------------------------------------#
+#------------------------- CONSTANTS ----------------------------#
+#----------------------------------------------------------------#
+
+LIBRARY_DIRNAME = "ara_rig_manager_presets"
+INDEX_FILE = "index.json"
+BLOCKS_DIR = "blocks"
+VERSIONS_DIR = "versions"
+
+KIND_NAMES = {KIND_BONE_GROUPS: 'BONE_GROUPS', KIND_SELECTION_SETS: 'SELECTION_SETS'}
+
+#----------------------------------------------------------------#
+#------------------------ ATOMIC FILES --------------------------#
+#----------------------------------------------------------------#
+
+def write_json_atomic(filepath, data):
+    """Write JSON next to filepath and rename it into place"""
+    
+    directory = os.path.dirname(filepath)
+    os.makedirs(directory, exist_ok=True)
+    
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump(data, file, separators=(',', ':'))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_json(filepath):
+    with open(filepath, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+#----------------------------------------------------------------#
+#------------------------- LIBRARY ------------------------------#
+#----------------------------------------------------------------#
+
+class PresetLibrary:
+    """Named, versioned presets with deduplicated group and set blocks"""
+    
+    def __init__(self, root):
+        self.root = root
+        self._index = {}
+        self._index_key = None
+    
+    def get_block_path(self, block_hash):
+        return os.path.join(self.root, BLOCKS_DIR, block_hash[:2], block_hash + ".json")
+    
+    def get_version_path(self, version_hash):
+        return os.path.join(self.root, VERSIONS_DIR, version_hash + ".json")
+    
+    def get_index_path(self):
+        return os.path.join(self.root, INDEX_FILE)
+    
+    def get_index_key(self):
+        """Identify the index file's current version, None when it does not exist"""
+        
+        try:
+            stat = os.stat(self.get_index_path())
+        except OSError:
+            return None
+        
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def read_index(self, force=False):
+        """Index of every preset, reread only when the file changed"""
+        
+        index_key = self.get_index_key()
+        if force or index_key != self._index_key:
+            self._index = read_json(self.get_index_path()) if index_key is not None else {}
+            self._index_key = index_key
+        
+        return self._index
+    
+    def list_presets(self, kind):
+        """(name, latest version entry) of every preset of a kind, sorted by name"""
+        
+        presets = self.read_index().get(KIND_NAMES[kind], {})
+        
+        return [(name, versions[-1]) for name, versions in sorted(presets.items())]
+    
+    def get_versions(self, kind, name):
+        """Version entries of a preset, oldest first, empty when it does not exist"""
+        
+        return self.read_index().get(KIND_NAMES[kind], {}).get(name, [])
+    
+    def save(self, kind, name, data):
+        """Store data as the next version of a preset
+        
+        Returns the version entry, and whether a version was added. Nothing is
+        written when data equals the latest version.
+        """
+        
+        block_hashes = []
+        for block in data.items():
+            block_hash = hash_data(block)
+            block_path = self.get_block_path(block_hash)
+            if not os.path.exists(block_path):
+                write_json_atomic(block_path, block)
+            block_hashes.append(block_hash)
+        
+        version = {'KIND': KIND_NAMES[kind], 'BLOCKS': block_hashes}
+        version_hash = hash_data(version)
+        version_path = self.get_version_path(version_hash)
+        if not os.path.exists(version_path):
+            write_json_atomic(version_path, version)
+        
+        versions = self.get_versions(kind, name)
+        if versions and versions[-1]['HASH'] == version_hash:
+            return versions[-1], False
+        
+        entry = {
+            'VERSION': len(versions) + 1,
+            'HASH': version_hash,
+            'TIME': time.time(),
+            'COUNT': len(block_hashes)
+        }
+        
+        # Start from a fresh read so saves from other sessions are kept
+        index = self.read_index(force=True)
+        index.setdefault(KIND_NAMES[kind], {}).setdefault(name, []).append(entry)
+        write_json_atomic(self.get_index_path(), index)
+        self._index_key = self.get_index_key()
+        
+        return entry, True
+    
+    def load(self, kind, name, version=None):
+        """Data of a preset version, the latest one when version is None"""
+        
+        versions = self.get_versions(kind, name)
+        if not versions:
+            raise KeyError("No %s preset named %r" % (KIND_NAMES[kind].lower().replace('_', ' '), name))
+        
+        if version is None:
+            entry = versions[-1]
+        else:
+            entry = next((entry for entry in versions if entry['VERSION'] == version), None)
+            if entry is None:
+                raise KeyError("Preset %r has no version %d" % (name, version))
+        
+        return self.load_version(entry['HASH'])
+    
+    def load_version(self, version_hash):
+        """Data of a preset version by its hash"""
+        
+        data = {}
+        for block_hash in read_json(self.get_version_path(version_hash))['BLOCKS']:
+            name, value = read_json(self.get_block_path(block_hash))
+            data[name] = value
+        
+        return data
+
+
+_preset_library = None
+
+
+def get_preset_library():
+    """The user's preset library, in Blender's config directory"""
+    
+    global _preset_library
+    
+    if _preset_library is None:
+        import bpy
+        _preset_library = PresetLibrary(os.path.join(bpy.utils.user_resource('CONFIG'), LIBRARY_DIRNAME))
+    
+    return _preset_library
\ No newline at end of file
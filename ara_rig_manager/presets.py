@@ -0,0 +1,86 @@
+"""Lazily loaded standard preset files"""
+
+# Import standard library
+import os
+
+#----------------------------------------------------------------#
+#------------------------- CONSTANTS ----------------------------#
+#----------------------------------------------------------------#
+
+# Preset name standing for the file bundled with the add-on
+BUNDLED_PRESET = "__BUNDLED__"
+
+#----------------------------------------------------------------#
+#------------------------ PRESET STORE --------------------------#
+#----------------------------------------------------------------#
+
+class PresetStore:
+    """Standard preset file parsed on first access and cached by file mtime and size"""
+    
+    def __init__(self, filepath, reader):
+        self.filepath = filepath
+        self.reader = reader
+        self._data = {}
+        self._file_key = None
+    
+    def get_file_key(self):
+        """Identify the file's current version, None when it does not exist"""
+        
+        try:
+            stat = os.stat(self.filepath)
+        except OSError:
+            return None
+        
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    @property
+    def data(self):
+        """Parsed preset, reloaded only when the file changed since the last access"""
+        
+        file_key = self.get_file_key()
+        if file_key != self._file_key:
+            self._data = self.reader(self.filepath) if file_key is not None else {}
+            self._file_key = file_key
+        
+        return self._data
+    
+    def invalidate(self):
+        """Force the next access to read the file again"""
+        
+        self._file_key = None
+
+
+
+class LibraryPresetStore(PresetStore):
+    """Standard presets read from the preset library, the bundled file standing in for missing ones"""
+    
+    def __init__(self, get_library, kind, filepath, reader):
+        super().__init__(filepath, reader)
+        self.get_library = get_library
+        self.kind = kind
+        self._versions = {}
+    
+    def has(self, name):
+        """Check whether the named preset is the bundled one or exists in the library"""
+        
+        return name == BUNDLED_PRESET or bool(name and self.get_library().get_versions(self.kind, name))
+    
+    def get(self, name):
+        """Latest version of the named preset, parsed again only when a new version was saved"""
+        
+        versions = []
+        if name and name != BUNDLED_PRESET:
+            versions = self.get_library().get_versions(self.kind, name)
+        if not versions:
+            return self.data
+        
+        version_hash = versions[-1]['HASH']
+        cached = self._versions.get(name)
+        if cached is None or cached[0] != version_hash:
+            cached = self._versions[name] = (version_hash, self.get_library().load_version(version_hash))
+        
+        return cached[1]
+    
+    def invalidate(self):
+        super().invalidate()
+        self._versions.clear()
\ No newline at end of file
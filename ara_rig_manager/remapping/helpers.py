@@ -0,0 +1,309 @@
+"""Bone name remapping helper functions
+
+Remap rules translate bone names stored in a preset into the bone names of
+the rig the preset is applied to. Rules are compiled once per rule set and
+the preset's bone names are resolved in one pass into a name table, cached
+per rig fingerprint, so applying a preset only costs one dictionary lookup
+per bone. Mirror tables pair every
+sided bone with its opposite side bone, to symmetrize groups and sets.
+"""
+
+# Import standard library
+import re
+
+# Local imports
+from ..fingerprint import hash_data
+from ..instrumentation import count, timed_phase
+
+#----------------------------------------------------------------#
+#------------------------- CONSTANTS ----------------------------#
+#----------------------------------------------------------------#
+
+SIDE_SUFFIX = re.compile(r"^(.*[._\- ])([LlRr])(\.\d+)?$")
+SIDE_PREFIX = re.compile(r"^([LlRr])([._\- ].*)$")
+SIDE_WORD = re.compile(r"Left|Right|left|right|LEFT|RIGHT")
+SIDE_FLIPS = {
+    "L": "R", "R": "L", "l": "r", "r": "l",
+    "Left": "Right", "Right": "Left", "left": "right", "right": "left", "LEFT": "RIGHT", "RIGHT": "LEFT"
+}
+
+MAX_CACHED_TABLES = 64
+
+# (rules hash, rig fingerprint, preset bone names) -> RemapTable
+_remap_tables = {}
+
+# rig fingerprint -> {bone name: opposite side bone name}
+_mirror_tables = {}
+
+#----------------------------------------------------------------#
+#-------------------------- RULES -------------------------------#
+#----------------------------------------------------------------#
+
+def flip_side_name(name):
+    """Swap the side of a bone name the way Blender's X-mirror does (.L <-> .R, Left <-> Right)"""
+    
+    match = SIDE_SUFFIX.match(name)
+    if match:
+        return match.group(1) + SIDE_FLIPS[match.group(2)] + (match.group(3) or "")
+    
+    match = SIDE_PREFIX.match(name)
+    if match:
+        return SIDE_FLIPS[match.group(1)] + match.group(2)
+    
+    return SIDE_WORD.sub(lambda word: SIDE_FLIPS[word.group(0)], name, count=1)
+
+
+def is_valid_pattern(pattern):
+    """Check whether a regex rule's pattern compiles"""
+    
+    try:
+        re.compile(pattern)
+    except re.error:
+        return False
+    
+    return True
+
+
+def is_valid_rule(rule_type, source, target):
+    """Check whether a rule compiles, a regex rule's replacement included"""
+    
+    try:
+        compile_rule(rule_type, source, target)
+    except (re.error, IndexError):
+        return False
+    
+    return True
+
+
+def compile_rule(rule_type, source, target):
+    """Compile one rule into a function returning the renamed bone, or None when it does not apply"""
+    
+    if rule_type == 'PREFIX':
+        def apply(name):
+            return target + name[len(source):] if name.startswith(source) else None
+    elif rule_type == 'SUFFIX':
+        def apply(name):
+            if not name.endswith(source):
+                return None
+            return name[:len(name) - len(source)] + target if source else name + target
+    elif rule_type == 'REGEX':
+        pattern = re.compile(source)
+        # Parse the replacement now, so a bad group reference fails here rather than while applying
+        pattern.sub(target, "")
+        
+        def apply(name):
+            renamed, substitutions = pattern.subn(target, name)
+            return renamed if substitutions else None
+    elif rule_type == 'MIRROR':
+        def apply(name):
+            flipped = flip_side_name(name)
+            return flipped if flipped != name else None
+    else:
+        raise ValueError("Unknown remap rule type %r" % rule_type)
+    
+    return apply
+
+
+class BoneNameRemap:
+    """Compiled remap rules
+    
+    Rules are applied in order, each one working on the output of the previous
+    one. The first name that exists on the rig wins, an exact match always
+    comes first.
+    """
+    
+    def __init__(self, rules):
+        self.rules = [tuple(rule) for rule in rules]
+        self.key = hash_data(self.rules)
+        self.functions = [compile_rule(*rule) for rule in self.rules]
+    
+    def resolve(self, name, bone_names):
+        """Rig bone name for a preset bone name, None when no rule leads to an existing bone"""
+        
+        if name in bone_names:
+            return name
+        
+        for function in self.functions:
+            renamed = function(name)
+            if renamed is None:
+                continue
+            if renamed in bone_names:
+                return renamed
+            name = renamed
+        
+        return None
+    
+    def get_table(self, fingerprint, bone_names, preset_bone_names):
+        """Cached name table of a preset's bone names for the rig with this fingerprint"""
+        
+        preset_bone_names = frozenset(preset_bone_names)
+        key = (self.key, fingerprint, preset_bone_names)
+        table = _remap_tables.get(key)
+        if table is None:
+            if len(_remap_tables) >= MAX_CACHED_TABLES:
+                _remap_tables.clear()
+            table = _remap_tables[key] = RemapTable(self, bone_names, preset_bone_names)
+        
+        return table
+
+
+class RemapTable:
+    """Preset bone name -> rig bone name lookup of one rule set on one rig
+    
+    Every preset bone name is resolved once when the table is built, mapping
+    is then a dictionary lookup per bone.
+    """
+    
+    def __init__(self, remap, bone_names, preset_bone_names):
+        names = {}
+        for name in preset_bone_names:
+            renamed = remap.resolve(name, bone_names)
+            if renamed is not None:
+                names[name] = renamed
+        self.names = names
+    
+    def map_bones(self, bones):
+        """Map a list of the preset's bone names, dropping names without a rig bone"""
+        
+        names = self.names
+        
+        return [names[bone] for bone in bones if bone in names]
+
+
+def get_preset_bone_names(data):
+    """Every bone name of bone groups or selection sets data"""
+    
+    return frozenset(bone for value in data.values() for bone in (value['BONES'] if isinstance(value, dict) else value))
+
+
+def clear_remap_tables():
+    """Forget every cached remap and mirror table"""
+    
+    _remap_tables.clear()
+    _mirror_tables.clear()
+
+#----------------------------------------------------------------#
+#-------------------------- SYMMETRY ----------------------------#
+#----------------------------------------------------------------#
+
+def get_mirror_table(fingerprint, bone_names):
+    """Bone name -> opposite side bone name of every bone whose mirror exists on the rig
+    
+    Built in one pass over the rig's bone names and cached per rig fingerprint.
+    """
+    
+    table = _mirror_tables.get(fingerprint)
+    if table is None:
+        if len(_mirror_tables) >= MAX_CACHED_TABLES:
+            _mirror_tables.clear()
+        table = _mirror_tables[fingerprint] = {}
+        for bone in bone_names:
+            mirrored = flip_side_name(bone)
+            if mirrored != bone and mirrored in bone_names:
+                table[bone] = mirrored
+    
+    return table
+
+
+@timed_phase("Symmetrizing bone groups")
+def symmetrize_bone_groups(bone_groups, mirror_table):
+    """Copy of bone groups data completed with the opposite side of every grouped bone
+    
+    A bone's mirror joins the mirrored group, the group with the opposite side
+    name, which is created with the same colors when missing. Groups without a
+    side in their name take the mirrors of their own bones. Bones that already
+    have a group keep it.
+    """
+    
+    symmetric = {bone_group: dict(data, BONES=list(data['BONES'])) for bone_group, data in bone_groups.items()}
+    grouped_bones = {bone for data in bone_groups.values() for bone in data['BONES']}
+    added = 0
+    
+    for bone_group, data in bone_groups.items():
+        mirrored_group = flip_side_name(bone_group)
+        for bone in data['BONES']:
+            mirrored = mirror_table.get(bone)
+            if mirrored is None or mirrored in grouped_bones:
+                continue
+            if mirrored_group not in symmetric:
+                symmetric[mirrored_group] = dict(data, BONES=[])
+            symmetric[mirrored_group]['BONES'].append(mirrored)
+            grouped_bones.add(mirrored)
+            added += 1
+    
+    count(bones=added)
+    
+    return symmetric
+
+
+@timed_phase("Symmetrizing selection sets")
+def symmetrize_selection_sets(selection_sets, mirror_table):
+    """Copy of selection sets data completed with the opposite side of every bone
+    
+    A bone's mirror joins the mirrored set, the set with the opposite side
+    name, which is created when missing. Sets without a side in their name
+    take the mirrors of their own bones.
+    """
+    
+    symmetric = {selection_set: list(bones) for selection_set, bones in selection_sets.items()}
+    members = {selection_set: set(bones) for selection_set, bones in selection_sets.items()}
+    added = 0
+    
+    for selection_set, bones in selection_sets.items():
+        mirrored_set = flip_side_name(selection_set)
+        for bone in bones:
+            mirrored = mirror_table.get(bone)
+            if mirrored is None or mirrored in members.get(mirrored_set, ()):
+                continue
+            symmetric.setdefault(mirrored_set, []).append(mirrored)
+            members.setdefault(mirrored_set, set()).add(mirrored)
+            added += 1
+    
+    count(bones=added)
+    
+    return symmetric
+
+#----------------------------------------------------------------#
+#----------------------- REMAP PRESETS --------------------------#
+#----------------------------------------------------------------#
+
+@timed_phase("Remapping bone group names")
+def remap_bone_groups(bone_groups, table):
+    """Copy of bone groups data with bone names translated through a remap table"""
+    
+    remapped = {}
+    for bone_group, data in bone_groups.items():
+        remapped[bone_group] = dict(data)
+        remapped[bone_group]['BONES'] = table.map_bones(data['BONES'])
+        count(bones=len(data['BONES']))
+    
+    return remapped
+
+
+@timed_phase("Remapping selection set names")
+def remap_selection_sets(selection_sets, table):
+    """Copy of selection sets data with bone names translated through a remap table"""
+    
+    remapped = {}
+    for selection_set, bones in selection_sets.items():
+        remapped[selection_set] = table.map_bones(bones)
+        count(bones=len(bones))
+    
+    return remapped
+
+
+def get_scene_remap(scene):
+    """Compile the scene's enabled remap rules, None when remapping is off"""
+    
+    settings = scene.ara_remap
+    if not settings.enabled:
+        return None
+    
+    # A rule without a source would match every bone, as a newly added rule does
+    rules = [(rule.rule_type, rule.source, rule.target) for rule in settings.rules
+             if rule.enabled and (rule.source or rule.rule_type == 'MIRROR')
+             and is_valid_rule(rule.rule_type, rule.source, rule.target)]
+    if not rules:
+        return None
+    
+    return BoneNameRemap(rules)
\ No newline at end of file
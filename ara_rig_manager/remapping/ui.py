@@ -0,0 +1,164 @@
+"""Bone Name Remapping UI"""
+
+# Import Blender Python API
+import bpy
+from bpy.props import BoolProperty, CollectionProperty, EnumProperty, IntProperty, PointerProperty, StringProperty
+from bpy.types import Operator, Panel, PropertyGroup, UIList
+
+# Local imports
+from .helpers import *
+from ..ui import ARAPanel
+
+#----------------------------------------------------------------#
+#--------------------- REMAPPING PROPERTIES ---------------------#
+#----------------------------------------------------------------#
+
+class ARA_RemapRule(PropertyGroup):
+    """Bone name remap rule"""
+    
+    enabled: BoolProperty(
+        name="Enabled",
+        description="Use this rule when remapping bone names",
+        default=True
+    )
+    
+    rule_type: EnumProperty(
+        name="Type",
+        description="How the rule renames bones",
+        items=(
+            ('PREFIX', "Prefix", "Replace a name prefix, e.g. DEF- -> ORG-"),
+            ('SUFFIX', "Suffix", "Replace a name suffix, e.g. .L -> _L"),
+            ('REGEX', "Regex", "Substitute a regular expression"),
+            ('MIRROR', "Mirror", "Swap the side of the name, e.g. .L <-> .R")
+        ),
+        default='PREFIX'
+    )
+    
+    source: StringProperty(
+        name="From",
+        description="Prefix, suffix or pattern found in the preset's bone names"
+    )
+    
+    target: StringProperty(
+        name="To",
+        description="Replacement used for the rig's bone names"
+    )
+
+
+class ARA_RemapSettings(PropertyGroup):
+    """Bone name remapping settings"""
+    
+    enabled: BoolProperty(
+        name="Remap Bone Names",
+        description="Translate preset bone names with the rules below when setting and importing",
+        default=False
+    )
+    
+    rules: CollectionProperty(type=ARA_RemapRule)
+    
+    active_rule: IntProperty()
+
+#----------------------------------------------------------------#
+#------------------------- OPERATORS ----------------------------#
+#----------------------------------------------------------------#
+
+class ARA_OT_AddRemapRule(Operator):
+    """Add a bone name remap rule"""
+    
+    bl_idname = "ara.add_remap_rule"
+    bl_label = "Add Remap Rule"
+    
+    def execute(self, context):
+        settings = context.scene.ara_remap
+        
+        settings.rules.add()
+        settings.active_rule = len(settings.rules) - 1
+        
+        return {'FINISHED'}
+
+
+class ARA_OT_RemoveRemapRule(Operator):
+    """Remove the active bone name remap rule"""
+    
+    bl_idname = "ara.remove_remap_rule"
+    bl_label = "Remove Remap Rule"
+    
+    @classmethod
+    def poll(cls, context):
+        return len(context.scene.ara_remap.rules) > 0
+    
+    def execute(self, context):
+        settings = context.scene.ara_remap
+        
+        settings.rules.remove(settings.active_rule)
+        settings.active_rule = min(settings.active_rule, len(settings.rules) - 1)
+        
+        return {'FINISHED'}
+
+#----------------------------------------------------------------#
+#-------------------------- PANELS ------------------------------#
+#----------------------------------------------------------------#
+
+class ARA_UL_RemapRules(UIList):
+    """Bone name remap rules list"""
+    
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.prop(item, "enabled", text="")
+        row.prop(item, "rule_type", text="")
+        if item.rule_type != 'MIRROR':
+            row.prop(item, "source", text="")
+            row.prop(item, "target", text="")
+            if item.rule_type == 'REGEX' and not is_valid_rule(item.rule_type, item.source, item.target):
+                row.label(text="", icon='ERROR')
+
+
+class ARA_PT_RemapRules(Panel, ARAPanel):
+    """Bone Name Remapping UI Panel"""
+    
+    bl_label = "Bone Name Remapping"
+    bl_parent_id = "ARA_PT_MenuMain"
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    def draw_header(self, context):
+        self.layout.prop(context.scene.ara_remap, "enabled", text="")
+    
+    def draw(self, context):
+        layout = self.layout
+        settings = context.scene.ara_remap
+        
+        layout.active = settings.enabled
+        
+        row = layout.row()
+        row.template_list("ARA_UL_RemapRules", "", settings, "rules", settings, "active_rule", rows=3)
+        
+        col = row.column(align=True)
+        col.operator(ARA_OT_AddRemapRule.bl_idname, icon='ADD', text="")
+        col.operator(ARA_OT_RemoveRemapRule.bl_idname, icon='REMOVE', text="")
+
+#----------------------------------------------------------------#
+#---------------------- CLASS REGISTRATION ----------------------#
+#----------------------------------------------------------------#
+
+classes = [
+    ARA_RemapRule,
+    ARA_RemapSettings,
+    ARA_OT_AddRemapRule,
+    ARA_OT_RemoveRemapRule,
+    ARA_UL_RemapRules,
+    ARA_PT_RemapRules
+]
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    
+    bpy.types.Scene.ara_remap = PointerProperty(type=ARA_RemapSettings)
+
+
+def unregister():
+    for cls in classes:
+        bpy.utils.unregister_class(cls)
+    
+    del bpy.types.Scene.ara_remap
\ No newline at end of file
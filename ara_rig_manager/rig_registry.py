@@ -0,0 +1,241 @@
+"""Registry of the rigs in the open file
+
+Every armature object is indexed once with its armature data, library and
+override status, and the scenes and collections it is in, so operators look
+their target rigs up instead of scanning the file's data on every call. Rigs
+are keyed by object name, never by armature data name. The registry is
+rebuilt lazily: file load, undo and redo forget it, a depsgraph handler forgets
+it when rigs or their armature data are renamed, relinked or given other
+armature data, and a changed object count or backend, or a looked up name no
+longer naming a rig, is noticed on lookup.
+"""
+
+# Local imports
+from .backend import get_backend
+from .instrumentation import timed_phase
+
+#----------------------------------------------------------------#
+#-------------------------- REGISTRY ----------------------------#
+#----------------------------------------------------------------#
+
+class RigEntry:
+    """Armature object of a rig and what its targets are filtered by"""
+    
+    def __init__(self, rig_object):
+        self.name = rig_object.name
+        self.armature = rig_object.data.name
+        self.library = rig_object.library.filepath if rig_object.library is not None else None
+        self.is_override = getattr(rig_object, "override_library", None) is not None
+        self.is_metarig = "meta" in self.armature
+        self.scenes = set()
+        self.collections = set()
+
+
+class RigRegistry:
+    """Rig entries of the backend's objects, with cached target lists"""
+    
+    def __init__(self):
+        self.backend = None
+        self.entries = None
+        self.armatures = {}
+        self.object_count = 0
+        self.scene_counts = {}
+        self.queries = {}
+    
+    def invalidate(self):
+        self.entries = None
+        self.armatures = {}
+        self.scene_counts = {}
+        self.queries = {}
+    
+    @timed_phase("Indexing rigs")
+    def build(self, backend):
+        """Index every armature object, a local rig taking the name over a linked one"""
+        
+        objects = backend.objects
+        entries = {}
+        
+        for rig_object in objects:
+            if rig_object.type != 'ARMATURE':
+                continue
+            existing = entries.get(rig_object.name)
+            if existing is not None and existing.library is None:
+                continue
+            entries[rig_object.name] = RigEntry(rig_object)
+        
+        for scene in backend.scenes:
+            scene_objects = scene.objects
+            self.scene_counts[scene.name] = len(scene_objects)
+            for rig_object in scene_objects:
+                entry = entries.get(rig_object.name)
+                if entry is not None:
+                    entry.scenes.add(scene.name)
+        
+        for collection in backend.collections:
+            for rig_object in collection.all_objects:
+                entry = entries.get(rig_object.name)
+                if entry is not None:
+                    entry.collections.add(collection.name)
+        
+        for entry in entries.values():
+            self.armatures.setdefault(entry.armature, []).append(entry.name)
+        
+        self.backend = backend
+        self.entries = entries
+        self.object_count = len(objects)
+    
+    def get_entries(self):
+        """Name -> RigEntry of every rig, rebuilt when the registry is stale"""
+        
+        backend = get_backend()
+        if self.entries is None or self.backend is not backend or self.object_count != len(backend.objects):
+            self.invalidate()
+            self.build(backend)
+        
+        return self.entries
+    
+    def is_valid(self, rigs, armature=None):
+        """Check that every rig name still names an armature object, using armature when given
+        
+        An object count left unchanged by removing a rig and adding another
+        object would otherwise leave a dead name behind.
+        """
+        
+        objects = self.backend.objects
+        for rig in rigs:
+            rig_object = objects.get(rig)
+            if rig_object is None or rig_object.type != 'ARMATURE':
+                return False
+            if armature is not None and rig_object.data.name != armature:
+                return False
+        
+        return True
+    
+    def get_rigs(self, scene=None, collection=None, linked=False, metarigs=False):
+        """Names of the rigs in a scene and collection, linked rigs and metarigs left out unless asked for"""
+        
+        key = (scene, collection, linked, metarigs)
+        rigs = self.query(key)
+        if not self.is_valid(rigs):
+            self.invalidate()
+            rigs = self.query(key)
+        
+        return list(rigs)
+    
+    def query(self, key):
+        """Cached names of the rigs a get_rigs key filters in"""
+        
+        entries = self.get_entries()
+        rigs = self.queries.get(key)
+        
+        if rigs is None:
+            scene, collection, linked, metarigs = key
+            rigs = self.queries[key] = [
+                entry.name for entry in entries.values()
+                if (linked or entry.library is None) and (metarigs or not entry.is_metarig)
+                and (scene is None or scene in entry.scenes)
+                and (collection is None or collection in entry.collections)
+            ]
+        
+        return rigs
+    
+    def get_armature_rigs(self, armature):
+        """Names of the rigs using an armature data block, rebuilding once when it is unknown or stale
+        
+        A renamed armature data block is missing until the registry is rebuilt.
+        """
+        
+        entries = self.entries
+        self.get_entries()
+        rigs = self.armatures.get(armature)
+        
+        if (rigs is None and self.entries is entries) or (rigs is not None and not self.is_valid(rigs, armature)):
+            self.invalidate()
+            self.get_entries()
+            rigs = self.armatures.get(armature)
+        
+        return list(rigs or ())
+
+_registry = RigRegistry()
+
+
+def get_rig_registry():
+    return _registry
+
+
+def get_registered_rigs(scene=None, collection=None, linked=False, metarigs=False):
+    """Names of the registered rigs, see RigRegistry.get_rigs"""
+    
+    return _registry.get_rigs(scene, collection, linked, metarigs)
+
+
+def get_armature_rigs(armature):
+    """Names of the rigs using an armature data block"""
+    
+    return _registry.get_armature_rigs(armature)
+
+
+def invalidate_rig_registry(*args):
+    _registry.invalidate()
+
+#----------------------------------------------------------------#
+#-------------------------- HANDLERS ----------------------------#
+#----------------------------------------------------------------#
+
+def on_depsgraph_update(scene, depsgraph):
+    """Forget the registry when a rig or its armature data was renamed, a rig got other data, or objects were relinked"""
+    
+    from bpy.types import Armature, Collection, Object, Scene
+    
+    entries = _registry.entries
+    if entries is None:
+        return
+    
+    for update in depsgraph.updates:
+        id_data = update.id
+        if isinstance(id_data, Object):
+            if id_data.type != 'ARMATURE':
+                continue
+            entry = entries.get(id_data.name)
+            stale = entry is None or entry.armature != id_data.data.name
+        elif isinstance(id_data, Armature):
+            stale = id_data.name not in _registry.armatures
+        elif isinstance(id_data, Scene):
+            stale = _registry.scene_counts.get(id_data.name) != len(id_data.objects)
+        else:
+            stale = isinstance(id_data, Collection)
+        if stale:
+            _registry.invalidate()
+            return
+
+#----------------------------------------------------------------#
+#---------------------- CLASS REGISTRATION ----------------------#
+#----------------------------------------------------------------#
+
+# Handlers are only added inside Blender, so the registry itself imports without bpy
+def get_handlers():
+    import bpy
+    
+    handlers = bpy.app.handlers
+    
+    return [
+        (handlers.depsgraph_update_post, on_depsgraph_update),
+        (handlers.load_post, invalidate_rig_registry),
+        (handlers.undo_post, invalidate_rig_registry),
+        (handlers.redo_post, invalidate_rig_registry)
+    ]
+
+
+def register():
+    from bpy.app.handlers import persistent
+    
+    for handler_list, handler in get_handlers():
+        handler_list.append(persistent(handler))
+
+
+def unregister():
+    for handler_list, handler in get_handlers():
+        if handler in handler_list:
+            handler_list.remove(handler)
+    
+    _registry.invalidate()
\ No newline at end of file
@@ -0,0 +1 @@
+from . import helpers
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""Scene presets helper functions
+
+The preset picked in a panel is copied into the scene, so it is saved with the
+file and Set works on machines without the user's preset library. The layout
+follows the binary preset format: each bone name is stored once in a names
+table, and every group or set keeps its members as a packed array of indices
+into that table. Colors are packed as doubles too, so a stored preset reads
+back exactly like its preset file.
+
+Stored presets are decoded once into the usual name keyed data and cached in
+memory per scene. The cache is rebuilt when a file is loaded.
+"""
+
+# Import standard library
+import base64
+import sys
+from array import array
+
+# Local imports
+from ..backend import get_backend
+from ..fingerprint import hash_data
+from ..preset_format import COLOR_KEYS, KIND_BONE_GROUPS, KIND_SELECTION_SETS
+
+#----------------------------------------------------------------#
+#------------------------- CONSTANTS ----------------------------#
+#----------------------------------------------------------------#
+
+KIND_ATTRIBUTES = {KIND_BONE_GROUPS: "bone_groups", KIND_SELECTION_SETS: "selection_sets"}
+
+#----------------------------------------------------------------#
+#------------------------- PACKED ARRAYS ------------------------#
+#----------------------------------------------------------------#
+
+def pack_array(typecode, values):
+    """Little-endian array as ASCII, string properties cannot hold NUL bytes"""
+    
+    packed = array(typecode, values)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    
+    return base64.b64encode(packed.tobytes()).decode('ascii')
+
+
+def unpack_array(typecode, packed):
+    values = array(typecode, base64.b64decode(packed))
+    if sys.byteorder != 'little':
+        values.byteswap()
+    
+    return values
+
+#----------------------------------------------------------------#
+#------------------------ STORED PRESETS ------------------------#
+#----------------------------------------------------------------#
+
+# Stored preset pointer to (version, data), and preset store of each kind
+_cache = {}
+_stores = {}
+
+
+def get_stored_preset(scene, kind):
+    return getattr(scene.ara_scene_presets, KIND_ATTRIBUTES[kind])
+
+
+def write_stored_preset(stored, kind, data, source):
+    """Copy data into a stored preset, rewriting it only when the content changed"""
+    
+    stored.source = source
+    
+    version = hash_data(data)
+    if stored.version == version:
+        return False
+    
+    stored.entries.clear()
+    stored.bone_names.clear()
+    
+    names = {}
+    for name, value in data.items():
+        bones = value['BONES'] if kind == KIND_BONE_GROUPS else value
+        
+        entry = stored.entries.add()
+        entry.name = name
+        entry.members = pack_array('I', [names.setdefault(bone, len(names)) for bone in bones])
+        if kind == KIND_BONE_GROUPS:
+            entry.mode = value['MODE']
+            entry.colors = pack_array('d', [component for key in COLOR_KEYS for component in value[key]])
+    
+    for bone in names:
+        stored.bone_names.add().name = bone
+    
+    stored.version = version
+    
+    return True
+
+
+def read_stored_preset(stored, kind):
+    """Data of a stored preset, decoded once per stored version"""
+    
+    key = stored.as_pointer()
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == stored.version:
+        return cached[1]
+    
+    bone_names = [bone_name.name for bone_name in stored.bone_names]
+    
+    data = {}
+    for entry in stored.entries:
+        bones = [bone_names[member] for member in unpack_array('I', entry.members)]
+        if kind == KIND_BONE_GROUPS:
+            colors = unpack_array('d', entry.colors)
+            data[entry.name] = {
+                'MODE': entry.mode,
+                'NORMAL': tuple(colors[0:3]),
+                'SELECT': tuple(colors[3:6]),
+                'ACTIVE': tuple(colors[6:9]),
+                'BONES': bones
+            }
+        else:
+            data[entry.name] = bones
+    
+    _cache[key] = (stored.version, data)
+    
+    return data
+
+
+def get_scene_preset(scene, kind, name):
+    """Preset named name, from the scene when it is stored there, else from its preset store
+    
+    The stored copy is also used when name cannot be resolved, as on a render
+    farm without the library, where the saved preset enum reads back empty.
+    """
+    
+    stored = get_stored_preset(scene, kind)
+    if stored.version and (stored.source == name or not _stores[kind].has(name)):
+        return read_stored_preset(stored, kind)
+    
+    return _stores[kind].get(name)
+
+
+def store_scene_preset(scene, kind, name):
+    """Copy the named preset into the scene"""
+    
+    return write_stored_preset(get_stored_preset(scene, kind), kind, _stores[kind].get(name), name)
+
+
+def scene_preset_property(store, get_name):
+    """Read-only attribute exposing the preset the scene selected
+    
+    Registers store as the source store_scene_preset copies presets of its kind from.
+    """
+    
+    _stores[store.kind] = store
+    
+    return property(lambda scene: get_scene_preset(scene, store.kind, get_name(scene)))
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def rebuild_cache():
+    """Read every scene's stored presets again, pointers from the previous file are stale"""
+    
+    clear_cache()
+    
+    for scene in get_backend().scenes:
+        for kind in KIND_ATTRIBUTES:
+            stored = get_stored_preset(scene, kind)
+            if stored.version:
+                read_stored_preset(stored, kind)
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""Scene Presets UI
+
+Property groups holding the presets stored in a scene, and the handler that
+decodes them again when a file is loaded.
+"""
+
+# Import Blender Python API
+import bpy
+from bpy.app.handlers import persistent
+from bpy.props import CollectionProperty, PointerProperty, StringProperty
+from bpy.types import PropertyGroup
+
+# Local imports
+from .helpers import *
+
+#----------------------------------------------------------------#
+#------------------------- PROPERTIES ---------------------------#
+#----------------------------------------------------------------#
+
+class ARA_StoredName(PropertyGroup):
+    """Bone name in a stored preset's names table"""
+
+
+class ARA_StoredEntry(PropertyGroup):
+    """Bone group or selection set of a stored preset, mode and colors are only used by bone groups"""
+    
+    members: StringProperty(
+        name="Members",
+        description="Packed indices of the member bones in the names table",
+        options={'HIDDEN'}
+    )
+    
+    mode: StringProperty(
+        name="Color Set",
+        options={'HIDDEN'}
+    )
+    
+    colors: StringProperty(
+        name="Colors",
+        description="Packed normal, select and active HSV colors, as doubles like in preset files",
+        options={'HIDDEN'}
+    )
+
+
+class ARA_StoredPreset(PropertyGroup):
+    """Preset copied into the scene"""
+    
+    source: StringProperty(
+        name="Source",
+        description="Preset the stored data was copied from"
+    )
+    
+    version: StringProperty(
+        name="Version",
+        description="Content hash of the stored data, empty when nothing is stored"
+    )
+    
+    bone_names: CollectionProperty(type=ARA_StoredName)
+    entries: CollectionProperty(type=ARA_StoredEntry)
+
+
+class ARA_ScenePresets(PropertyGroup):
+    """Bone groups and selection sets presets stored in the scene"""
+    
+    bone_groups: PointerProperty(type=ARA_StoredPreset)
+    selection_sets: PointerProperty(type=ARA_StoredPreset)
+
+#----------------------------------------------------------------#
+#-------------------------- HANDLERS ----------------------------#
+#----------------------------------------------------------------#
+
+@persistent
+def on_load_post(*args):
+    rebuild_cache()
+
+#----------------------------------------------------------------#
+#---------------------- CLASS REGISTRATION ----------------------#
+#----------------------------------------------------------------#
+
+classes = [
+    ARA_StoredName,
+    ARA_StoredEntry,
+    ARA_StoredPreset,
+    ARA_ScenePresets
+]
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    
+    bpy.types.Scene.ara_scene_presets = PointerProperty(type=ARA_ScenePresets)
+    
+    bpy.app.handlers.load_post.append(on_load_post)
+
+
+def unregister():
+    bpy.app.handlers.load_post.remove(on_load_post)
+    clear_cache()
+    
+    del bpy.types.Scene.ara_scene_presets
+    
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
\ No newline at end of file
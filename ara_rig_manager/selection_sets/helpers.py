@@ -1,50 +1,63 @@
 """Selection Sets helper functions"""
 
-# Import Blender Python API
-import bpy
-
 # Import standard library
-import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Local imports
+from ..backend import get_backend
+from ..fingerprint import SELECTION_SETS_HASH_KEY, find_matching_rigs, get_selection_sets_hash, index_rig
+from ..instrumentation import count, phase, timed_phase
+from ..preset_format import KIND_SELECTION_SETS, iter_preset, read_preset, read_preset_bone_names, write_preset
+from ..preset_library import get_preset_library
+from ..presets import LibraryPresetStore
+from ..remapping.helpers import get_mirror_table, get_preset_bone_names, symmetrize_selection_sets
+from ..rig_registry import get_registered_rigs
 
 #----------------------------------------------------------------#
 #------------------------- CONSTANTS ----------------------------#
 #----------------------------------------------------------------#
 
-BL_ADDONS_PATH = bpy.utils.user_resource("SCRIPTS") + "\\addons"
-ADDON_DATA_PATH = BL_ADDONS_PATH + "\\ara_rig_manager\\data"
-STD_SS_JSON = ADDON_DATA_PATH + "\\selection_sets.json"
+ADDON_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+STD_SS_JSON = os.path.join(ADDON_DATA_PATH, "selection_sets.json")
+
+MAX_PLANNING_WORKERS = min(8, os.cpu_count() or 1)
 
 #----------------------------------------------------------------#
 #---------------------- PROCESS RIG DATA ------------------------#
 #----------------------------------------------------------------#
 
-def get_rigs():
-    """Get all rigs present in the scene"""
-    
-    print("Finding rigs")
+@timed_phase("Finding rigs")
+def get_rigs(scene=None, collection=None):
+    """Get the rigs of the file, or of a scene or collection, from the rig registry"""
     
-    armatures = bpy.data.armatures.keys()
+    return get_registered_rigs(scene, collection)
 
-    rigs = [armature for armature in armatures if "meta" not in armature]
+
+def get_target_rigs(selection_sets, remap=None):
+    """Get rigs whose bone names overlap with the selection sets data"""
+    
+    bone_names = {bone for bones in selection_sets.values() for bone in bones}
     
-    return rigs
+    objects = get_backend().objects
+    rig_objects = [objects[rig] for rig in get_registered_rigs(metarigs=True)]
+    
+    return find_matching_rigs(rig_objects, bone_names, remap=remap)
 
 
+@timed_phase("Getting current selection sets")
 def get_selection_sets():
     """Get selection sets of selected rig"""
     
-    print("Getting current selection sets")
-    
-    selection_sets = bpy.context.object.selection_sets
+    selection_sets = get_backend().active_object.selection_sets
     
     return selection_sets
 
 
+@timed_phase("Gathering data of current selection sets")
 def get_selection_sets_data(selection_sets):
     """Get selection sets data of selected rig"""
     
-    print("Gathering data of current selection sets")
-    
     selections = {}
     
     for selection_set in selection_sets:
@@ -54,79 +67,468 @@ def get_selection_sets_data(selection_sets):
             bones.append(bone.name)
         selections[ss_name] = bones
     
+    count(sets=len(selections))
+    
+    return selections
+
+
+def get_rigs_selection_sets_data(rigs):
+    """Get selection sets data of all rigs, merging the bones of sets found on several rigs"""
+    
+    objects = get_backend().objects
+    selections = {}
+    
+    for rig in rigs:
+        merge_selection_sets_data(selections, get_selection_sets_data(objects[rig].selection_sets))
+    
     return selections
 
 
-def remove_selection_sets():
-    """Remove present selection sets"""
+def merge_selection_sets_data(selections, rig_selections):
+    """Merge one rig's selection sets data into selections, appending bones not there yet"""
     
-    print("Removing current selection sets from the rig")
+    for ss_name, bones in rig_selections.items():
+        merged = selections.setdefault(ss_name, [])
+        merged.extend(bone for bone in bones if bone not in merged)
+
+
+@timed_phase("Removing current selection sets from the rigs")
+def remove_selection_sets(rigs=None):
+    """Remove present selection sets, from the active object without rigs"""
     
-    selection_sets = get_selection_sets()
+    rig_objects = [get_backend().objects[rig] for rig in rigs] if rigs is not None else [get_backend().active_object]
     
-    while len(selection_sets) != 0:
-        bpy.ops.pose.selection_set_remove()
+    for rig_object in rig_objects:
+        count(sets=len(rig_object.selection_sets))
+        rig_object.selection_sets.clear()
+        rig_object.active_selection_set = 0
 
 
-def create_selection_sets(selection_sets):
-    """Create selection sets with presented data"""
+@timed_phase("Creating selection sets for the rigs")
+def create_selection_sets(selection_sets, rigs=None):
+    """Create selection sets with presented data on every rig"""
     
-    print("Creating selection sets for the rig")
+    if rigs is None:
+        rigs = get_rigs()
     
-    rig = get_rigs()
-    curr_bones = bpy.data.objects[rig[0]].pose.bones.keys()
+    for rig in rigs:
+        rig_object = get_backend().objects[rig]
+        rebuild_selection_sets(rig_object, selection_sets, set(rig_object.pose.bones.keys()))
+
+
+def rebuild_selection_sets(rig_object, selection_sets, curr_bones):
+    """Rebuild the object's selection sets directly from the presented data"""
     
-    for index, selection_set in enumerate(selection_sets):
-        bpy.ops.pose.selection_set_add()
-        bpy.context.object.active_selection_set = index
-        bpy.context.object.selection_sets[index].name = selection_set
-        
+    object_selection_sets = rig_object.selection_sets
+    object_selection_sets.clear()
+    
+    added_bones = 0
+    for selection_set in selection_sets:
+        object_selection_set = object_selection_sets.add()
+        object_selection_set.name = selection_set
+        bone_ids = object_selection_set.bone_ids
         for bone in selection_sets[selection_set]:
             if bone in curr_bones:
-                selected_bone = bpy.data.objects[bpy.context.object.name].pose.bones[bone].bone
-                bpy.context.object.data.bones.active = selected_bone
-                selected_bone.select = True
-        
-        bpy.ops.pose.selection_set_assign()
-        bpy.ops.pose.selection_set_select()
-        bpy.ops.pose.selection_set_deselect()
+                bone_ids.add().name = bone
+                added_bones += 1
+    
+    rig_object.active_selection_set = 0
+    count(sets=len(selection_sets), bones=added_bones)
+
+#----------------------------------------------------------------#
+#------------------------ PATCH PLANNING ------------------------#
+#----------------------------------------------------------------#
+
+class RigSelectionSets:
+    """Plain Python copy of a rig's bone index and selection sets, safe to read off the main thread"""
+    
+    def __init__(self, rig_object):
+        self.name = rig_object.name
+        self.fingerprint, self.bone_names = index_rig(rig_object)
+        self.selection_sets = [(object_selection_set.name,
+                                [bone_id.name for bone_id in object_selection_set.bone_ids])
+                               for object_selection_set in rig_object.selection_sets]
+
+
+class SelectionSetsPatch:
+    """Writes needed to bring one rig's selection sets to the presented data"""
+    
+    def __init__(self, rig, selection_sets_hash):
+        self.rig = rig
+        self.selection_sets_hash = selection_sets_hash
+        self.skipped = False
+        # (name, bones) of sets to append, (index, bones) of sets to refill
+        self.added = []
+        self.changed = []
+        # Indices of stale and duplicate sets, in ascending order
+        self.removed = []
+
+
+def plan_selection_sets_patch(rig_selection_sets, selection_sets, remap=None, preset_bone_names=None):
+    """Diff a rig's captured selection sets against the data, without touching bpy
+    
+    With a remap, the data's bone names, preset_bone_names, are translated to
+    the rig's bone names first. Runs on planning worker threads, so it must not
+    record phases.
+    """
+    
+    bone_names = rig_selection_sets.bone_names
+    if remap is not None:
+        table = remap.get_table(rig_selection_sets.fingerprint, bone_names, preset_bone_names)
+        wanted = {selection_set: table.map_bones(bones) for selection_set, bones in selection_sets.items()}
+    else:
+        wanted = {selection_set: [bone for bone in bones if bone in bone_names]
+                  for selection_set, bones in selection_sets.items()}
+    
+    current = rig_selection_sets.selection_sets
+    patch = SelectionSetsPatch(rig_selection_sets.name, get_selection_sets_hash(wanted, bone_names))
+    
+    existing = {}
+    for index, (name, bones) in enumerate(current):
+        if name in wanted and name not in existing:
+            existing[name] = index
+        else:
+            patch.removed.append(index)
+    
+    for selection_set, bones in wanted.items():
+        index = existing.get(selection_set)
+        if index is None:
+            patch.added.append((selection_set, bones))
+        elif current[index][1] != bones:
+            patch.changed.append((index, bones))
+    
+    patch.skipped = not (patch.added or patch.changed or patch.removed)
+    
+    return patch
+
+
+@timed_phase("Planning selection set patches")
+def plan_selection_sets_patches(rig_objects, selection_sets, remap=None):
+    """Capture every rig on the main thread, then diff them in a thread pool"""
+    
+    captures = [RigSelectionSets(rig_object) for rig_object in rig_objects]
+    preset_bone_names = get_preset_bone_names(selection_sets) if remap is not None else None
+    if len(captures) < 2:
+        return [plan_selection_sets_patch(capture, selection_sets, remap, preset_bone_names) for capture in captures]
+    
+    with ThreadPoolExecutor(max_workers=min(MAX_PLANNING_WORKERS, len(captures))) as executor:
+        return list(executor.map(
+            lambda capture: plan_selection_sets_patch(capture, selection_sets, remap, preset_bone_names), captures))
+
+
+def apply_selection_sets_patch(rig_object, patch, report):
+    """Write a planned patch to the rig, keeping the set order and the active set"""
+    
+    if patch.skipped:
+        rig_object[SELECTION_SETS_HASH_KEY] = patch.selection_sets_hash
+        report['SKIPPED'] += 1
+        return
+    
+    object_selection_sets = rig_object.selection_sets
+    active_name = get_active_selection_set_name(rig_object)
+    
+    # Sets are looked up by index because adding to the collection can move its items
+    bones_written = 0
+    for index, bones in patch.changed:
+        bone_ids = object_selection_sets[index].bone_ids
+        bone_ids.clear()
+        for bone in bones:
+            bone_ids.add().name = bone
+        bones_written += len(bones)
+    
+    for selection_set, bones in patch.added:
+        object_selection_set = object_selection_sets.add()
+        object_selection_set.name = selection_set
+        bone_ids = object_selection_set.bone_ids
+        for bone in bones:
+            bone_ids.add().name = bone
+        bones_written += len(bones)
+    
+    # Added sets are appended, so the planned indices are still valid
+    for index in reversed(patch.removed):
+        object_selection_sets.remove(index)
+    
+    set_active_selection_set(rig_object, active_name)
+    rig_object[SELECTION_SETS_HASH_KEY] = patch.selection_sets_hash
+    
+    report['ADDED'] += len(patch.added)
+    report['CHANGED'] += len(patch.changed)
+    report['REMOVED'] += len(patch.removed)
+    count(sets=len(patch.added) + len(patch.changed) + len(patch.removed), bones=bones_written)
+
+#----------------------------------------------------------------#
+#------------------------ PATCH RIGS ----------------------------#
+#----------------------------------------------------------------#
+
+@timed_phase("Patching selection sets of the rigs")
+def patch_selection_sets(selection_sets, rigs=None, remap=None):
+    """Update rigs' selection sets to match presented data, touching only what differs
+    
+    Without rigs, the selection sets are applied to every rig matching their
+    bone names. Rigs whose selection sets already hash the same as the data are
+    skipped. Returns a dictionary with the number of added, changed and removed
+    selection sets and of skipped rigs.
+    """
+    
+    if rigs is None:
+        rigs = get_target_rigs(selection_sets, remap)
+    
+    return patch_rigs_selection_sets([get_backend().objects[rig] for rig in rigs], selection_sets, remap)
+
+
+def patch_rigs_selection_sets(rig_objects, selection_sets, remap=None):
+    """Plan every rig's patch in parallel, then write them on the main thread"""
+    
+    report = {'ADDED': 0, 'CHANGED': 0, 'REMOVED': 0, 'SKIPPED': 0}
+    
+    patches = plan_selection_sets_patches(rig_objects, selection_sets, remap)
+    
+    with phase("Writing selection sets"):
+        for rig_object, patch in zip(rig_objects, patches):
+            apply_selection_sets_patch(rig_object, patch, report)
+    
+    return report
+
+
+def get_selection_set_indices(object_selection_sets):
+    """Map each selection set name to the index of its first occurrence"""
+    
+    indices = {}
+    for index, object_selection_set in enumerate(object_selection_sets):
+        indices.setdefault(object_selection_set.name, index)
+    
+    return indices
+
+
+def patch_selection_set(object_selection_sets, existing, selection_set, bones, curr_bones):
+    """Add or update a single selection set, returning 'ADDED', 'CHANGED' or None
+    
+    Sets are looked up by index because adding to the collection can move its items.
+    """
+    
+    bones = [bone for bone in bones if bone in curr_bones]
+    index = existing.get(selection_set)
+    
+    if index is None:
+        existing[selection_set] = len(object_selection_sets)
+        object_selection_set = object_selection_sets.add()
+        object_selection_set.name = selection_set
+        result = 'ADDED'
+    else:
+        object_selection_set = object_selection_sets[index]
+        if [bone_id.name for bone_id in object_selection_set.bone_ids] == bones:
+            return None
+        object_selection_set.bone_ids.clear()
+        result = 'CHANGED'
+    
+    bone_ids = object_selection_set.bone_ids
+    for bone in bones:
+        bone_ids.add().name = bone
+    
+    count(sets=1, bones=len(bones))
+    
+    return result
+
+
+def remove_stale_selection_sets(object_selection_sets, selection_sets):
+    """Remove selection sets missing from selection_sets and duplicates, returning their count"""
+    
+    seen = set()
+    stale = []
+    for index, object_selection_set in enumerate(object_selection_sets):
+        name = object_selection_set.name
+        if name not in selection_sets or name in seen:
+            stale.append(index)
+        seen.add(name)
+    
+    for index in reversed(stale):
+        object_selection_sets.remove(index)
+    
+    count(sets=len(stale))
+    
+    return len(stale)
+
+
+def get_active_selection_set_name(rig_object):
+    """Name of the object's active selection set, None without one"""
+    
+    object_selection_sets = rig_object.selection_sets
+    active_index = rig_object.active_selection_set
+    if 0 <= active_index < len(object_selection_sets):
+        return object_selection_sets[active_index].name
+    
+    return None
+
+
+def set_active_selection_set(rig_object, name):
+    """Make the named selection set active, falling back to the first one"""
+    
+    active_index = rig_object.selection_sets.find(name) if name is not None else -1
+    rig_object.active_selection_set = max(active_index, 0)
+
+
+@timed_phase("Symmetrizing rigs' selection sets")
+def symmetrize_rigs_selection_sets(rigs):
+    """Add the opposite side bones of every rig's selection sets to the mirrored sets, returning the patch report"""
+    
+    objects = get_backend().objects
+    report = {'ADDED': 0, 'CHANGED': 0, 'REMOVED': 0, 'SKIPPED': 0}
+    
+    for rig in rigs:
+        rig_object = objects[rig]
+        mirror_table = get_mirror_table(*index_rig(rig_object))
+        selection_sets = symmetrize_selection_sets(get_selection_sets_data(rig_object.selection_sets), mirror_table)
+        for key, value in patch_rigs_selection_sets([rig_object], selection_sets).items():
+            report[key] += value
+    
+    return report
 
 #----------------------------------------------------------------#
 #------------------------ FILE HANDLING -------------------------#
 #----------------------------------------------------------------#
 
-def export_selection_sets(filepath):
-    """Export selection sets to a JSON file"""
+def export_selection_sets(filepath, compress=True, rigs=None):
+    """Export selection sets to a JSON file, or a binary preset for .arap paths
+    
+    Without rigs, the selection sets of the active object are exported.
+    """
     
-    selection_sets = get_selection_sets()
-    selection_sets_data = get_selection_sets_data(selection_sets)
+    if rigs is None:
+        selection_sets_data = get_selection_sets_data(get_selection_sets())
+    else:
+        selection_sets_data = get_rigs_selection_sets_data(rigs)
     
-    file = open(filepath, 'w', encoding='utf-8')
-    json.dump(selection_sets_data, file)
-    file.close()
+    with phase("Writing preset file"):
+        write_preset(filepath, selection_sets_data, compress=compress)
     
     return {'FINISHED'}
 
 
-def import_selection_sets(filepath):
-    """Import selection sets from a JSON file"""
+def import_selection_sets(filepath, rigs=None, remap=None):
+    """Import selection sets from a JSON or binary preset file and return the patch report"""
     
-    remove_selection_sets()
+    with phase("Reading preset file"):
+        imported_selection_sets = read_preset(filepath)
     
-    file = open(filepath, 'r', encoding='utf-8')
-    imported_selection_sets = json.load(file)
-    file.close()
+    return patch_selection_sets(imported_selection_sets, rigs, remap)
+
+
+@timed_phase("Planning streamed selection sets import")
+def plan_selection_sets_streaming(filepath, rigs=None, remap=None, progress=None):
+    """Rigs a streamed import patches, with the selection sets hash each of them ends up with
     
-    create_selection_sets(imported_selection_sets)
+    One streaming pass collects the preset's bone names, to match rigs against
+    them like get_target_rigs when rigs is None, and each candidate rig's share
+    of the data, so no more than what lands on the rigs is held in memory. With
+    a remap, the bone names are read in a pass of their own first, to build
+    the remap tables over. Rigs already carrying their share get their hash
+    stored and are left out. Returns the {rig: (hash, remap table)} targets and
+    the number of skipped rigs.
+    """
     
-    return {'FINISHED'}
+    objects = get_backend().objects
+    preset_bone_names = set()
+    passes = 1
+    if remap is not None:
+        passes = 2
+        preset_bone_names = read_preset_bone_names(
+            filepath, (lambda fraction: progress(fraction / passes)) if progress is not None else None)
+    
+    candidates = []
+    for rig in (rigs if rigs is not None else get_registered_rigs(metarigs=True)):
+        fingerprint, curr_bones = index_rig(objects[rig])
+        table = remap.get_table(fingerprint, curr_bones, preset_bone_names) if remap is not None else None
+        candidates.append((rig, curr_bones, table, {}))
+    
+    for selection_set, bones, fraction in iter_preset(filepath):
+        if remap is None:
+            preset_bone_names.update(bones)
+        for rig, curr_bones, table, rig_selection_sets in candidates:
+            rig_bones = table.map_bones(bones) if table is not None else bones
+            rig_selection_sets[selection_set] = [bone for bone in rig_bones if bone in curr_bones]
+        if progress is not None:
+            progress((passes - 1 + fraction) / passes)
+    
+    if rigs is None:
+        rigs = find_matching_rigs([objects[rig] for rig, *_ in candidates], preset_bone_names, remap=remap)
+    
+    targets = {}
+    skipped = 0
+    for rig, curr_bones, table, rig_selection_sets in candidates:
+        if rig not in rigs:
+            continue
+        rig_object = objects[rig]
+        selection_sets_hash = get_selection_sets_hash(rig_selection_sets, curr_bones)
+        current = get_selection_sets_data(rig_object.selection_sets)
+        if len(current) == len(rig_object.selection_sets) and \
+                get_selection_sets_hash(current, curr_bones) == selection_sets_hash:
+            rig_object[SELECTION_SETS_HASH_KEY] = selection_sets_hash
+            skipped += 1
+        else:
+            targets[rig] = (selection_sets_hash, table)
+    
+    return targets, skipped
+
+
+@timed_phase("Streaming selection sets from external file")
+def import_selection_sets_streaming(filepath, rigs=None, progress=None, remap=None):
+    """Import selection sets one set at a time while the file is read
+    
+    Without rigs, the selection sets are applied to every rig matching their
+    bone names. A first pass over the file picks the rigs that differ, see
+    plan_selection_sets_streaming, and a second one applies the sets, holding
+    only the set being applied. progress is called with the fraction of both
+    passes done so far. Returns the patch report.
+    """
+    
+    targets, skipped = plan_selection_sets_streaming(
+        filepath, rigs, remap, (lambda fraction: progress(fraction / 2)) if progress is not None else None)
+    report = {'ADDED': 0, 'CHANGED': 0, 'REMOVED': 0, 'SKIPPED': skipped}
+    
+    rig_targets = []
+    for rig, (selection_sets_hash, table) in targets.items():
+        rig_object = get_backend().objects[rig]
+        fingerprint, curr_bones = index_rig(rig_object)
+        rig_targets.append((rig_object, curr_bones, table, get_active_selection_set_name(rig_object),
+                            get_selection_set_indices(rig_object.selection_sets)))
+    
+    imported_names = set()
+    if rig_targets:
+        for selection_set, bones, fraction in iter_preset(filepath):
+            imported_names.add(selection_set)
+            for rig_object, curr_bones, table, active_name, existing in rig_targets:
+                rig_bones = table.map_bones(bones) if table is not None else bones
+                result = patch_selection_set(rig_object.selection_sets, existing, selection_set, rig_bones, curr_bones)
+                if result is not None:
+                    report[result] += 1
+            if progress is not None:
+                progress(0.5 + fraction / 2)
+    elif progress is not None:
+        progress(1.0)
+    
+    for rig_object, curr_bones, table, active_name, existing in rig_targets:
+        report['REMOVED'] += remove_stale_selection_sets(rig_object.selection_sets, imported_names)
+        set_active_selection_set(rig_object, active_name)
+        rig_object[SELECTION_SETS_HASH_KEY] = targets[rig_object.name][0]
+    
+    return report
 
 
 def read_std_selection_sets(filepath):
-    """Import standard selection sets and return a dictionary"""
+    """Import standard selection sets from a JSON or binary file and return a dictionary"""
     
-    file = open(filepath, 'r', encoding='utf-8')
-    std_selection_sets = json.load(file)
-    file.close()
+    with phase("Reading standard selection sets"):
+        std_selection_sets = read_preset(filepath)
     
-    return std_selection_sets
\ No newline at end of file
+    return std_selection_sets
+
+
+def save_selection_sets_preset(name, selection_sets):
+    """Save selection sets as a new version of a library preset, returning the version entry and whether it was added"""
+    
+    with phase("Saving selection sets preset"):
+        return get_preset_library().save(KIND_SELECTION_SETS, name, selection_sets)
+
+
+STD_SELECTION_SETS = LibraryPresetStore(get_preset_library, KIND_SELECTION_SETS, STD_SS_JSON,
+                                        read_std_selection_sets)
\ No newline at end of file
@@ -6,9 +6,21 @@ from bpy.props import StringProperty
 from bpy.types import Operator, Panel
 from bpy_extras.io_utils import ExportHelper, ImportHelper
 
+# Import standard library
+import os
+
 # Local imports
 from .helpers import *
-from ..ui import ARAPanel
+from ..background import ARABackgroundOperator, read_preset_job, write_preset_job
+from ..instrumentation import instrument_operator, operator_run
+from ..live_sync import get_mirrored_selection_sets
+from ..preset_format import STREAMING_THRESHOLD
+from ..presets import BUNDLED_PRESET
+from ..remapping.helpers import get_scene_remap
+from ..rig_registry import get_armature_rigs
+from ..scene_presets.helpers import scene_preset_property
+from ..snapshot import SelectionSetsSnapshot, get_local_rigs, run_transaction
+from ..ui import ARAPanel, ARAPresetExport, get_scope_rigs, run_with_progress
 
 #----------------------------------------------------------------#
 #--------------------- SELECTION SETS UI ------------------------#
@@ -19,22 +31,55 @@ from ..ui import ARAPanel
 #------------------------- OPERATORS ----------------------------#
 #----------------------------------------------------------------#
 
+def report_selection_sets_patch(operator, report):
+    """Report added, changed and removed selection set counts"""
+    
+    operator.report({'INFO'}, "Selection sets: %d added, %d changed, %d removed, %d rigs up to date"
+                    % (report['ADDED'], report['CHANGED'], report['REMOVED'], report['SKIPPED']))
+
+
 class ARA_OT_SaveSelectionSets(Operator):
-    """Save current rig's selection sets"""
+    """Save current rig's selection sets as a new version of a library preset"""
     
     bl_idname = "ara.save_selection_sets"
     bl_label = "Save Selection Sets"
     
+    preset_name: StringProperty(
+        name="Preset Name",
+        description="Library preset the selection sets are saved to",
+        default="Standard"
+    )
+    
+    def invoke(self, context, event):
+        preset = context.scene.ara_properties.selection_sets_preset
+        if preset != BUNDLED_PRESET:
+            self.preset_name = preset
+        
+        return context.window_manager.invoke_props_dialog(self)
+    
+    @instrument_operator
     def execute(self, context):
         scene = context.scene
         
-        scene.ara_selection_sets.clear()
+        if not self.preset_name.strip():
+            self.report({'ERROR'}, "Please name the preset!")
+            
+            return {'CANCELLED'}
+        
+        if scene.ara_source_rig != None:
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
+        else:
+            rigs = get_scope_rigs(scene)
+        
+        selection_sets_data = get_mirrored_selection_sets(rigs) or get_rigs_selection_sets_data(rigs)
         
-        selection_sets = get_selection_sets()
-        selection_sets_data = get_selection_sets_data(selection_sets)
+        entry, added = save_selection_sets_preset(self.preset_name, selection_sets_data)
+        scene.ara_properties.selection_sets_preset = self.preset_name
         
-        scene.ara_selection_sets.update(selection_sets_data)
-        export_selection_sets(STD_SS_JSON)
+        if added:
+            self.report({'INFO'}, "Saved %s version %d" % (self.preset_name, entry['VERSION']))
+        else:
+            self.report({'INFO'}, "%s version %d is already up to date" % (self.preset_name, entry['VERSION']))
         
         return {'FINISHED'}
 
@@ -44,18 +89,47 @@ class ARA_OT_SetSelectionSets(Operator):
     
     bl_idname = "ara.set_selection_sets"
     bl_label = "Set Selection Sets"
+    bl_options = {'REGISTER', 'UNDO'}
     
+    @instrument_operator
     def execute(self, context):
         scene = context.scene
         
-        remove_selection_sets()
-        create_selection_sets(scene.ara_selection_sets)
+        remap = get_scene_remap(scene)
         
-        return {'FINISHED'}
+        if scene.ara_source_rig != None:
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
+        else:
+            rigs = get_target_rigs(scene.ara_selection_sets, remap)
+        
+        return run_transaction(self, SelectionSetsSnapshot(rigs),
+                               lambda: patch_selection_sets(scene.ara_selection_sets, rigs, remap),
+                               report_selection_sets_patch)
+
+
+class ARA_OT_SymmetrizeSelectionSets(Operator):
+    """Add the opposite side bone of every bone in a selection set to the mirrored selection set"""
+    
+    bl_idname = "ara.symmetrize_selection_sets"
+    bl_label = "Symmetrize Selection Sets"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    @instrument_operator
+    def execute(self, context):
+        scene = context.scene
+        
+        if scene.ara_source_rig != None:
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
+        else:
+            rigs = get_scope_rigs(scene)
+        
+        return run_transaction(self, SelectionSetsSnapshot(rigs),
+                               lambda: symmetrize_rigs_selection_sets(rigs),
+                               report_selection_sets_patch)
 
 
-class ARA_OT_ExportSelectionSets(Operator, ExportHelper):
-    """Export selection sets to a specified JSON file"""
+class ARA_OT_ExportSelectionSets(Operator, ARAPresetExport, ExportHelper):
+    """Export selection sets to a specified JSON or binary preset file"""
     
     bl_idname = "ara.export_selection_sets"
     bl_label = "Export Selection Sets"
@@ -63,35 +137,113 @@ class ARA_OT_ExportSelectionSets(Operator, ExportHelper):
     filename_ext = ".json"
     
     filter_glob: StringProperty(
-        default="*.json",
-        oprtions={'HIDDEN'},
+        default="*.json;*.arap",
+        options={'HIDDEN'},
         maxlen=255
     )
     
+    @instrument_operator
     def execute(self, context):
         scene = context.scene
         
-        return export_selection_sets(self.filepath)
+        if scene.ara_source_rig != None:
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
+        else:
+            rigs = get_scope_rigs(scene)
+        
+        return export_selection_sets(self.filepath, self.compress, rigs)
 
 
 class ARA_OT_ImportSelectionSets(Operator, ImportHelper):
-    """Import Selection Sets from a specified JSON file"""
+    """Import Selection Sets from a specified JSON or binary preset file"""
     
     bl_idname = "ara.import_selection_sets"
     bl_label = "Import Selection Sets"
+    bl_options = {'REGISTER', 'UNDO'}
     
     filename_ext = ".json"
     
     filter_glob: StringProperty(
-        default="*.json",
+        default="*.json;*.arap",
         options={'HIDDEN'},
         maxlen=255
     )
     
+    @instrument_operator
     def execute(self, context):
         scene = context.scene
+        remap = get_scene_remap(scene)
+        
+        if scene.ara_source_rig != None:
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
+        else:
+            rigs = None
         
-        return import_selection_sets(self.filepath)
+        # Target rigs depend on the file's bone names, so every local rig is captured
+        snapshot = SelectionSetsSnapshot(rigs if rigs is not None else get_local_rigs())
+        
+        if os.path.getsize(self.filepath) >= STREAMING_THRESHOLD:
+            return run_transaction(self, snapshot,
+                                   lambda: run_with_progress(context, lambda progress: import_selection_sets_streaming(
+                                       self.filepath, rigs, progress, remap)),
+                                   report_selection_sets_patch)
+        
+        return run_transaction(self, snapshot,
+                               lambda: import_selection_sets(self.filepath, rigs, remap),
+                               report_selection_sets_patch)
+
+
+class ARA_OT_ExportSelectionSetsBackground(ARA_OT_ExportSelectionSets, ARABackgroundOperator):
+    """Export selection sets, writing the file on a background thread"""
+    
+    bl_idname = "ara.export_selection_sets_background"
+    
+    @instrument_operator
+    def execute(self, context):
+        scene = context.scene
+        
+        if scene.ara_source_rig != None:
+            rigs = get_armature_rigs(scene.ara_source_rig.name)
+        else:
+            rigs = get_scope_rigs(scene)
+        
+        selection_sets_data = get_mirrored_selection_sets(rigs) or get_rigs_selection_sets_data(rigs)
+        
+        return self.run_in_background(context, write_preset_job(self.filepath, selection_sets_data, self.compress),
+                                      "Exporting selection sets")
+    
+    def finish(self, context, filepath):
+        self.report({'INFO'}, "Exported selection sets to %s" % filepath)
+        
+        return {'FINISHED'}
+
+
+class ARA_OT_ImportSelectionSetsBackground(ARA_OT_ImportSelectionSets, ARABackgroundOperator):
+    """Import selection sets, parsing the file on a background thread unless it is streamed"""
+    
+    bl_idname = "ara.import_selection_sets_background"
+    
+    @instrument_operator
+    def execute(self, context):
+        # Parsing holds the whole file, large files are applied while they are read instead
+        if os.path.getsize(self.filepath) >= STREAMING_THRESHOLD:
+            return super().execute(context)
+        
+        return self.run_in_background(context, read_preset_job(self.filepath), "Reading selection sets")
+    
+    def finish(self, context, selection_sets):
+        scene = context.scene
+        remap = get_scene_remap(scene)
+        
+        with operator_run(self.bl_label):
+            if scene.ara_source_rig != None:
+                rigs = get_armature_rigs(scene.ara_source_rig.name)
+            else:
+                rigs = get_target_rigs(selection_sets, remap)
+            
+            return run_transaction(self, SelectionSetsSnapshot(rigs),
+                                   lambda: patch_selection_sets(selection_sets, rigs, remap),
+                                   report_selection_sets_patch)
 
 #----------------------------------------------------------------#
 #-------------------------- PANELS ------------------------------#
@@ -109,6 +261,7 @@ class ARA_PT_MenuSelectionSets(Panel, ARAPanel):
         ara_properties = scene.ara_properties
         
         layout.prop(ara_properties, "external_selection_sets", text="External Selection Sets")
+        layout.prop(ara_properties, "selection_sets_preset", text="Preset")
         
         col = layout.column(align=True)
         col.scale_y = 1.5
@@ -117,6 +270,10 @@ class ARA_PT_MenuSelectionSets(Panel, ARAPanel):
         col = layout.column(align=True)
         col.scale_y = 1.5
         col.operator(ARA_OT_SetSelectionSets.bl_idname, ARA_OT_SetSelectionSets.bl_label)
+        
+        col = layout.column(align=True)
+        col.scale_y = 1.5
+        col.operator(ARA_OT_SymmetrizeSelectionSets.bl_idname, text=ARA_OT_SymmetrizeSelectionSets.bl_label)
 
 
 class ARA_PT_TransferSelectionSets(Panel, ARAPanel):
@@ -132,13 +289,13 @@ class ARA_PT_TransferSelectionSets(Panel, ARAPanel):
         
         col = layout.column(align=True)
         col.scale_y = 1.5
-        col.operator(ARA_OT_ExportSelectionSets.bl_idname, text=ARA_OT_ExportSelectionSets.bl_label)
+        col.operator(ARA_OT_ExportSelectionSetsBackground.bl_idname, text=ARA_OT_ExportSelectionSetsBackground.bl_label)
         if ara_properties.external_selection_sets == False:
             col.enabled = False
         
         col = layout.column(align=True)
         col.scale_y = 1.5
-        col.operator(ARA_OT_ImportSelectionSets.bl_idname, text=ARA_OT_ImportSelectionSets.bl_label)
+        col.operator(ARA_OT_ImportSelectionSetsBackground.bl_idname, text=ARA_OT_ImportSelectionSetsBackground.bl_label)
         if ara_properties.external_selection_sets == False:
             col.enabled = False
 
@@ -151,25 +308,29 @@ classes = [
     ARA_OT_ImportSelectionSets,
     ARA_OT_SaveSelectionSets,
     ARA_OT_SetSelectionSets,
+    ARA_OT_SymmetrizeSelectionSets,
+    ARA_OT_ExportSelectionSetsBackground,
+    ARA_OT_ImportSelectionSetsBackground,
     ARA_PT_MenuSelectionSets,
     ARA_PT_TransferSelectionSets
 ]
 
 
 def menu_func_export(self, context):
-    self.layout.operator(ARA_OT_ExportSelectionSets.bl_idname, text="Export Selection Sets (.json)")
+    self.layout.operator(ARA_OT_ExportSelectionSetsBackground.bl_idname, text="Export Selection Sets (.json)")
 
 
 def menu_func_import(self, context):
-    self.layout.opertaor(ARA_OT_ImportSelectionSets.bl_idname, text="Import Selection Sets (.json)")
+    self.layout.operator(ARA_OT_ImportSelectionSetsBackground.bl_idname, text="Import Selection Sets (.json)")
 
 
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
     
-    bpy.types.Scene.ara_selection_sets = read_std_selection_sets(STD_SS_JSON)
-
+    bpy.types.Scene.ara_selection_sets = scene_preset_property(
+        STD_SELECTION_SETS, lambda scene: scene.ara_properties.selection_sets_preset)
+    
     bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
     bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
 
@@ -0,0 +1,239 @@
+"""In-memory snapshots of rigs' bone groups and selection sets
+
+The apply operators take a snapshot of every rig they may touch before
+writing. If applying fails halfway, the snapshot is restored so the rigs are
+left as they were instead of half built.
+"""
+
+# Local imports
+from .backend import get_backend
+from .bone_groups.bone_collections import ARA_COLLECTION_KEY, get_bone_collections, is_ara_collection
+from .fingerprint import BONE_GROUPS_HASH_KEY, SELECTION_SETS_HASH_KEY
+from .instrumentation import fail_run, phase, timed_phase
+from .rig_registry import get_registered_rigs
+
+#----------------------------------------------------------------#
+#------------------------- SNAPSHOTS ----------------------------#
+#----------------------------------------------------------------#
+
+def get_local_rigs():
+    """Names of every armature object that belongs to this file, metarigs included"""
+    
+    return get_registered_rigs(metarigs=True)
+
+
+def get_rig_objects(rigs):
+    """Armature objects of rigs, skipping names without an object"""
+    
+    rig_objects = (get_backend().objects.get(rig) for rig in rigs)
+    
+    return [rig_object for rig_object in rig_objects if rig_object is not None and rig_object.pose is not None]
+
+
+class BoneGroupsSnapshot:
+    """Bone groups, their colors and bone assignments of a list of rigs"""
+    
+    @timed_phase("Taking bone groups snapshot")
+    def __init__(self, rigs):
+        self.rigs = []
+        for rig_object in get_rig_objects(rigs):
+            pose = rig_object.pose
+            bone_groups = [(bone_group.name, bone_group.color_set, tuple(bone_group.colors.normal),
+                            tuple(bone_group.colors.select), tuple(bone_group.colors.active))
+                           for bone_group in pose.bone_groups]
+            assignments = {pose_bone.name: pose_bone.bone_group.name
+                           for pose_bone in pose.bones if pose_bone.bone_group is not None}
+            active_index = pose.bone_groups.active_index
+            self.rigs.append((rig_object.name, bone_groups, assignments, active_index,
+                              rig_object.get(BONE_GROUPS_HASH_KEY)))
+    
+    def restore(self):
+        """Rebuild every rig's bone groups exactly as they were captured"""
+        
+        for rig, bone_groups, assignments, active_index, bone_groups_hash in self.rigs:
+            rig_object = get_backend().objects.get(rig)
+            if rig_object is None:
+                continue
+            pose = rig_object.pose
+            
+            for bone_group_object in pose.bone_groups.values():
+                pose.bone_groups.remove(bone_group_object)
+            
+            for name, color_set, normal, select, active in bone_groups:
+                bone_group_object = pose.bone_groups.new(name=name)
+                bone_group_object.color_set = color_set
+                bone_group_object.colors.normal = normal
+                bone_group_object.colors.select = select
+                bone_group_object.colors.active = active
+            
+            for pose_bone in pose.bones:
+                bone_group = assignments.get(pose_bone.name)
+                pose_bone.bone_group = pose.bone_groups[bone_group] if bone_group is not None else None
+            
+            pose.bone_groups.active_index = active_index
+            restore_hash(rig_object, BONE_GROUPS_HASH_KEY, bone_groups_hash)
+
+
+class BoneCollectionsSnapshot:
+    """Bone collections, their bones and the pose bone colors of a list of rigs, Blender 4.0+"""
+    
+    @timed_phase("Taking bone collections snapshot")
+    def __init__(self, rigs):
+        self.rigs = []
+        for rig_object in get_rig_objects(rigs):
+            armature = rig_object.data
+            bone_collections = [(bone_collection.name, get_parent_name(bone_collection), bone_collection.is_visible,
+                                 is_ara_collection(bone_collection), [bone.name for bone in bone_collection.bones])
+                                for bone_collection in get_bone_collections(armature)]
+            colors = {pose_bone.name: (pose_bone.color.palette, tuple(pose_bone.color.custom.normal),
+                                       tuple(pose_bone.color.custom.select), tuple(pose_bone.color.custom.active))
+                      for pose_bone in rig_object.pose.bones}
+            self.rigs.append((rig_object.name, bone_collections, colors, armature.collections.active_index,
+                              rig_object.get(BONE_GROUPS_HASH_KEY)))
+    
+    def restore(self):
+        """Put every rig's bone collections and bone colors back as they were captured
+        
+        Collections the add-on created since are removed and its missing ones
+        recreated. Other collections are edited in place, so their custom
+        properties and order survive the rollback.
+        """
+        
+        for rig, bone_collections, colors, active_index, bone_groups_hash in self.rigs:
+            rig_object = get_backend().objects.get(rig)
+            if rig_object is None:
+                continue
+            armature = rig_object.data
+            collections = armature.collections
+            pose_bones = rig_object.pose.bones
+            
+            captured = {name for name, parent_name, is_visible, is_ara, bones in bone_collections}
+            for bone_collection in list(get_bone_collections(armature)):
+                if bone_collection.name not in captured and is_ara_collection(bone_collection):
+                    collections.remove(bone_collection)
+            
+            # Parents come before their children, so they exist by the time a child is created
+            for name, parent_name, is_visible, is_ara, bones in bone_collections:
+                bone_collection = get_bone_collections(armature).get(name)
+                if bone_collection is None:
+                    if parent_name is None:
+                        bone_collection = collections.new(name)
+                    else:
+                        bone_collection = collections.new(name, parent=get_bone_collections(armature)[parent_name])
+                if bone_collection.is_visible != is_visible:
+                    bone_collection.is_visible = is_visible
+                if is_ara:
+                    bone_collection[ARA_COLLECTION_KEY] = True
+                elif ARA_COLLECTION_KEY in bone_collection:
+                    del bone_collection[ARA_COLLECTION_KEY]
+                
+                wanted = set(bones)
+                for bone in [bone.name for bone in bone_collection.bones]:
+                    if bone not in wanted:
+                        bone_collection.unassign(pose_bones[bone])
+                current = {bone.name for bone in bone_collection.bones}
+                for bone in bones:
+                    if bone not in current:
+                        bone_collection.assign(pose_bones[bone])
+            
+            for pose_bone in pose_bones:
+                palette, normal, select, active = colors[pose_bone.name]
+                bone_color = pose_bone.color
+                bone_color.palette = palette
+                bone_color.custom.normal = normal
+                bone_color.custom.select = select
+                bone_color.custom.active = active
+            
+            collections.active_index = active_index
+            restore_hash(rig_object, BONE_GROUPS_HASH_KEY, bone_groups_hash)
+
+
+def get_parent_name(bone_collection):
+    """Name of a bone collection's parent, None at the top level and before Blender 4.1"""
+    
+    parent = getattr(bone_collection, "parent", None)
+    
+    return parent.name if parent is not None else None
+
+
+def take_bone_groups_snapshot(rigs):
+    """Snapshot of the rigs' bone groups, or of their bone collections from Blender 4.0"""
+    
+    if get_backend().has_bone_groups:
+        return BoneGroupsSnapshot(rigs)
+    
+    return BoneCollectionsSnapshot(rigs)
+
+
+class SelectionSetsSnapshot:
+    """Selection sets, their bones and the active set of a list of rigs"""
+    
+    @timed_phase("Taking selection sets snapshot")
+    def __init__(self, rigs):
+        self.rigs = []
+        for rig_object in get_rig_objects(rigs):
+            selection_sets = [(object_selection_set.name, [bone_id.name for bone_id in object_selection_set.bone_ids])
+                              for object_selection_set in rig_object.selection_sets]
+            self.rigs.append((rig_object.name, selection_sets, rig_object.active_selection_set,
+                              rig_object.get(SELECTION_SETS_HASH_KEY)))
+    
+    def restore(self):
+        """Rebuild every rig's selection sets exactly as they were captured"""
+        
+        for rig, selection_sets, active_index, selection_sets_hash in self.rigs:
+            rig_object = get_backend().objects.get(rig)
+            if rig_object is None:
+                continue
+            
+            object_selection_sets = rig_object.selection_sets
+            object_selection_sets.clear()
+            for name, bones in selection_sets:
+                object_selection_set = object_selection_sets.add()
+                object_selection_set.name = name
+                bone_ids = object_selection_set.bone_ids
+                for bone in bones:
+                    bone_ids.add().name = bone
+            
+            rig_object.active_selection_set = active_index
+            restore_hash(rig_object, SELECTION_SETS_HASH_KEY, selection_sets_hash)
+
+
+def restore_hash(rig_object, key, value):
+    """Put back a stored hash, removing it when the rig had none"""
+    
+    if value is not None:
+        rig_object[key] = value
+    elif key in rig_object:
+        del rig_object[key]
+
+#----------------------------------------------------------------#
+#------------------------- ROLLBACK -----------------------------#
+#----------------------------------------------------------------#
+
+def apply_with_rollback(snapshot, apply):
+    """Call apply() and return its result, restoring snapshot if it raises"""
+    
+    try:
+        return apply()
+    except Exception:
+        with phase("Rolling back to snapshot"):
+            snapshot.restore()
+        raise
+
+
+def run_transaction(operator, snapshot, apply, report):
+    """Apply as one transaction for an operator, reporting the result or the rolled back failure
+    
+    Returns the operator's result set.
+    """
+    
+    try:
+        result = apply_with_rollback(snapshot, apply)
+    except Exception as error:
+        fail_run()
+        operator.report({'ERROR'}, "%s failed, rigs were restored: %s" % (operator.bl_label, error))
+        return {'CANCELLED'}
+    
+    report(operator, result)
+    
+    return {'FINISHED'}
\ No newline at end of file
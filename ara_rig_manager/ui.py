@@ -1,7 +1,19 @@
 import bpy
-from bpy.props import BoolProperty, PointerProperty, StringProperty
+from bpy.props import BoolProperty, EnumProperty, PointerProperty, StringProperty
 from bpy.types import Panel, PropertyGroup
 
+# Import standard library
+import os
+import zlib
+
+# Local imports
+from .instrumentation import get_last_run
+from .preset_format import BINARY_EXT, JSON_EXT, KIND_BONE_GROUPS, KIND_SELECTION_SETS
+from .preset_library import get_preset_library
+from .presets import BUNDLED_PRESET
+from .rig_registry import get_registered_rigs
+from .scene_presets.helpers import store_scene_preset
+
 
 #----------------------------------------------------------------#
 #--------------------- ARA RIG MANAGER UI -----------------------#
@@ -16,6 +28,34 @@ class ARAPanel:
     bl_context = "posemode"
 
 
+class ARAPresetExport:
+    """Preset file format options shared by the export operators"""
+    
+    file_format: EnumProperty(
+        name="Format",
+        description="File format of the exported preset",
+        items=(
+            ('JSON', "JSON", "Plain JSON file"),
+            ('BINARY', "Binary", "Compact binary preset with interned bone names (.arap)")
+        ),
+        default='JSON'
+    )
+    
+    compress: BoolProperty(
+        name="Compress",
+        description="Compress binary presets with zlib",
+        default=True
+    )
+    
+    def check(self, context):
+        filepath = self.filepath
+        if os.path.basename(filepath):
+            extension = BINARY_EXT if self.file_format == 'BINARY' else JSON_EXT
+            self.filepath = bpy.path.ensure_ext(os.path.splitext(filepath)[0], extension)
+        
+        return filepath != self.filepath
+
+
 class ARA_PT_MenuMain(Panel, ARAPanel):
     """ARA Rig Manager Main Menu Panel"""
     
@@ -25,6 +65,74 @@ class ARA_PT_MenuMain(Panel, ARAPanel):
         layout = self.layout
         scene = context.scene
         ara_properties = scene.ara_properties
+        
+        layout.prop(ara_properties, "rig_scope")
+        if ara_properties.rig_scope == 'COLLECTION':
+            layout.prop(ara_properties, "rig_collection", text="")
+        
+        layout.prop(scene, "ara_live_sync")
+
+
+class ARA_PT_MenuPerformance(Panel, ARAPanel):
+    """ARA Rig Manager last operator run breakdown"""
+    
+    bl_label = "Performance"
+    bl_parent_id = "ARA_PT_MenuMain"
+    bl_options = {'DEFAULT_CLOSED'}
+    bl_order = 100
+    
+    def draw(self, context):
+        layout = self.layout
+        run = get_last_run()
+        
+        if run is None:
+            layout.label(text="No ARA operator has run yet")
+            return
+        
+        col = layout.column(align=True)
+        col.label(text="%s: %.1f ms" % (run.name, run.seconds * 1000.0),
+                  icon='ERROR' if run.status == 'FAILED' else 'TIME')
+        for key, value in run.counters.items():
+            col.label(text="%s: %d" % (key.replace('_', ' ').capitalize(), value))
+        
+        box = layout.box()
+        col = box.column(align=True)
+        for phase in run.phases.values():
+            row = col.row()
+            row.label(text="  " * phase.depth + phase.name)
+            row.label(text="%.1f ms  x%d" % (phase.seconds * 1000.0, phase.calls))
+
+
+def get_preset_number(name):
+    """Stable enum number of a preset, so the selection survives presets being added"""
+    
+    return zlib.crc32(name.encode('utf-8')) & 0x7fffffff or 1
+
+
+def get_preset_items(kind):
+    """Enum items callback listing the library presets of a kind from the library index"""
+    
+    # Blender needs the returned strings to stay referenced
+    items = []
+    
+    def preset_items(self, context):
+        items[:] = [(BUNDLED_PRESET, "Bundled", "Preset shipped with the add-on", 'NONE', 0)]
+        for name, entry in get_preset_library().list_presets(kind):
+            items.append((name, name, "Version %d, %d entries" % (entry['VERSION'], entry['COUNT']),
+                          'NONE', get_preset_number(name)))
+        
+        return items
+    
+    return preset_items
+
+
+def get_preset_update(kind, attribute):
+    """Update callback copying the picked preset into the scene, so it is saved with the file"""
+    
+    def preset_update(self, context):
+        store_scene_preset(self.id_data, kind, getattr(self, attribute))
+    
+    return preset_update
 
 
 class ARA_Properties(PropertyGroup):
@@ -41,6 +149,62 @@ class ARA_Properties(PropertyGroup):
         description="Enable import and export of selection sets",
         default=False
     )
+    
+    bone_groups_preset: EnumProperty(
+        name="Bone Groups Preset",
+        description="Library preset used when setting bone groups",
+        items=get_preset_items(KIND_BONE_GROUPS),
+        update=get_preset_update(KIND_BONE_GROUPS, "bone_groups_preset")
+    )
+    
+    selection_sets_preset: EnumProperty(
+        name="Selection Sets Preset",
+        description="Library preset used when setting selection sets",
+        items=get_preset_items(KIND_SELECTION_SETS),
+        update=get_preset_update(KIND_SELECTION_SETS, "selection_sets_preset")
+    )
+    
+    rig_scope: EnumProperty(
+        name="Rigs",
+        description="Rigs the operators work on when no rig is selected",
+        items=(
+            ('FILE', "All Rigs", "Every rig of the file"),
+            ('SCENE', "Scene", "Rigs in this scene"),
+            ('COLLECTION', "Collection", "Rigs in a collection and its child collections")
+        ),
+        default='FILE'
+    )
+    
+    rig_collection: PointerProperty(
+        name="Rig Collection",
+        description="Collection whose rigs the operators work on",
+        type=bpy.types.Collection
+    )
+
+
+def get_scope_rigs(scene):
+    """Rigs in the scene's rig scope, looked up in the rig registry"""
+    
+    ara_properties = scene.ara_properties
+    
+    if ara_properties.rig_scope == 'SCENE':
+        return get_registered_rigs(scene=scene.name)
+    if ara_properties.rig_scope == 'COLLECTION' and ara_properties.rig_collection is not None:
+        return get_registered_rigs(collection=ara_properties.rig_collection.name)
+    
+    return get_registered_rigs()
+
+
+def run_with_progress(context, function):
+    """Call function with a progress callback driving the window manager's progress indicator"""
+    
+    window_manager = context.window_manager
+    window_manager.progress_begin(0, 100)
+    
+    try:
+        return function(lambda fraction: window_manager.progress_update(int(fraction * 100)))
+    finally:
+        window_manager.progress_end()
 
 #----------------------------------------------------------------#
 #---------------------- CLASS REGISTRATION ----------------------#
@@ -48,7 +212,8 @@ class ARA_Properties(PropertyGroup):
 
 classes = [
     ARA_Properties,
-    ARA_PT_MenuMain
+    ARA_PT_MenuMain,
+    ARA_PT_MenuPerformance
 ]
 
 
@@ -0,0 +1,89 @@
+"""Compare the operator driven and the direct data bone groups apply paths
+
+Run from the repository root with:
+    blender -b --factory-startup --python benchmarks/bone_groups_apply.py -- --bones 2000 --groups 40
+"""
+
+# Import Blender Python API
+import bpy
+
+# Import standard library
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Local imports
+from ara_rig_manager.bone_groups.helpers import create_bone_groups, remove_existing_bone_groups
+from ara_rig_manager.instrumentation import count, operator_run
+from synthetic_rig import create_bone_groups_preset, create_synthetic_rig
+
+#----------------------------------------------------------------#
+#-------------------- OPERATOR BASELINE -------------------------#
+#----------------------------------------------------------------#
+
+def create_bone_groups_with_operators(rigs, bone_groups):
+    """Select/assign operator loop the add-on used before the direct data engine"""
+    
+    for rig in rigs:
+        curr_bones = bpy.data.objects[rig].pose.bones.keys()
+        for index, bone_group in enumerate(bone_groups):
+            index += 1
+            bpy.data.objects[rig].pose.bone_groups.new(name=bone_group)
+            bone_group_object = bpy.data.objects[rig].pose.bone_groups[bone_group]
+            bone_group_object.color_set = bone_groups[bone_group]['MODE']
+            bone_group_object.colors.normal.hsv = bone_groups[bone_group]['NORMAL']
+            bone_group_object.colors.select.hsv = bone_groups[bone_group]['SELECT']
+            bone_group_object.colors.active.hsv = bone_groups[bone_group]['ACTIVE']
+            for bone in bone_groups[bone_group]['BONES']:
+                if bone in curr_bones:
+                    selected_bone = bpy.context.object.pose.bones[bone].bone
+                    bpy.context.object.data.bones.active = selected_bone
+                    selected_bone.select = True
+            bpy_bone_groups = bpy.data.objects[rig].pose.bone_groups
+            bpy_bone_groups.active = bpy_bone_groups[bone_group]
+            bpy.ops.pose.group_select()
+            bpy.ops.pose.group_assign(type=index)
+            bpy.ops.pose.group_deselect()
+            count(operator_calls=3, groups=1)
+
+#----------------------------------------------------------------#
+#------------------------- BENCHMARK ----------------------------#
+#----------------------------------------------------------------#
+
+def time_call(function, *args):
+    """Return wall time in seconds of a single call"""
+    
+    start = time.perf_counter()
+    function(*args)
+    
+    return time.perf_counter() - start
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bones", type=int, default=2000)
+    parser.add_argument("--groups", type=int, default=40)
+    args = parser.parse_args(argv)
+    
+    rig = create_synthetic_rig("ara_bench_rig", args.bones)
+    bone_groups = create_bone_groups_preset(rig.pose.bones.keys(), args.groups)
+    
+    # Run both paths as operator runs, so their logged summaries show the operator calls each made
+    with operator_run("Operator bone groups apply"):
+        operators_time = time_call(create_bone_groups_with_operators, [rig.name], bone_groups)
+    remove_existing_bone_groups([rig.name])
+    with operator_run("Direct bone groups apply"):
+        direct_time = time_call(create_bone_groups, [rig.name], bone_groups)
+    
+    print("bones=%d groups=%d" % (args.bones, args.groups))
+    print("operators: %.4fs" % operators_time)
+    print("direct:    %.4fs" % direct_time)
+    print("speedup:   %.1fx" % (operators_time / max(direct_time, 1e-9)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
@@ -0,0 +1,242 @@
+"""Headless benchmark suite for the ARA Rig Manager helpers
+
+Run from the repository root with:
+    blender -b --factory-startup --python benchmarks/run_benchmarks.py -- \
+        --bones 900 --groups 40 --sets 150 --rigs 4 --output results.json
+
+Pass --baseline with an earlier results file to fail (exit code 1) when a
+case got slower than the baseline by more than --threshold.
+
+With --fake the helpers run on in-memory rigs, without Blender:
+    python benchmarks/run_benchmarks.py -- --fake --bones 900 --rigs 4
+"""
+
+# Import standard library
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Local imports
+from ara_rig_manager.bone_groups.helpers import (create_bone_groups, export_bone_groups, get_bone_groups_data,
+                                                 import_bone_groups, patch_bone_groups, recolor_bone_groups,
+                                                 remove_existing_bone_groups)
+from ara_rig_manager.backend import set_backend
+from ara_rig_manager.fake_armature import FakeBackend
+from ara_rig_manager.preset_format import write_preset
+from ara_rig_manager.selection_sets.helpers import (create_selection_sets, export_selection_sets,
+                                                    import_selection_sets, patch_selection_sets,
+                                                    remove_selection_sets)
+from synthetic_rig import create_bone_groups_preset, create_fake_rigs, create_selection_sets_preset
+
+#----------------------------------------------------------------#
+#--------------------------- CASES ------------------------------#
+#----------------------------------------------------------------#
+
+def get_cases(rigs, bone_groups, selection_sets, directory, operator_baseline):
+    """Return (name, setup, call) triples, setup runs untimed before every call"""
+    
+    bone_groups_json = os.path.join(directory, "bone_groups.json")
+    bone_groups_arap = os.path.join(directory, "bone_groups.arap")
+    selection_sets_json = os.path.join(directory, "selection_sets.json")
+    palette = {bone_group: dict(data, MODE='THEME01') for bone_group, data in bone_groups.items()}
+    
+    # Import cases read these files, so they exist even when the export cases are filtered out
+    for filepath, data in ((bone_groups_json, bone_groups), (bone_groups_arap, bone_groups),
+                           (selection_sets_json, selection_sets)):
+        write_preset(filepath, data)
+    
+    def with_bone_groups():
+        remove_existing_bone_groups(rigs)
+        create_bone_groups(rigs, bone_groups)
+    
+    def without_bone_groups():
+        remove_existing_bone_groups(rigs)
+    
+    def with_selection_sets():
+        remove_selection_sets(rigs)
+        create_selection_sets(selection_sets, rigs)
+    
+    def without_selection_sets():
+        remove_selection_sets(rigs)
+    
+    cases = [
+        ("get_bone_groups_data", with_bone_groups, lambda: get_bone_groups_data(rigs)),
+        ("remove_existing_bone_groups", with_bone_groups, lambda: remove_existing_bone_groups(rigs)),
+        ("create_bone_groups", without_bone_groups, lambda: create_bone_groups(rigs, bone_groups)),
+        ("patch_bone_groups_unchanged", with_bone_groups, lambda: patch_bone_groups(rigs, bone_groups)),
+        ("recolor_bone_groups_by_palette", with_bone_groups,
+         lambda: recolor_bone_groups(rigs, [bone_groups, palette])),
+        ("export_bone_groups_json", with_bone_groups,
+         lambda: export_bone_groups(bone_groups_json, get_bone_groups_data(rigs))),
+        ("export_bone_groups_arap", with_bone_groups,
+         lambda: export_bone_groups(bone_groups_arap, get_bone_groups_data(rigs))),
+        ("import_bone_groups_json", without_bone_groups, lambda: import_bone_groups(bone_groups_json, rigs)),
+        ("import_bone_groups_arap", without_bone_groups, lambda: import_bone_groups(bone_groups_arap, rigs)),
+        ("create_selection_sets", without_selection_sets, lambda: create_selection_sets(selection_sets, rigs)),
+        ("remove_selection_sets", with_selection_sets, lambda: remove_selection_sets(rigs)),
+        ("patch_selection_sets_unchanged", with_selection_sets, lambda: patch_selection_sets(selection_sets, rigs)),
+        ("export_selection_sets", with_selection_sets,
+         lambda: export_selection_sets(selection_sets_json, rigs=rigs)),
+        ("import_selection_sets", without_selection_sets,
+         lambda: import_selection_sets(selection_sets_json, rigs)),
+    ]
+    
+    if operator_baseline:
+        from bone_groups_apply import create_bone_groups_with_operators
+        cases.append(("create_bone_groups_operators", without_bone_groups,
+                      lambda: create_bone_groups_with_operators(rigs, bone_groups)))
+    
+    return cases
+
+
+def run_case(setup, call, repeat):
+    """Return wall times in seconds of repeat timed calls"""
+    
+    timings = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    
+    return timings
+
+#----------------------------------------------------------------#
+#-------------------------- RESULTS -----------------------------#
+#----------------------------------------------------------------#
+
+def write_results(filepath, results):
+    """Write results as JSON, or CSV when filepath ends with .csv"""
+    
+    if filepath.endswith(".csv"):
+        with open(filepath, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(filepath, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+def read_results(filepath):
+    """Read a results file written by write_results, keyed by case and size"""
+    
+    with open(filepath, 'r', encoding='utf-8', newline='') as file:
+        if filepath.endswith(".csv"):
+            results = list(csv.DictReader(file))
+        else:
+            results = json.load(file)
+    
+    return {get_result_key(result): float(result['median']) for result in results}
+
+
+def get_backend_name(args):
+    if not args.fake:
+        return 'blender'
+    
+    return 'fake_collections' if args.bone_collections else 'fake'
+
+
+def get_result_key(result):
+    return "%s[backend=%s,bones=%s,groups=%s,sets=%s,rigs=%s]" % (
+        result['case'], result.get('backend', 'blender'), result['bones'], result['groups'], result['sets'],
+        result['rigs'])
+
+
+def find_regressions(results, baseline, threshold):
+    """Return (key, baseline, current) for cases slower than baseline * threshold"""
+    
+    regressions = []
+    for result in results:
+        key = get_result_key(result)
+        if key in baseline and result['median'] > baseline[key] * threshold:
+            regressions.append((key, baseline[key], result['median']))
+    
+    return regressions
+
+#----------------------------------------------------------------#
+#------------------------ COMMAND LINE --------------------------#
+#----------------------------------------------------------------#
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="ARA Rig Manager benchmarks")
+    parser.add_argument("--bones", type=int, default=900)
+    parser.add_argument("--groups", type=int, default=40)
+    parser.add_argument("--sets", type=int, default=150)
+    parser.add_argument("--rigs", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Results file (.json or .csv)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Allowed slowdown factor over the baseline median")
+    parser.add_argument("--operator-baseline", action='store_true',
+                        help="Also time the old operator driven bone groups apply")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--fake", action='store_true',
+                        help="Run on in-memory rigs with plain python instead of Blender")
+    parser.add_argument("--bone-collections", action='store_true',
+                        help="Give the in-memory rigs Blender 4.0+ bone collections instead of bone groups")
+    args = parser.parse_args(argv)
+    
+    if args.bone_collections and not args.fake:
+        parser.error("--bone-collections needs --fake, Blender's own version decides otherwise")
+    
+    if args.fake:
+        if args.operator_baseline:
+            parser.error("--operator-baseline needs Blender")
+        backend = FakeBackend(has_bone_groups=not args.bone_collections)
+        rig_objects = create_fake_rigs(backend, args.rigs, args.bones)
+        set_backend(backend)
+    else:
+        import addon_utils
+        from synthetic_rig import create_synthetic_rigs
+        addon_utils.enable("bone_selection_sets", default_set=True)
+        rig_objects = create_synthetic_rigs(args.rigs, args.bones)
+    
+    rigs = [rig_object.name for rig_object in rig_objects]
+    bone_names = rig_objects[0].pose.bones.keys()
+    bone_groups = create_bone_groups_preset(bone_names, args.groups)
+    selection_sets = create_selection_sets_preset(bone_names, args.sets)
+    
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, setup, call in get_cases(rigs, bone_groups, selection_sets, directory, args.operator_baseline):
+            if args.filter not in name:
+                continue
+            timings = run_case(setup, call, args.repeat)
+            results.append({
+                'case': name,
+                'backend': get_backend_name(args),
+                'bones': args.bones,
+                'groups': args.groups,
+                'sets': args.sets,
+                'rigs': args.rigs,
+                'repeat': args.repeat,
+                'min': min(timings),
+                'median': statistics.median(timings)
+            })
+    
+    for result in results:
+        print("%-32s min %9.5fs  median %9.5fs" % (result['case'], result['min'], result['median']))
+    
+    if args.output:
+        write_results(args.output, results)
+    
+    if args.baseline:
+        regressions = find_regressions(results, read_results(args.baseline), args.threshold)
+        for key, baseline_median, median in regressions:
+            print("REGRESSION %s: %.5fs -> %.5fs" % (key, baseline_median, median))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
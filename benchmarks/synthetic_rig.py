@@ -0,0 +1,90 @@
+"""Synthetic armature generator used by the ARA benchmarks"""
+
+# Import Blender Python API, absent when benchmarking in-memory rigs
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+# Import standard library
+import colorsys
+
+#----------------------------------------------------------------#
+#---------------------- SYNTHETIC RIGS --------------------------#
+#----------------------------------------------------------------#
+
+def create_synthetic_rig(name, bone_count):
+    """Create an armature object with a chain of bone_count bones and make it active"""
+    
+    armature = bpy.data.armatures.new(name)
+    rig = bpy.data.objects.new(name, armature)
+    bpy.context.scene.collection.objects.link(rig)
+    bpy.context.view_layer.objects.active = rig
+    
+    bpy.ops.object.mode_set(mode='EDIT')
+    parent = None
+    for index in range(bone_count):
+        edit_bone = armature.edit_bones.new("bone_%05d" % index)
+        edit_bone.head = (index % 50 * 0.1, index // 50 * 0.1, 0.0)
+        edit_bone.tail = (index % 50 * 0.1, index // 50 * 0.1, 0.1)
+        if index % 50:
+            edit_bone.parent = parent
+        parent = edit_bone
+    bpy.ops.object.mode_set(mode='POSE')
+    
+    return rig
+
+
+def create_synthetic_rigs(rig_count, bone_count, name="ara_bench_rig"):
+    """Create rig_count synthetic rigs, the first one is left active in pose mode"""
+    
+    rigs = []
+    for index in range(rig_count):
+        if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        rigs.append(create_synthetic_rig("%s_%02d" % (name, index), bone_count))
+    
+    if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    bpy.context.view_layer.objects.active = rigs[0]
+    bpy.ops.object.mode_set(mode='POSE')
+    
+    return rigs
+
+
+def create_fake_rigs(backend, rig_count, bone_count, name="ara_bench_rig"):
+    """Add rig_count in-memory rigs with bone_count bones to a fake backend"""
+    
+    bone_names = ["bone_%05d" % index for index in range(bone_count)]
+    
+    return [backend.add_rig("%s_%02d" % (name, index), bone_names) for index in range(rig_count)]
+
+
+def create_bone_groups_preset(bone_names, group_count):
+    """Build a bone groups preset spreading bone_names evenly over group_count groups"""
+    
+    bone_groups = {}
+    
+    for index in range(group_count):
+        hue = index / max(group_count, 1)
+        bone_groups["group_%03d" % index] = {
+            'MODE': 'CUSTOM',
+            'NORMAL': list(colorsys.hsv_to_rgb(hue, 0.8, 0.6)),
+            'SELECT': list(colorsys.hsv_to_rgb(hue, 0.6, 0.8)),
+            'ACTIVE': list(colorsys.hsv_to_rgb(hue, 0.4, 1.0)),
+            'BONES': bone_names[index::group_count]
+        }
+    
+    return bone_groups
+
+
+def create_selection_sets_preset(bone_names, set_count, bones_per_set=20):
+    """Build a selection sets preset of set_count sets with bones_per_set consecutive bones each"""
+    
+    selection_sets = {}
+    
+    for index in range(set_count):
+        start = index * bones_per_set % max(len(bone_names), 1)
+        selection_sets["set_%03d" % index] = bone_names[start:start + bones_per_set]
+    
+    return selection_sets
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""Fixtures running the helpers on in-memory rigs
+
+Every test gets a fresh fake backend and preset library in a temporary
+folder, so the suite runs with plain python and no Blender.
+"""
+
+# Import standard library
+import pytest
+
+# Local imports
+from ara_rig_manager.backend import set_backend
+from ara_rig_manager.fake_armature import FakeBackend
+from ara_rig_manager.preset_format import KIND_BONE_GROUPS, read_preset, write_preset
+from ara_rig_manager.preset_library import PresetLibrary
+from ara_rig_manager.presets import LibraryPresetStore
+from ara_rig_manager.remapping.helpers import clear_remap_tables
+from ara_rig_manager.rig_registry import invalidate_rig_registry
+
+
+@pytest.fixture
+def bone_names():
+    """Bone names of every rig the backend starts with, a spine and two arms"""
+    
+    return ["root", "spine", "chest", "neck", "head",
+            "arm.L", "forearm.L", "hand.L", "arm.R", "forearm.R", "hand.R"]
+
+
+@pytest.fixture
+def rigs():
+    return ["rig_a", "rig_b"]
+
+
+@pytest.fixture(params=[True, False], ids=["bone_groups", "bone_collections"])
+def backend(request, bone_names, rigs):
+    """Fake backend with two rigs, with bone groups, then with Blender 4.0 bone collections"""
+    
+    backend = FakeBackend(has_bone_groups=request.param)
+    for rig in rigs:
+        backend.add_rig(rig, bone_names)
+    set_backend(backend)
+    invalidate_rig_registry()
+    yield backend
+    set_backend(None)
+    invalidate_rig_registry()
+    clear_remap_tables()
+
+
+@pytest.fixture
+def fail_after():
+    """Build apply functions running steps, then raising like an import failing halfway"""
+    
+    def build(*steps):
+        def apply():
+            for step in steps:
+                step()
+            raise RuntimeError("failed halfway")
+        
+        return apply
+    
+    return build
+
+
+@pytest.fixture
+def bone_groups():
+    """Bone groups data covering every bone, colors as HSV floats"""
+    
+    return {
+        "Torso": {'MODE': 'CUSTOM', 'NORMAL': [0.0, 0.8, 0.6], 'SELECT': [0.0, 0.6, 0.8], 'ACTIVE': [0.0, 0.4, 1.0],
+                  'BONES': ["root", "spine", "chest", "neck", "head"]},
+        "Left": {'MODE': 'CUSTOM', 'NORMAL': [0.5, 0.8, 0.6], 'SELECT': [0.5, 0.6, 0.8], 'ACTIVE': [0.5, 0.4, 1.0],
+                 'BONES': ["arm.L", "forearm.L", "hand.L"]},
+        "Right": {'MODE': 'CUSTOM', 'NORMAL': [0.25, 0.8, 0.6], 'SELECT': [0.25, 0.6, 0.8], 'ACTIVE': [0.25, 0.4, 1.0],
+                  'BONES': ["arm.R", "forearm.R", "hand.R"]}
+    }
+
+
+@pytest.fixture
+def selection_sets():
+    return {
+        "Arms": ["arm.L", "forearm.L", "arm.R", "forearm.R"],
+        "Hands": ["hand.L", "hand.R"],
+        "Head": ["neck", "head"]
+    }
+
+
+@pytest.fixture
+def library(tmp_path):
+    return PresetLibrary(str(tmp_path / "library"))
+
+
+@pytest.fixture
+def bone_groups_store(library, bone_groups, tmp_path):
+    """Bone groups presets of the library, the bone_groups data being the bundled preset"""
+    
+    filepath = str(tmp_path / "bone_groups.json")
+    write_preset(filepath, bone_groups)
+    
+    return LibraryPresetStore(lambda: library, KIND_BONE_GROUPS, filepath, read_preset)
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""Bone groups and bone collections capture, patch and rollback"""
+
+# Import standard library
+import pytest
+
+# Local imports
+from ara_rig_manager.bone_groups.helpers import (get_bone_groups_data, import_bone_groups_streaming, patch_bone_groups,
+                                                 recolor_bone_groups, remove_existing_bone_groups)
+from ara_rig_manager.preset_format import COLOR_KEYS, write_preset
+from ara_rig_manager.remapping.helpers import BoneNameRemap
+from ara_rig_manager.snapshot import apply_with_rollback, take_bone_groups_snapshot
+
+
+def assert_bone_groups_equal(captured, expected):
+    assert sorted(captured) == sorted(expected)
+    for name, data in expected.items():
+        assert captured[name]['MODE'] == data['MODE']
+        assert sorted(captured[name]['BONES']) == sorted(data['BONES'])
+        for key in COLOR_KEYS:
+            assert list(captured[name][key]) == pytest.approx(data[key], abs=1e-4)
+
+
+def test_patch_round_trip(backend, bone_groups, rigs):
+    report = patch_bone_groups(rigs, bone_groups)
+    
+    assert report['ADDED'] == len(bone_groups) * len(rigs)
+    for rig in rigs:
+        assert_bone_groups_equal(get_bone_groups_data([rig]), bone_groups)
+
+
+def test_recapture_patches_nothing(backend, bone_groups, rigs):
+    patch_bone_groups(rigs, bone_groups)
+    captured = get_bone_groups_data(["rig_a"])
+    
+    report = patch_bone_groups(rigs, captured)
+    
+    assert report == {'ADDED': 0, 'CHANGED': 0, 'REMOVED': 0, 'SKIPPED': len(rigs)}
+    assert_bone_groups_equal(get_bone_groups_data(["rig_b"]), bone_groups)
+
+
+def test_reapply_integer_colors(backend, rigs):
+    # Presets written by hand or other tools may store whole-number colors as integers
+    bone_groups = {"Black": {'MODE': 'CUSTOM', 'NORMAL': [0, 0, 0], 'SELECT': [0, 0, 1], 'ACTIVE': [0, 0, 1],
+                             'BONES': ["root", "spine"]}}
+    patch_bone_groups(rigs, bone_groups)
+    
+    assert patch_bone_groups(rigs, bone_groups) == {'ADDED': 0, 'CHANGED': 0, 'REMOVED': 0, 'SKIPPED': len(rigs)}
+
+
+def test_patch_moves_recolors_and_removes(backend, bone_groups, rigs):
+    patch_bone_groups(rigs, bone_groups)
+    
+    edited = {name: dict(data, BONES=list(data['BONES'])) for name, data in bone_groups.items()}
+    edited["Torso"]['BONES'].remove("head")
+    edited["Left"]['BONES'].append("head")
+    edited["Left"]['NORMAL'] = [0.75, 0.5, 0.5]
+    del edited["Right"]
+    
+    report = patch_bone_groups(rigs, edited)
+    
+    assert report['ADDED'] == 0
+    assert report['CHANGED'] > 0
+    for rig in rigs:
+        captured = get_bone_groups_data([rig])
+        assert_bone_groups_equal({name: captured[name] for name in edited}, edited)
+        assert all("hand.R" not in data['BONES'] for data in captured.values())
+
+
+def test_rollback_restores_snapshot(backend, bone_groups, rigs, fail_after):
+    patch_bone_groups(rigs, bone_groups)
+    before = {rig: get_bone_groups_data([rig]) for rig in rigs}
+    snapshot = take_bone_groups_snapshot(rigs)
+    
+    with pytest.raises(RuntimeError):
+        apply_with_rollback(snapshot, fail_after(
+            lambda: remove_existing_bone_groups(rigs),
+            lambda: patch_bone_groups(rigs, {"Other": dict(bone_groups["Torso"], BONES=["root"])})))
+    
+    for rig in rigs:
+        assert_bone_groups_equal(get_bone_groups_data([rig]), before[rig])
+
+
+def test_rollback_restores_hashes(backend, bone_groups, rigs, fail_after):
+    patch_bone_groups(rigs, bone_groups)
+    snapshot = take_bone_groups_snapshot(rigs)
+    
+    with pytest.raises(RuntimeError):
+        apply_with_rollback(snapshot, fail_after(lambda: patch_bone_groups(rigs, {})))
+    
+    assert patch_bone_groups(rigs, bone_groups)['SKIPPED'] == len(rigs)
+
+
+def test_rollback_keeps_foreign_collections(backend, bone_groups, rigs, fail_after):
+    if backend.has_bone_groups:
+        pytest.skip("bone collections only exist from Blender 4.0")
+    collections = backend.objects["rig_a"].data.collections
+    foreign = collections.new("DEF")
+    foreign["rigify_color_set_id"] = 3
+    foreign.assign(backend.objects["rig_a"].pose.bones["spine"])
+    patch_bone_groups(rigs, bone_groups)
+    order = collections.keys()
+    snapshot = take_bone_groups_snapshot(rigs)
+    
+    with pytest.raises(RuntimeError):
+        apply_with_rollback(snapshot, fail_after(
+            lambda: remove_existing_bone_groups(rigs),
+            lambda: foreign.unassign(backend.objects["rig_a"].pose.bones["spine"]),
+            lambda: patch_bone_groups(rigs, {"Other": dict(bone_groups["Torso"], BONES=["root"])})))
+    
+    assert collections.keys() == order
+    assert collections["DEF"] is foreign
+    assert foreign["rigify_color_set_id"] == 3
+    assert [bone.name for bone in foreign.bones] == ["spine"]
+    assert patch_bone_groups(["rig_a"], bone_groups)['SKIPPED'] == 1
+
+
+def test_recolor_by_palette(backend, bone_groups, rigs):
+    patch_bone_groups(rigs, bone_groups)
+    palette = {"Torso": dict(bone_groups["Torso"], NORMAL=[0.75, 0.5, 0.5])}
+    
+    assert recolor_bone_groups(rigs, []) == 0
+    assert recolor_bone_groups(rigs, [bone_groups, palette]) == 1
+    assert list(get_bone_groups_data(["rig_b"])["Torso"]['NORMAL']) == pytest.approx([0.75, 0.5, 0.5], abs=1e-4)
+    assert_bone_groups_equal(get_bone_groups_data(["rig_a"]), bone_groups)
+
+
+@pytest.mark.parametrize("extension", [".json", ".arap"])
+def test_streaming_import_targets_matching_rigs(backend, bone_groups, rigs, tmp_path, extension):
+    backend.add_rig("prop", ["root", "lid", "hinge"])
+    filepath = str(tmp_path / ("bone_groups" + extension))
+    write_preset(filepath, bone_groups)
+    progress = []
+    
+    report = import_bone_groups_streaming(filepath, progress=progress.append)
+    
+    assert report['ADDED'] == len(bone_groups) * len(rigs)
+    for rig in rigs:
+        assert_bone_groups_equal(get_bone_groups_data([rig]), bone_groups)
+    assert get_bone_groups_data(["prop"]) == {}
+    assert progress == sorted(progress) and progress[-1] == 1.0
+    assert import_bone_groups_streaming(filepath)['SKIPPED'] == len(rigs)
+
+
+def test_streaming_import_replaces_groups(backend, bone_groups, rigs, tmp_path):
+    patch_bone_groups(rigs, {"Old": dict(bone_groups["Torso"], BONES=["hand.L"])})
+    filepath = str(tmp_path / "bone_groups.json")
+    write_preset(filepath, bone_groups)
+    
+    report = import_bone_groups_streaming(filepath, rigs=["rig_a"])
+    
+    assert report['REMOVED'] == 1
+    assert_bone_groups_equal(get_bone_groups_data(["rig_a"]), bone_groups)
+    assert sorted(get_bone_groups_data(["rig_b"])) == ["Old"]
+
+
+def test_streaming_import_with_remap(backend, bone_groups, bone_names, tmp_path):
+    backend.add_rig("rig_def", ["DEF-" + bone for bone in bone_names])
+    filepath = str(tmp_path / "bone_groups.arap")
+    write_preset(filepath, bone_groups)
+    remap = BoneNameRemap([('PREFIX', "", "DEF-")])
+    
+    import_bone_groups_streaming(filepath, rigs=None, remap=remap)
+    
+    expected = {name: dict(data, BONES=["DEF-" + bone for bone in data['BONES']]) for name, data in bone_groups.items()}
+    assert_bone_groups_equal(get_bone_groups_data(["rig_def"]), expected)
+    assert import_bone_groups_streaming(filepath, rigs=["rig_def"], remap=remap)['SKIPPED'] == 1
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""Rule based bone group classification"""
+
+# Import standard library
+import pytest
+
+# Local imports
+from ara_rig_manager.bone_groups.helpers import get_bone_groups_data
+from ara_rig_manager.classification.helpers import (BoneClassifier, classify_bone_groups, classify_rigs_bone_groups,
+                                                    compile_pattern, get_classifier)
+from ara_rig_manager.fake_armature import FakeObject
+from ara_rig_manager.remapping.helpers import BoneNameRemap
+
+
+@pytest.fixture
+def rig_object(backend, bone_names):
+    """Rig with a bone hierarchy, a non deforming spine and a custom shaped root"""
+    
+    parents = {"spine": "root", "chest": "spine", "neck": "chest", "head": "neck", "arm.L": "chest",
+               "forearm.L": "arm.L", "hand.L": "forearm.L", "arm.R": "chest", "forearm.R": "arm.R",
+               "hand.R": "forearm.R"}
+    rig_object = backend.add_rig("rig_c", bone_names, parents)
+    rig_object.pose.bones["spine"].bone.use_deform = False
+    rig_object.pose.bones["root"].custom_shape = FakeObject("WGT-root")
+    
+    return rig_object
+
+
+@pytest.mark.parametrize("pattern_type, pattern, name, matched", [
+    ('GLOB', "hand.*", "hand.L", True),
+    ('GLOB', "hand.*", "forearm.L", False),
+    ('REGEX', r"\.R$", "forearm.R", True),
+    ('REGEX', r"^arm", "forearm.R", False)
+])
+def test_compile_pattern(pattern_type, pattern, name, matched):
+    assert (compile_pattern(pattern_type, pattern)(name) is not None) == matched
+
+
+def test_classify_first_matching_rule_wins(rig_object):
+    classifier = BoneClassifier([
+        ("Root", 'GLOB', "", "", 'ANY', "", 'WITH'),
+        ("Left", 'GLOB', "", "arm.L", 'ANY', "", 'ANY'),
+        ("Right", 'REGEX', r"\.R$", "", 'ANY', "", 'ANY'),
+        ("Mechanism", 'GLOB', "", "", 'NO_DEFORM', "", 'ANY'),
+        ("Body", 'GLOB', "*", "", 'DEFORM', "", 'WITHOUT'),
+        ("Empty", 'GLOB', "tail*", "", 'ANY', "", 'ANY')
+    ])
+    
+    assert classifier.classify(rig_object) == {
+        "Root": ["root"],
+        "Left": ["forearm.L", "hand.L"],
+        "Right": ["arm.R", "forearm.R", "hand.R"],
+        "Mechanism": ["spine"],
+        "Body": ["chest", "neck", "head", "arm.L"],
+        "Empty": []
+    }
+
+
+def test_classify_by_collection(backend, rig_object):
+    if backend.has_bone_groups:
+        collection = "3"
+        for bone in ("hand.L", "hand.R"):
+            rig_object.pose.bones[bone].bone.layers[3] = True
+    else:
+        collection = "FK"
+        bone_collection = rig_object.data.collections.new(collection)
+        for bone in ("hand.L", "hand.R"):
+            bone_collection.assign(rig_object.pose.bones[bone])
+    
+    classifier = BoneClassifier([("Hands", 'GLOB', "", "", 'ANY', collection, 'ANY')])
+    
+    assert classifier.classify(rig_object) == {"Hands": ["hand.L", "hand.R"]}
+
+
+def test_classifier_cache():
+    rules = [("Body", 'GLOB', "*", "", 'ANY', "", 'ANY')]
+    
+    assert get_classifier(rules) is get_classifier([list(rule) for rule in rules])
+    assert get_classifier(rules) is not get_classifier([("Body", 'GLOB', "*", "", 'DEFORM', "", 'ANY')])
+
+
+def test_classify_bone_groups(bone_groups):
+    classified = classify_bone_groups(bone_groups, {"Left": ["hand.L", "head"], "Props": ["root"]})
+    
+    assert classified["Left"] == dict(bone_groups["Left"], BONES=["hand.L", "head"])
+    assert classified["Torso"]['BONES'] == ["spine", "chest", "neck"]
+    assert classified["Right"] == bone_groups["Right"]
+    assert classified["Props"]['MODE'] == 'DEFAULT'
+    assert classified["Props"]['BONES'] == ["root"]
+
+
+def test_classify_rigs(backend, bone_groups, rigs):
+    classifier = get_classifier([("Left", 'GLOB', "*.L", "", 'ANY', "", 'ANY'),
+                                 ("Right", 'GLOB', "*.R", "", 'ANY', "", 'ANY')])
+    edited = dict(bone_groups, Left=dict(bone_groups["Left"], BONES=[]))
+    
+    report = classify_rigs_bone_groups(rigs, edited, classifier)
+    
+    assert report['ADDED'] == len(bone_groups) * len(rigs)
+    for rig in rigs:
+        captured = get_bone_groups_data([rig])
+        assert {name: sorted(data['BONES']) for name, data in captured.items()} == {
+            name: sorted(data['BONES']) for name, data in bone_groups.items()}
+    assert classify_rigs_bone_groups(rigs, edited, classifier)['SKIPPED'] == len(rigs)
+
+
+def test_classify_rigs_with_remap(backend, bone_groups, bone_names):
+    backend.add_rig("rig_def", ["DEF-" + bone for bone in bone_names])
+    classifier = get_classifier([("Right", 'GLOB', "*.R", "", 'ANY', "", 'ANY')])
+    remap = BoneNameRemap([('PREFIX', "", "DEF-")])
+    
+    classify_rigs_bone_groups(["rig_def"], bone_groups, classifier, remap)
+    
+    captured = get_bone_groups_data(["rig_def"])
+    assert sorted(captured["Torso"]['BONES']) == sorted("DEF-" + bone for bone in bone_groups["Torso"]['BONES'])
+    assert sorted(captured["Right"]['BONES']) == ["DEF-arm.R", "DEF-forearm.R", "DEF-hand.R"]
\ No newline at end of file
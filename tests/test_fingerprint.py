@@ -0,0 +1,96 @@
+"""Data hashes, rig fingerprints and rig matching"""
+
+# Import standard library
+import os
+
+# Local imports
+from ara_rig_manager.fingerprint import (FINGERPRINT_KEY, find_matching_rigs, get_bone_groups_hash,
+                                         get_bone_names_fingerprint, get_bone_overlap, get_selection_sets_hash,
+                                         get_sidecar_path, hash_data, index_rig, read_sidecar, write_sidecar)
+from ara_rig_manager.remapping.helpers import BoneNameRemap
+
+
+def test_hash_ignores_key_order():
+    assert hash_data({"a": 1, "b": [1, 2]}) == hash_data({"b": [1, 2], "a": 1})
+    assert hash_data({"a": 1, "b": [1, 2]}) != hash_data({"a": 1, "b": [2, 1]})
+
+
+def test_bone_groups_hash_as_on_rig(bone_groups, bone_names):
+    reordered = {name: dict(data, BONES=list(reversed(data['BONES'])) + ["tail"])
+                 for name, data in reversed(list(bone_groups.items()))}
+    
+    assert get_bone_groups_hash(reordered, bone_names) == get_bone_groups_hash(bone_groups, bone_names)
+    assert get_bone_groups_hash(reordered, bone_names + ["tail"]) != get_bone_groups_hash(bone_groups, bone_names)
+
+
+def test_bone_groups_hash_colors(bone_groups, bone_names):
+    black = {"Black": dict(bone_groups["Torso"], NORMAL=[0, 0, 0])}
+    
+    assert get_bone_groups_hash(black, bone_names) == get_bone_groups_hash(
+        {"Black": dict(black["Black"], NORMAL=(0.0, 0.0, 0.00001))}, bone_names)
+    assert get_bone_groups_hash(black, bone_names) != get_bone_groups_hash(
+        {"Black": dict(black["Black"], NORMAL=[0.0, 0.0, 0.001])}, bone_names)
+    assert get_bone_groups_hash(black, bone_names) != get_bone_groups_hash(
+        {"Black": dict(black["Black"], MODE='THEME01')}, bone_names)
+
+
+def test_selection_sets_hash_as_on_rig(selection_sets, bone_names):
+    reordered = {name: ["tail"] + list(reversed(bones)) for name, bones in selection_sets.items()}
+    
+    assert get_selection_sets_hash(reordered, bone_names) == get_selection_sets_hash(selection_sets, bone_names)
+    assert get_selection_sets_hash(dict(selection_sets, Tail=[]), bone_names) != get_selection_sets_hash(
+        selection_sets, bone_names)
+
+
+def test_index_rig(backend, bone_names):
+    rig_object = backend.objects["rig_a"]
+    
+    fingerprint, rig_bone_names = index_rig(rig_object)
+    
+    assert rig_bone_names == frozenset(bone_names)
+    assert fingerprint == get_bone_names_fingerprint(reversed(bone_names))
+    assert rig_object[FINGERPRINT_KEY] == fingerprint
+
+
+def test_bone_overlap():
+    assert get_bone_overlap(0, set()) == 0.0
+    assert get_bone_overlap(3, {"a", "b", "c", "d"}) == 0.75
+
+
+def test_find_matching_rigs(backend, bone_names, rigs):
+    backend.add_rig("prop", ["root", "lid", "hinge"])
+    backend.add_rig("half", bone_names[:6])
+    backend.add_rig("linked", bone_names).library = "library.blend"
+    
+    assert find_matching_rigs(backend.objects, bone_names) == rigs + ["half"]
+    assert find_matching_rigs(backend.objects, bone_names, min_overlap=1.0) == rigs
+
+
+def test_find_matching_rigs_with_remap(backend, bone_names):
+    backend.add_rig("rig_def", ["DEF-" + bone for bone in bone_names])
+    remap = BoneNameRemap([('PREFIX', "", "DEF-")])
+    
+    assert find_matching_rigs(backend.objects, bone_names) == ["rig_a", "rig_b"]
+    assert find_matching_rigs(backend.objects, bone_names, remap=remap) == ["rig_a", "rig_b", "rig_def"]
+
+
+def test_sidecar(backend, tmp_path):
+    blend_path = str(tmp_path / "shot.blend")
+    with open(blend_path, 'wb') as file:
+        file.write(b"BLENDER")
+    rig_objects = list(backend.objects)
+    for rig_object in rig_objects:
+        index_rig(rig_object)
+    
+    write_sidecar(blend_path, rig_objects, {'BONE_GROUPS': "Default"})
+    
+    sidecar = read_sidecar(blend_path)
+    assert sidecar['PRESETS'] == {'BONE_GROUPS': "Default"}
+    assert sidecar['RIGS']["rig_a"]['FINGERPRINT'] == backend.objects["rig_a"][FINGERPRINT_KEY]
+    
+    with open(blend_path, 'ab') as file:
+        file.write(b"saved again")
+    assert read_sidecar(blend_path) is None
+    
+    os.remove(get_sidecar_path(blend_path))
+    assert read_sidecar(blend_path) is None
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""Operator run status and counters"""
+
+# Local imports
+from ara_rig_manager.instrumentation import count, get_last_run, operator_run
+from ara_rig_manager.snapshot import SelectionSetsSnapshot, run_transaction
+
+
+class Operator:
+    """Stand-in for a bpy operator, keeping its reports"""
+    
+    bl_label = "Test Operator"
+    
+    def __init__(self):
+        self.reports = []
+    
+    def report(self, level, message):
+        self.reports.append((level, message))
+
+
+def test_counters_and_finished_status():
+    with operator_run("Counting"):
+        count(operator_calls=3, groups=1)
+    
+    run = get_last_run()
+    assert run.status == 'FINISHED'
+    assert run.counters['operator_calls'] == 3
+    assert run.counters['groups'] == 1
+
+
+def test_rolled_back_transaction_fails_run(backend):
+    operator = Operator()
+    
+    def apply():
+        raise RuntimeError("broken preset")
+    
+    with operator_run(operator.bl_label):
+        result = run_transaction(operator, SelectionSetsSnapshot(["rig_a"]), apply, lambda operator, report: None)
+    
+    assert result == {'CANCELLED'}
+    assert get_last_run().status == 'FAILED'
+    assert operator.reports[0][0] == {'ERROR'}
\ No newline at end of file
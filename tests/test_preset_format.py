@@ -0,0 +1,67 @@
+"""JSON and binary preset round trips"""
+
+# Import standard library
+import pytest
+
+# Local imports
+from ara_rig_manager.preset_format import (KIND_BONE_GROUPS, KIND_SELECTION_SETS, convert_preset, decode_preset,
+                                           encode_preset, is_binary_preset, iter_preset, read_preset,
+                                           read_preset_bone_names, write_preset)
+from ara_rig_manager.remapping.helpers import get_preset_bone_names
+
+
+@pytest.fixture(params=["bone_groups", "selection_sets"])
+def preset(request, bone_groups, selection_sets):
+    data = bone_groups if request.param == "bone_groups" else selection_sets
+    # Names outside ASCII and empty members survive both formats
+    if request.param == "bone_groups":
+        data["Ωmega"] = dict(data["Torso"], MODE='DEFAULT', BONES=[])
+    else:
+        data["Ωmega"] = []
+    
+    return data
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_encode_decode(preset, compress):
+    kind = KIND_BONE_GROUPS if "Torso" in preset else KIND_SELECTION_SETS
+    
+    assert decode_preset(encode_preset(preset, kind, compress)) == preset
+
+
+@pytest.mark.parametrize("extension", [".json", ".arap"])
+def test_write_read(tmp_path, preset, extension):
+    filepath = str(tmp_path / ("preset" + extension))
+    
+    write_preset(filepath, preset)
+    
+    assert is_binary_preset(filepath) == (extension == ".arap")
+    assert read_preset(filepath) == preset
+    assert {name: value for name, value, fraction in iter_preset(filepath)} == preset
+    assert read_preset_bone_names(filepath) == get_preset_bone_names(preset)
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_convert_json_binary_json(tmp_path, preset, compress):
+    json_path = str(tmp_path / "preset.json")
+    binary_path = str(tmp_path / "preset.arap")
+    round_trip_path = str(tmp_path / "round_trip.json")
+    
+    write_preset(json_path, preset)
+    convert_preset(json_path, binary_path, compress)
+    convert_preset(binary_path, round_trip_path)
+    
+    assert read_preset(binary_path) == preset
+    with open(json_path, 'rb') as source, open(round_trip_path, 'rb') as round_trip:
+        assert source.read() == round_trip.read()
+
+
+def test_empty_files(tmp_path):
+    empty_path = tmp_path / "empty.json"
+    empty_path.write_bytes(b"")
+    binary_path = str(tmp_path / "empty.arap")
+    
+    write_preset(binary_path, {})
+    
+    assert read_preset(str(empty_path)) == {}
+    assert read_preset(binary_path) == {}
\ No newline at end of file
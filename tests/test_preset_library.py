@@ -0,0 +1,80 @@
+"""Versioned preset library and the preset stores reading it"""
+
+# Import standard library
+import os
+import pytest
+
+# Local imports
+from ara_rig_manager.preset_format import KIND_BONE_GROUPS, KIND_SELECTION_SETS
+from ara_rig_manager.preset_library import BLOCKS_DIR, PresetLibrary
+from ara_rig_manager.presets import BUNDLED_PRESET
+
+
+def count_blocks(library):
+    return sum(len(files) for directory, subdirectories, files in os.walk(os.path.join(library.root, BLOCKS_DIR)))
+
+
+def test_save_and_load(library, bone_groups):
+    entry, added = library.save(KIND_BONE_GROUPS, "Biped", bone_groups)
+    
+    assert added
+    assert entry['VERSION'] == 1 and entry['COUNT'] == len(bone_groups)
+    assert library.load(KIND_BONE_GROUPS, "Biped") == bone_groups
+    assert library.list_presets(KIND_BONE_GROUPS) == [("Biped", entry)]
+    assert library.list_presets(KIND_SELECTION_SETS) == []
+
+
+def test_identical_save_adds_no_version(library, selection_sets):
+    first, added = library.save(KIND_SELECTION_SETS, "Biped", selection_sets)
+    
+    assert library.save(KIND_SELECTION_SETS, "Biped", dict(selection_sets)) == (first, False)
+    assert len(library.get_versions(KIND_SELECTION_SETS, "Biped")) == 1
+
+
+def test_versions_share_blocks(library, selection_sets):
+    library.save(KIND_SELECTION_SETS, "Biped", selection_sets)
+    edited = dict(selection_sets, Head=["head"])
+    
+    entry, added = library.save(KIND_SELECTION_SETS, "Biped", edited)
+    library.save(KIND_SELECTION_SETS, "Quadruped", edited)
+    
+    assert added and entry['VERSION'] == 2
+    assert count_blocks(library) == len(selection_sets) + 1
+    assert library.load(KIND_SELECTION_SETS, "Biped", version=1) == selection_sets
+    assert library.load(KIND_SELECTION_SETS, "Biped") == edited
+
+
+def test_missing_presets(library, selection_sets):
+    library.save(KIND_SELECTION_SETS, "Biped", selection_sets)
+    
+    with pytest.raises(KeyError):
+        library.load(KIND_SELECTION_SETS, "Quadruped")
+    with pytest.raises(KeyError):
+        library.load(KIND_SELECTION_SETS, "Biped", version=2)
+    with pytest.raises(KeyError):
+        library.load(KIND_BONE_GROUPS, "Biped")
+
+
+def test_saves_from_other_sessions(library, selection_sets):
+    other = PresetLibrary(library.root)
+    library.save(KIND_SELECTION_SETS, "Biped", selection_sets)
+    
+    other.save(KIND_SELECTION_SETS, "Quadruped", selection_sets)
+    
+    assert [name for name, entry in library.list_presets(KIND_SELECTION_SETS)] == ["Biped", "Quadruped"]
+    assert [name for name, entry in other.list_presets(KIND_SELECTION_SETS)] == ["Biped", "Quadruped"]
+
+
+def test_store_reads_library(library, bone_groups_store, bone_groups):
+    edited = {"Torso": bone_groups["Torso"]}
+    
+    assert not bone_groups_store.has("Biped")
+    assert bone_groups_store.has(BUNDLED_PRESET)
+    assert bone_groups_store.get("Biped") == bone_groups
+    
+    library.save(KIND_BONE_GROUPS, "Biped", bone_groups)
+    library.save(KIND_BONE_GROUPS, "Biped", edited)
+    
+    assert bone_groups_store.has("Biped")
+    assert bone_groups_store.get("Biped") == edited
+    assert bone_groups_store.get(BUNDLED_PRESET) == bone_groups
\ No newline at end of file
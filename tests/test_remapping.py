@@ -0,0 +1,126 @@
+"""Bone name remapping and symmetrizing"""
+
+# Import standard library
+import pytest
+
+# Local imports
+from ara_rig_manager.bone_groups.helpers import get_bone_groups_data, patch_bone_groups, symmetrize_rigs_bone_groups
+from ara_rig_manager.fingerprint import get_bone_names_fingerprint, index_rig
+from ara_rig_manager.remapping.helpers import (BoneNameRemap, flip_side_name, get_mirror_table, get_preset_bone_names,
+                                               is_valid_rule, remap_bone_groups, symmetrize_bone_groups,
+                                               symmetrize_selection_sets)
+from ara_rig_manager.selection_sets.helpers import (get_rigs_selection_sets_data, patch_selection_sets,
+                                                    symmetrize_rigs_selection_sets)
+
+
+@pytest.mark.parametrize("name, flipped", [
+    ("hand.L", "hand.R"),
+    ("hand_r.001", "hand_l.001"),
+    ("L.thigh", "R.thigh"),
+    ("LeftFoot", "RightFoot"),
+    ("spine", "spine")
+])
+def test_flip_side_name(name, flipped):
+    assert flip_side_name(name) == flipped
+
+
+@pytest.mark.parametrize("rule, valid", [
+    (('PREFIX', "DEF-", "ORG-"), True),
+    (('REGEX', r"^DEF-(.*)$", r"ORG-\1"), True),
+    (('REGEX', r"^DEF-(.*)$", r"ORG-\9"), False),
+    (('REGEX', r"^DEF-(", "ORG-"), False),
+    (('MIRROR', "", ""), True)
+])
+def test_is_valid_rule(rule, valid):
+    assert is_valid_rule(*rule) == valid
+
+
+def test_resolve_chains_rules():
+    remap = BoneNameRemap([('PREFIX', "DEF-", "ORG-"), ('SUFFIX', ".L", "_L")])
+    bone_names = {"ORG-hand_L", "DEF-spine", "head"}
+    
+    assert remap.resolve("DEF-hand.L", bone_names) == "ORG-hand_L"
+    assert remap.resolve("DEF-spine", bone_names) == "DEF-spine"
+    assert remap.resolve("head", bone_names) == "head"
+    assert remap.resolve("DEF-foot.L", bone_names) is None
+
+
+def test_table_maps_preset_bones(backend):
+    rig_object = backend.add_rig("rig_def", ["DEF-root", "DEF-spine", "head"])
+    remap = BoneNameRemap([('PREFIX', "", "DEF-")])
+    preset_bone_names = {"root", "spine", "head", "tail"}
+    
+    table = remap.get_table(*index_rig(rig_object), preset_bone_names)
+    
+    assert table.map_bones(["tail", "spine", "head", "root"]) == ["DEF-spine", "head", "DEF-root"]
+    assert remap.get_table(*index_rig(rig_object), preset_bone_names) is table
+    assert remap.get_table(*index_rig(rig_object), {"root"}) is not table
+
+
+def test_patch_with_remap(backend, bone_groups, bone_names):
+    backend.add_rig("rig_def", ["DEF-" + bone for bone in bone_names])
+    remap = BoneNameRemap([('PREFIX', "", "DEF-")])
+    
+    report = patch_bone_groups(["rig_def"], bone_groups, remap)
+    
+    assert report['ADDED'] == len(bone_groups)
+    captured = get_bone_groups_data(["rig_def"])
+    assert sorted(captured["Left"]['BONES']) == ["DEF-arm.L", "DEF-forearm.L", "DEF-hand.L"]
+    assert patch_bone_groups(["rig_def"], bone_groups, remap)['SKIPPED'] == 1
+
+
+def test_remap_drops_missing_bones(backend, bone_groups):
+    rig_object = backend.add_rig("rig_def", ["DEF-root", "DEF-spine"])
+    remap = BoneNameRemap([('PREFIX', "", "DEF-")])
+    table = remap.get_table(*index_rig(rig_object), get_preset_bone_names(bone_groups))
+    
+    remapped = remap_bone_groups(bone_groups, table)
+    
+    assert remapped["Torso"]['BONES'] == ["DEF-root", "DEF-spine"]
+    assert remapped["Left"]['BONES'] == []
+    assert remapped["Torso"]['NORMAL'] == bone_groups["Torso"]['NORMAL']
+
+
+def get_rig_mirror_table(bone_names):
+    bone_names = frozenset(bone_names)
+    
+    return get_mirror_table(get_bone_names_fingerprint(bone_names), bone_names)
+
+
+def test_mirror_table(bone_names):
+    table = get_rig_mirror_table(set(bone_names) - {"hand.R"})
+    
+    assert table == {"arm.L": "arm.R", "forearm.L": "forearm.R", "arm.R": "arm.L", "forearm.R": "forearm.L"}
+
+
+def test_symmetrize_bone_groups(bone_groups, bone_names):
+    one_sided = {"Torso": bone_groups["Torso"], "Left": dict(bone_groups["Left"], BONES=["arm.L", "hand.L"])}
+    
+    symmetric = symmetrize_bone_groups(one_sided, get_rig_mirror_table(bone_names))
+    
+    assert symmetric["Right"] == dict(one_sided["Left"], BONES=["arm.R", "hand.R"])
+    assert symmetric["Torso"] == one_sided["Torso"]
+    assert one_sided["Left"]['BONES'] == ["arm.L", "hand.L"]
+
+
+def test_symmetrize_selection_sets(bone_names):
+    selection_sets = {"Arm.L": ["arm.L", "forearm.L"], "Arm.R": ["arm.R"], "Hands": ["hand.L"]}
+    
+    symmetric = symmetrize_selection_sets(selection_sets, get_rig_mirror_table(bone_names))
+    
+    assert symmetric == {"Arm.L": ["arm.L", "forearm.L"], "Arm.R": ["arm.R", "forearm.R"],
+                         "Hands": ["hand.L", "hand.R"]}
+
+
+def test_symmetrize_rigs(backend, bone_groups, rigs):
+    patch_bone_groups(rigs, {"Left": bone_groups["Left"]})
+    patch_selection_sets({"Arm.L": ["arm.L"]}, rigs)
+    
+    assert symmetrize_rigs_bone_groups(rigs)['ADDED'] == len(rigs)
+    assert symmetrize_rigs_selection_sets(rigs)['ADDED'] == len(rigs)
+    
+    for rig in rigs:
+        assert sorted(get_bone_groups_data([rig])["Right"]['BONES']) == ["arm.R", "forearm.R", "hand.R"]
+        assert get_rigs_selection_sets_data([rig]) == {"Arm.L": ["arm.L"], "Arm.R": ["arm.R"]}
+    assert symmetrize_rigs_bone_groups(rigs)['SKIPPED'] == len(rigs)
+    assert symmetrize_rigs_selection_sets(rigs)['SKIPPED'] == len(rigs)
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""Rig registry lookups after the file changed under it"""
+
+# Local imports
+from ara_rig_manager.fake_armature import FakeObject
+from ara_rig_manager.rig_registry import get_armature_rigs, get_registered_rigs
+
+
+def test_renamed_armature(backend):
+    assert get_armature_rigs("rig_a") == ["rig_a"]
+    
+    backend.objects["rig_a"].data.name = "rig_a_data"
+    
+    assert get_armature_rigs("rig_a_data") == ["rig_a"]
+    assert get_armature_rigs("rig_a") == []
+
+
+def test_rig_replaced_by_other_object(backend):
+    assert get_registered_rigs() == ["rig_a", "rig_b"]
+    
+    backend.objects.remove(backend.objects.find("rig_b"))
+    backend.objects.append(FakeObject("mesh"))
+    
+    assert get_registered_rigs() == ["rig_a"]
+
+
+def test_added_rig(backend, bone_names):
+    get_registered_rigs()
+    
+    backend.add_rig("rig_c", bone_names)
+    
+    assert get_registered_rigs() == ["rig_a", "rig_b", "rig_c"]
\ No newline at end of file
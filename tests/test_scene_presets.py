@@ -0,0 +1,92 @@
+"""Presets stored in scenes"""
+
+# Import standard library
+import pytest
+
+# Local imports
+from ara_rig_manager.fingerprint import get_bone_groups_hash
+from ara_rig_manager.preset_format import KIND_BONE_GROUPS, KIND_SELECTION_SETS
+from ara_rig_manager.scene_presets.helpers import (get_stored_preset, pack_array, read_stored_preset, rebuild_cache,
+                                                   scene_preset_property, store_scene_preset, unpack_array,
+                                                   write_stored_preset)
+
+
+@pytest.fixture
+def scene(backend):
+    return backend.scenes.add()
+
+
+@pytest.mark.parametrize("typecode, values", [
+    ('I', [0, 1, 2, 70000]),
+    ('d', [0.0, 1 / 3, 0.8, 1e-9])
+])
+def test_packed_arrays(typecode, values):
+    packed = pack_array(typecode, values)
+    
+    assert packed.isascii() and "\0" not in packed
+    assert list(unpack_array(typecode, packed)) == values
+
+
+def test_bone_groups_round_trip(scene, bone_groups, bone_names):
+    stored = get_stored_preset(scene, KIND_BONE_GROUPS)
+    
+    assert write_stored_preset(stored, KIND_BONE_GROUPS, bone_groups, "Biped")
+    
+    data = read_stored_preset(stored, KIND_BONE_GROUPS)
+    assert data == {name: dict(value, NORMAL=tuple(value['NORMAL']), SELECT=tuple(value['SELECT']),
+                               ACTIVE=tuple(value['ACTIVE'])) for name, value in bone_groups.items()}
+    assert get_bone_groups_hash(data, bone_names) == get_bone_groups_hash(bone_groups, bone_names)
+    assert len(stored.bone_names) == len(bone_names)
+
+
+def test_selection_sets_round_trip(scene, selection_sets):
+    stored = get_stored_preset(scene, KIND_SELECTION_SETS)
+    
+    write_stored_preset(stored, KIND_SELECTION_SETS, selection_sets, "Biped")
+    
+    assert read_stored_preset(stored, KIND_SELECTION_SETS) == selection_sets
+    assert len(stored.bone_names) == len({bone for bones in selection_sets.values() for bone in bones})
+
+
+def test_rewrites_only_changed_content(scene, selection_sets):
+    stored = get_stored_preset(scene, KIND_SELECTION_SETS)
+    write_stored_preset(stored, KIND_SELECTION_SETS, selection_sets, "Biped")
+    
+    assert not write_stored_preset(stored, KIND_SELECTION_SETS, dict(selection_sets), "Biped")
+    assert read_stored_preset(stored, KIND_SELECTION_SETS) is read_stored_preset(stored, KIND_SELECTION_SETS)
+    
+    assert write_stored_preset(stored, KIND_SELECTION_SETS, {"Head": ["head"]}, "Biped")
+    assert read_stored_preset(stored, KIND_SELECTION_SETS) == {"Head": ["head"]}
+
+
+def test_rebuild_cache(backend, scene, selection_sets):
+    stored = get_stored_preset(scene, KIND_SELECTION_SETS)
+    write_stored_preset(stored, KIND_SELECTION_SETS, selection_sets, "Biped")
+    read_stored_preset(stored, KIND_SELECTION_SETS)
+    # Loading a file replaces the stored data under the cached pointers
+    stored.entries[0].name = "Limbs"
+    
+    rebuild_cache()
+    
+    assert sorted(read_stored_preset(stored, KIND_SELECTION_SETS)) == ["Hands", "Head", "Limbs"]
+
+
+def test_scene_preset_property(scene, library, bone_groups_store, bone_groups):
+    edited = {"Torso": bone_groups["Torso"]}
+    library.save(KIND_BONE_GROUPS, "Biped", edited)
+    names = {}
+    preset = scene_preset_property(bone_groups_store, lambda scene: names[scene.name])
+    names[scene.name] = "Biped"
+    
+    assert preset.fget(scene) == edited
+    
+    assert store_scene_preset(scene, KIND_BONE_GROUPS, "Biped")
+    library.save(KIND_BONE_GROUPS, "Biped", bone_groups)
+    
+    # The stored copy wins while it is the picked preset, or when the picked one is not in the library
+    assert get_bone_groups_hash(preset.fget(scene), ["root"]) == get_bone_groups_hash(edited, ["root"])
+    names[scene.name] = "Quadruped"
+    assert get_bone_groups_hash(preset.fget(scene), ["root"]) == get_bone_groups_hash(edited, ["root"])
+    
+    library.save(KIND_BONE_GROUPS, "Quadruped", bone_groups)
+    assert preset.fget(scene) == bone_groups
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""Selection sets capture, patch and rollback"""
+
+# Import standard library
+import pytest
+
+# Local imports
+from ara_rig_manager.preset_format import write_preset
+from ara_rig_manager.remapping.helpers import BoneNameRemap
+from ara_rig_manager.selection_sets.helpers import (get_rigs_selection_sets_data, import_selection_sets_streaming,
+                                                    patch_selection_sets, remove_selection_sets)
+from ara_rig_manager.snapshot import SelectionSetsSnapshot, apply_with_rollback
+
+
+def test_patch_round_trip(backend, selection_sets, rigs):
+    report = patch_selection_sets(selection_sets, rigs)
+    
+    assert report['ADDED'] == len(selection_sets) * len(rigs)
+    for rig in rigs:
+        assert get_rigs_selection_sets_data([rig]) == selection_sets
+
+
+def test_targets_matching_rigs(backend, selection_sets, rigs):
+    backend.add_rig("prop", ["root", "lid", "hinge"])
+    
+    patch_selection_sets(selection_sets)
+    
+    assert get_rigs_selection_sets_data(rigs) == selection_sets
+    assert get_rigs_selection_sets_data(["prop"]) == {}
+
+
+def test_recapture_patches_nothing(backend, selection_sets, rigs):
+    patch_selection_sets(selection_sets, rigs)
+    captured = get_rigs_selection_sets_data(rigs)
+    
+    report = patch_selection_sets(captured, rigs)
+    
+    assert report == {'ADDED': 0, 'CHANGED': 0, 'REMOVED': 0, 'SKIPPED': len(rigs)}
+
+
+def test_patch_changes_and_removes(backend, selection_sets, rigs):
+    patch_selection_sets(selection_sets, rigs)
+    edited = {"Arms": ["arm.L", "arm.R"], "Head": ["neck", "head"], "Spine": ["spine", "chest"]}
+    
+    report = patch_selection_sets(edited, rigs)
+    
+    assert report == {'ADDED': len(rigs), 'CHANGED': len(rigs), 'REMOVED': len(rigs), 'SKIPPED': 0}
+    for rig in rigs:
+        assert get_rigs_selection_sets_data([rig]) == edited
+
+
+def test_rollback_restores_snapshot(backend, selection_sets, rigs, fail_after):
+    patch_selection_sets(selection_sets, rigs)
+    backend.objects["rig_a"].active_selection_set = 1
+    snapshot = SelectionSetsSnapshot(rigs)
+    
+    with pytest.raises(RuntimeError):
+        apply_with_rollback(snapshot, fail_after(
+            lambda: remove_selection_sets(rigs),
+            lambda: patch_selection_sets({"Other": ["root"]}, rigs)))
+    
+    for rig in rigs:
+        assert get_rigs_selection_sets_data([rig]) == selection_sets
+    assert backend.objects["rig_a"].active_selection_set == 1
+    assert patch_selection_sets(selection_sets, rigs)['SKIPPED'] == len(rigs)
+
+
+@pytest.mark.parametrize("extension", [".json", ".arap"])
+def test_streaming_import_targets_matching_rigs(backend, selection_sets, rigs, tmp_path, extension):
+    backend.add_rig("prop", ["root", "lid", "hinge"])
+    filepath = str(tmp_path / ("selection_sets" + extension))
+    write_preset(filepath, selection_sets)
+    progress = []
+    
+    report = import_selection_sets_streaming(filepath, progress=progress.append)
+    
+    assert report['ADDED'] == len(selection_sets) * len(rigs)
+    assert get_rigs_selection_sets_data(rigs) == selection_sets
+    assert get_rigs_selection_sets_data(["prop"]) == {}
+    assert progress == sorted(progress) and progress[-1] == 1.0
+    assert import_selection_sets_streaming(filepath)['SKIPPED'] == len(rigs)
+
+
+def test_streaming_import_keeps_active_set(backend, selection_sets, tmp_path):
+    patch_selection_sets({"Old": ["root"], "Head": ["head"]}, ["rig_a"])
+    backend.objects["rig_a"].active_selection_set = 1
+    filepath = str(tmp_path / "selection_sets.json")
+    write_preset(filepath, selection_sets)
+    
+    report = import_selection_sets_streaming(filepath, rigs=["rig_a"])
+    
+    assert report == {'ADDED': 2, 'CHANGED': 1, 'REMOVED': 1, 'SKIPPED': 0}
+    assert get_rigs_selection_sets_data(["rig_a"]) == selection_sets
+    assert backend.objects["rig_a"].selection_sets[backend.objects["rig_a"].active_selection_set].name == "Head"
+
+
+def test_streaming_import_with_remap(backend, selection_sets, bone_names, tmp_path):
+    backend.add_rig("rig_org", ["ORG-" + bone for bone in bone_names])
+    filepath = str(tmp_path / "selection_sets.arap")
+    write_preset(filepath, selection_sets)
+    remap = BoneNameRemap([('REGEX', r"^(.*)$", r"ORG-\1")])
+    
+    import_selection_sets_streaming(filepath, remap=remap)
+    
+    expected = {name: ["ORG-" + bone for bone in bones] for name, bones in selection_sets.items()}
+    assert get_rigs_selection_sets_data(["rig_org"]) == expected
+    assert import_selection_sets_streaming(filepath, rigs=["rig_org"], remap=remap)['SKIPPED'] == 1
\ No newline at end of file